@@ -1,7 +1,23 @@
-from .bitmart_adapter import BitMartAdapter
-from .biconomy_adapter import BiconomyAdapter
-from .dextrade_adapter import DexTradeAdapter
-from .tapbit_adapter import TapbitAdapter
-from .p2b_adapter import P2BAdapter
+import importlib
 
-__all__ = ['BitMartAdapter', 'BiconomyAdapter', 'DexTradeAdapter', 'TapbitAdapter', 'P2BAdapter']
\ No newline at end of file
+from .registry import register_adapter, resolve_adapter, build_adapter
+
+# Adapter classes are resolved lazily so importing the package (or
+# adapters.base) does not pull in every venue module.
+_LAZY = {
+    'BitMartAdapter': '.bitmart_adapter',
+    'BiconomyAdapter': '.biconomy_adapter',
+    'DexTradeAdapter': '.dextrade_adapter',
+    'TapbitAdapter': '.tapbit_adapter',
+    'P2BAdapter': '.p2b_adapter',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ['BitMartAdapter', 'BiconomyAdapter', 'DexTradeAdapter', 'TapbitAdapter', 'P2BAdapter',
+           'register_adapter', 'resolve_adapter', 'build_adapter']
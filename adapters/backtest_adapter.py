@@ -18,11 +18,14 @@ class BacktestAdapter(BaseAdapter):
         return round(self.price, 2)
 
     def fetch_best_quotes(self): return self.price * 0.9999, self.price * 1.0001
-    def fetch_open_orders(self): return list(self.orders.values())
+    def fetch_open_orders(self, strict=False): return list(self.orders.values())
+    def fetch_balances(self, currencies): return {c: {"free": 1e12, "used": 0.0} for c in currencies}
 
     def cancel_orders_by_ids(self, ids):
         for oid in ids:
             self.orders.pop(oid, None)
+        self._on_cancelled(ids)
+        return []
 
     def create_limit(self, side, price, amount):
         oid = f"bt-{len(self.orders)+1}"
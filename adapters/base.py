@@ -1,9 +1,60 @@
 # adapters/base.py
 from __future__ import annotations
 from typing import Dict, List, Sequence, Optional, Tuple
+import copy
 import math
 
+from helpers import clock
+from helpers.balance_cache import BalanceCache
+from helpers.circuit_breaker import BreakerBoard
+from helpers.client_ids import ClientIdGenerator
+from helpers.priority import cancel_order
+from helpers.validation import OrderValidator
+
+# Per-cycle market data older than this is refetched even without begin_cycle()
+MARKET_DATA_MAX_AGE_S = 5.0
+
+# BTC price a cycle quotes around when the venue can't be asked (keeps it quoting)
+FALLBACK_BTC_LAST = 92000.0
+
+
+def observed_btc(last) -> Optional[float]:
+    """last if it is a real BTC observation; None for a failed fetch (None) or junk."""
+    if last is None or not math.isfinite(last) or last <= 0:
+        return None
+    return float(last)
+
+class _VenueAttr:
+    """
+    Attribute main attaches to a venue's adapter (possibly after its symbol
+    views exist): stored in one dict shared by every view, so setting it on
+    any of them sets it on all.
+    """
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return None
+        return obj._attached().get(self.name)
+
+    def __set__(self, obj, value):
+        obj._attached()[self.name] = value
+
+
 class BaseAdapter:
+    journal = _VenueAttr()  # helpers.order_journal.OrderJournal, attached by main when journaling is on
+    audit = _VenueAttr()    # helpers.audit_log.AuditLog, attached by main for live venues when AUDIT_DIR is set
+    md_bus = _VenueAttr()   # helpers.md_bus.MarketDataBus, attached by main when a sidecar is running
+    last_reject: Optional[str] = None  # why the last create_limit failed (venue message/error)
+    shadow = _VenueAttr()   # helpers.shadow.ShadowBook, attached by main for dry-run venues in shadow mode
+    pnl = _VenueAttr()      # helpers.pnl.PnLEngine, attached by main for live venues whose fills are ingested
+    cancel_batch_size = 1  # orders per cancel request (shadow-mode request accounting)
+    client_id_max_len = 32      # venue limit on client order IDs
+    client_id_numeric = False   # venue only accepts digits
+    cycle_mid: Optional[float] = None  # reference mid of this view's latest cycle (set by run_once)
+
     def __init__(self, cfg):
         self.cfg = cfg
         self.exchange_name = cfg.id
@@ -13,15 +64,193 @@ class BaseAdapter:
         self._market = None
 
     def connect(self) -> None: raise NotImplementedError
-    def fetch_btc_last(self) -> float: raise NotImplementedError
+    def fetch_btc_last(self) -> Optional[float]: raise NotImplementedError  # None when the venue can't be asked
     def get_precisions(self) -> Tuple[int, int]: raise NotImplementedError
     def get_limits(self) -> Dict[str, Optional[float]]: raise NotImplementedError
     def get_steps(self) -> Tuple[float, float]: raise NotImplementedError
     def fetch_balances(self, currencies: Sequence[str]) -> Dict[str, Dict[str, float]]: raise NotImplementedError
     def fetch_best_quotes(self) -> Tuple[Optional[float], Optional[float]]: raise NotImplementedError
-    def fetch_open_orders(self) -> List[dict]: raise NotImplementedError
+    def fetch_open_orders(self, strict: bool = False) -> List[dict]: raise NotImplementedError  # strict: raise on failure instead of returning []
     def cancel_all(self) -> None: raise NotImplementedError
-    def cancel_orders_by_ids(self, order_ids: Sequence[str]) -> None: raise NotImplementedError
+    def cancel_orders_by_ids(self, order_ids: Sequence[str]) -> List[str]: raise NotImplementedError  # returns IDs still live
     def create_limit(self, side: str, price: float, amount: float) -> Optional[str]: raise NotImplementedError
+    def fetch_recent_trades(self) -> List[Tuple[float, float, float]]: raise NotImplementedError  # (ts, price, qty)
+    def find_order_by_client_id(self, client_id: str) -> Optional[str]: raise NotImplementedError  # order ID or None
+    def fetch_fills_since(self, cursor: Optional[str]) -> Tuple[list, Optional[str]]: raise NotImplementedError  # (helpers.fills.Fill page oldest first, next cursor)
     def price_to_precision(self, px: float) -> float: raise NotImplementedError
     def amount_to_precision(self, amt: float) -> float: raise NotImplementedError
+
+    def warm(self) -> None:
+        """Prime the HTTP pool (DNS/TLS) before the first cycle. Failures are non-fatal."""
+        self.fetch_best_quotes()
+
+    def _cancel_priority(self, order_ids: List[str]) -> List[str]:
+        """Stale orders nearest this cycle's mid first, so the touch is cleared before deep levels."""
+        if self.journal is None or self.cycle_mid is None:
+            return order_ids
+        return cancel_order(order_ids, self.journal.prices(order_ids), self.cycle_mid)
+
+    def _on_cancelled(self, order_ids: Sequence[str]) -> None:
+        """Called with every confirmed cancel: journal it and release its reserved funds."""
+        if not order_ids:
+            return
+        if self.journal is not None:
+            self.journal.cancelled(order_ids)
+        if self.audit is not None:
+            self.audit.cancelled(order_ids, self.symbol)
+        self.balance_cache.release(order_ids)
+
+    # ---------------- Balances ---------------- #
+
+    @property
+    def balance_cache(self) -> BalanceCache:
+        """Free balances shared by all symbol views of this venue."""
+        cache = self.__dict__.get("_balance_cache")
+        if cache is None:
+            cache = self._balance_cache = BalanceCache(self.fetch_balances)
+        return cache
+
+    @property
+    def validator(self) -> OrderValidator:
+        """Pre-trade rules and rejection feedback shared by all symbol views of this venue."""
+        v = self.__dict__.get("_validator")
+        if v is None:
+            v = self._validator = OrderValidator(self.exchange_name)
+        return v
+
+    @property
+    def breakers(self) -> BreakerBoard:
+        """Circuit breakers guarding this venue's HTTP session (see helpers/circuit_breaker.py)."""
+        b = self.__dict__.get("_breakers")
+        if b is None:
+            b = self._breakers = BreakerBoard(self.exchange_name)
+        return b
+
+    @property
+    def client_ids(self) -> ClientIdGenerator:
+        """Client order IDs, unique across this venue's symbol views and restarts."""
+        g = self.__dict__.get("_client_ids")
+        if g is None:
+            g = self._client_ids = ClientIdGenerator(max_len=self.client_id_max_len,
+                                                     numeric=self.client_id_numeric)
+        return g
+
+    def _note_reject(self, detail) -> None:
+        """Remember why create_limit failed (response dict or exception, incl. HTTP error body)."""
+        response = getattr(detail, "response", None)
+        if response is not None and getattr(response, "text", None):
+            detail = f"{detail} {response.text[:500]}"
+        self.last_reject = str(detail)[:1000]
+
+    def base_quote(self) -> Tuple[str, str]:
+        """("OHO", "USDT") for OHO/USDT, OHO_USDT or OHOUSDT."""
+        symbol = self.symbol.upper()
+        for sep in ("/", "_", "-"):
+            if sep in symbol:
+                base, quote = symbol.split(sep, 1)
+                return base, quote
+        for quote in ("USDT", "USDC", "BTC", "ETH"):
+            if symbol.endswith(quote) and len(symbol) > len(quote):
+                return symbol[:-len(quote)], quote
+        raise ValueError(f"Cannot split symbol {self.symbol!r} into base/quote")
+
+    # ---------------- Multi-symbol ---------------- #
+
+    def markets(self) -> List[str]:
+        """Every market this adapter quotes: the primary symbol plus cfg.symbols."""
+        extra = getattr(self.cfg, "symbols", None) or []
+        primary = self.__dict__.get("_primary_symbol", self.symbol)
+        return [primary] + [s for s in extra if s != primary]
+
+    @property
+    def label(self) -> str:
+        return self.exchange_name if len(self.markets()) == 1 else f"{self.exchange_name}:{self.symbol}"
+
+    def for_symbol(self, symbol: Optional[str]) -> "BaseAdapter":
+        """Same adapter (shared session/credentials/market-data cache) pointed at another market."""
+        if not symbol or symbol == self.symbol:
+            return self
+        self._shared()  # create before copying so every view shares them
+        self._attached()
+        self.balance_cache
+        self.validator
+        self.breakers
+        self.client_ids
+        getattr(self, "cancel_slots", None)  # BatchCancelMixin venues
+        self.__dict__.setdefault("_primary_symbol", self.symbol)
+        view = copy.copy(self)
+        view.symbol = symbol
+        if hasattr(self, "current_cycle_order_ids"):
+            view.current_cycle_order_ids = set()
+        return view
+
+    def symbol_views(self) -> List["BaseAdapter"]:
+        """One adapter view per market; cycles are run per view."""
+        views = self.__dict__.get("_views")
+        if views is None:
+            views = self._views = [self.for_symbol(s) for s in self.markets()]
+        return views
+
+    # ---------------- Shared per-cycle market data ---------------- #
+
+    def _shared(self) -> dict:
+        return self.__dict__.setdefault("_md", {})
+
+    def _attached(self) -> dict:
+        return self.__dict__.setdefault("_venue_attrs", {})
+
+    def _cached(self, key: str, fetch):
+        md = self._shared()
+        hit = md.get(key)
+        if hit is not None and clock.monotonic() - hit[0] < MARKET_DATA_MAX_AGE_S:
+            return hit[1]
+        value = fetch()
+        md[key] = (clock.monotonic(), value)
+        return value
+
+    def begin_cycle(self) -> None:
+        """Forget last cycle's market data; the next reads hit the venue once for all symbols."""
+        self._shared().clear()
+
+    def btc_last(self) -> Optional[float]:
+        """BTC reference price: shared-memory bus if fresh, else fetched once per venue per cycle (None if failed)."""
+        if self.md_bus is not None:
+            last = self.md_bus.reference_last(self.exchange_name)
+            if last is not None:
+                return last
+        return self._cached("btc", self.fetch_btc_last)
+
+    def best_quotes(self) -> Tuple[Optional[float], Optional[float]]:
+        """Best bid/ask for this view's symbol; all markets are fetched in one batch where possible."""
+        if self.md_bus is not None:
+            quotes = self.md_bus.best_quotes(self.exchange_name, self.symbol)
+            if quotes is not None:
+                return quotes
+
+        markets = self.markets()
+        if len(markets) == 1:
+            return self._cached(f"quotes:{self.symbol}", self.fetch_best_quotes) or (None, None)
+        quotes = self._cached("quotes", lambda: self.fetch_tickers(markets))
+        return quotes.get(self.symbol) or (None, None)
+
+    def fetch_tickers(self, symbols: Sequence[str]) -> Dict[str, Tuple[Optional[float], Optional[float]]]:
+        """Best bid/ask for several symbols. Override where the venue has an all-tickers endpoint."""
+        return {s: self.for_symbol(s).fetch_best_quotes() for s in symbols}
+
+    def mass_cancel(self, symbol: Optional[str] = None) -> int:
+        """
+        Cancel every open order on symbol (default: self.symbol) and return how many were cancelled.
+
+        Adapters with a native cancel-all-by-symbol endpoint override this; the
+        fallback is one open-orders fetch followed by cancel_orders_by_ids.
+        """
+        if self.dry_run:
+            return 0
+
+        target = self.for_symbol(symbol)
+        order_ids = [str(o["id"]) for o in target.fetch_open_orders() if o.get("id")]
+        if not order_ids:
+            return 0
+
+        live = target.cancel_orders_by_ids(order_ids) or []
+        return len(order_ids) - len(live)
@@ -1,19 +1,28 @@
 # adapters/biconomy_adapter.py — Biconomy Adapter with detailed logging
 import os
+import json
 import time
 import hashlib
-import requests
 import logging
-from typing import Optional, List
+from typing import Optional, List, Dict, Set
 
+from helpers import clock
 from helpers.batch_cancel import BatchCancelMixin
+from helpers.http import new_session
+from helpers import decode
+from .base import BaseAdapter
 
 logger = logging.getLogger(__name__)
 
 BASE = "https://api.biconomy.com"
 
+# One all-markets download serves BTC and every quoted market for this long
+TICKERS_MAX_AGE_S = 1.0
+
+
+class BiconomyAdapter(BatchCancelMixin, BaseAdapter):
+    cancel_batch_size = 10  # cancel_batch rejects larger batches
 
-class BiconomyAdapter(BatchCancelMixin):
     def __init__(self, cfg):
         self.cfg = cfg
         self.exchange_name = cfg.id
@@ -23,13 +32,16 @@ class BiconomyAdapter(BatchCancelMixin):
 
         self.key = os.getenv("BICONOMY_KEY", "")
         self.secret = os.getenv("BICONOMY_SECRET", "")
-        self.session = requests.Session()
+        self.session = new_session(pool_size=self.CANCEL_CONCURRENCY, breakers=self.breakers)
         self.session.headers.update({
             "X-BB-APIKEY": self.key,
             "Content-Type": "application/x-www-form-urlencoded",
             "X-SITE-ID": "127"
         })
 
+        # Track current cycle's order IDs
+        self.current_cycle_order_ids: Set[str] = set()
+
     def _sign(self, params: dict) -> dict:
         if not self.secret:
             return params
@@ -46,62 +58,138 @@ class BiconomyAdapter(BatchCancelMixin):
         r.raise_for_status()
         return r.json()
 
+    def _request(self, method: str, path: str, data: dict = None):
+        """Unified request method for BatchCancelMixin compatibility (all private calls are POST)."""
+        return self._post(path, data or {})
+
     def connect(self):
         logger.info(f"Connected {self.exchange_name} (Biconomy)")
 
-    def fetch_btc_last(self) -> float:
+    def _tickers(self, symbols) -> Dict[str, decode.Ticker]:
+        """
+        Biconomy only has the all-markets list. One download is reused for
+        TICKERS_MAX_AGE_S (BTC and the quoted markets come from the same
+        snapshot) and only the wanted rows are decoded.
+        """
+        shared = self._shared()
+        snap = shared.get("tickers_raw")
+        if snap is None or clock.monotonic() - snap[0] > TICKERS_MAX_AGE_S:
+            r = self.session.get(BASE + "/api/v1/tickers", timeout=10)
+            r.raise_for_status()
+            snap = shared["tickers_raw"] = (clock.monotonic(), r.content)
+        return decode.biconomy_tickers(snap[1], symbols)
+
+    def fetch_btc_last(self) -> Optional[float]:
         try:
-            r = requests.get(BASE + "/api/v1/tickers", timeout=10).json()
-            for t in r.get("ticker", []):
-                if t.get("symbol") in ("BTC_USDT", "BTCUSDT"):
-                    return float(t["last"])
+            for t in self._tickers(("BTC_USDT", "BTCUSDT")).values():
+                if t.last is not None:
+                    return t.last
         except Exception as e:
             logger.warning(f"{self.exchange_name} fetch_btc_last failed: {e}")
-        return 92000.0
+        return None
 
     def fetch_best_quotes(self):
         try:
-            r = requests.get(BASE + "/api/v1/tickers", timeout=10).json()
-            for t in r.get("ticker", []):
-                if t.get("symbol") == self.symbol.replace("/", "_"):
-                    return float(t.get("buy")), float(t.get("sell"))
+            symbol = self.symbol.replace("/", "_")
+            t = self._tickers((symbol,)).get(symbol)
+            if t is not None:
+                return t.bid, t.ask
         except Exception as e:
             logger.warning(f"{self.exchange_name} fetch_best_quotes failed: {e}")
         return None, None
 
-    def fetch_open_orders(self) -> List[dict]:
+    def fetch_tickers(self, symbols):
+        """Biconomy only has the all-tickers list, so every market comes from one download."""
+        wanted = {s.replace("/", "_"): s for s in symbols}
+        out = {}
+        try:
+            for t in self._tickers(wanted).values():
+                out[wanted[t.symbol]] = (t.bid, t.ask)
+        except Exception as e:
+            logger.warning(f"{self.exchange_name} fetch_tickers failed: {e}")
+        return out
+
+    def fetch_balances(self, currencies) -> Dict[str, Dict[str, float]]:
+        r = self._post("/api/v1/private/user", {})
+        if r.get("code") != 0:
+            raise RuntimeError(f"balances request rejected: code={r.get('code')} message={r.get('message')}")
+        result = r.get("result") or {}
+        out = {}
+        for cur in currencies:
+            b = result.get(cur.upper()) or {}
+            out[cur] = {"free": float(b.get("available") or 0), "used": float(b.get("freeze") or 0)}
+        return out
+
+    def fetch_open_orders(self, strict: bool = False) -> List[dict]:
         if self.dry_run:
             return []
         try:
             r = self._post("/api/v1/private/order/pending",
                            {"market": self.symbol, "offset": "0", "limit": "100"})
+            if r.get("code") != 0:
+                raise RuntimeError(f"code={r.get('code')} message={r.get('message')}")
             records = r.get("result", {}).get("records", [])
             return [
                 {"id": str(o.get("id", o.get("order_id")))}
                 for o in records if o.get("id") or o.get("order_id")
             ]
         except Exception as e:
+            if strict:
+                raise
             logger.warning(f"{self.exchange_name} fetch_open_orders failed: {e}")
             return []
 
-    def cancel_orders_by_ids(self, order_ids: List[str]):
+    def cancel_orders_by_ids(self, order_ids: List[str]) -> List[str]:
+        """Batch cancel (10 per request); rejected batches fall back to single cancels. Returns IDs still live."""
         if self.dry_run or not order_ids:
             logger.info(f"{self.exchange_name} no open orders to cancel")
-            return
+            return []
+
+        market = self.symbol.replace("/", "_")
 
         def payload_func(batch):
             return {
-                "orders_json": [
-                    {"market": self.symbol.replace("/", "_"), "order_id": int(oid)}
-                    for oid in batch
-                ]
+                "orders_json": json.dumps(
+                    [{"market": market, "order_id": int(oid)} for oid in batch],
+                    separators=(",", ":"),
+                )
             }
 
-        self._cancel_in_batches(order_ids, "/api/v1/private/trade/cancel_batch", payload_func, batch_size=10)
+        def cancel_one(oid):
+            resp = self._post("/api/v1/private/trade/cancel", {"market": market, "order_id": str(oid)})
+            return resp.get("code") == 0
+
+        return self._cancel_in_batches(order_ids, "/api/v1/private/trade/cancel_batch", payload_func,
+                                       batch_size=self.cancel_batch_size, cancel_one=cancel_one)
+
+    def cancel_all_orders(self):
+        """SMART CANCEL: Cancel ONLY stale orders (preserves current cycle's orders)."""
+        if self.dry_run:
+            logger.info(f"[DRY] {self.exchange_name} skip cancel_all_orders()")
+            return
+
+        try:
+            open_orders = self.fetch_open_orders()
+            if not open_orders:
+                return
+
+            open_ids_now = {str(o["id"]) for o in open_orders if o.get("id")}
+            if self.journal is not None:
+                self.journal.reconcile(open_ids_now, min_age_s=30, symbol=self.symbol)  # drop filled orders
+            to_cancel = [oid for oid in open_ids_now if oid not in self.current_cycle_order_ids]
+
+            if to_cancel:
+                live = self.cancel_orders_by_ids(to_cancel)
+                logger.info(
+                    f"{self.exchange_name} removed {len(to_cancel) - len(live)} stale orders | "
+                    f"kept {len(self.current_cycle_order_ids)}")
+        except Exception as e:
+            logger.warning(f"{self.exchange_name} cancel_all_orders failed: {e}")
 
     def create_limit(self, side: str, price: float, amount: float) -> Optional[str]:
         if self.dry_run:
             oid = f"dry_{int(time.time() * 1000000)}"
+            self.current_cycle_order_ids.add(oid)
             logger.info(f"{self.exchange_name} DRY RUN {side.upper()} {amount:.0f} @ {price:.10f} id={oid}")
             return oid
 
@@ -117,18 +205,21 @@ class BiconomyAdapter(BatchCancelMixin):
             resp = self._post("/api/v1/private/order/create", payload)
         except Exception as e:
             logger.error(f"{self.exchange_name} create_limit exception for {side.upper()} {amount} @ {price}: {e}")
+            self._note_reject(e)
             return None
 
         if resp.get("code") == 0:
             oid = resp.get("result", {}).get("order_id")
             if oid:
                 logger.info(f"{self.exchange_name} {side.upper()} {amount:.0f} @ {price:.10f} id={oid}")
+                self.current_cycle_order_ids.add(str(oid))
                 return str(oid)
             else:
                 logger.warning(f"{self.exchange_name} create_limit failed: no order_id returned, response={resp}")
         else:
             logger.warning(f"{self.exchange_name} create_limit failed: code={resp.get('code')} message={resp.get('message')} payload={payload} response={resp}")
 
+        self._note_reject(resp)
         return None
 
     def price_to_precision(self, p):
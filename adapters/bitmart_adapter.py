@@ -1,12 +1,19 @@
-import os, time, hmac, hashlib, requests, json, logging, math, random
+import os, time, hmac, hashlib, json, logging, math, random
 from typing import Optional, List, Dict, Tuple, Set
 
 from helpers.batch_cancel import BatchCancelMixin
+from helpers.client_ids import place_idempotent
+from helpers.fills import FILLS_BACKFILL_S, Fill
+from helpers.http import new_session
+from helpers import decode
+from .base import BaseAdapter
 
 logger = logging.getLogger(__name__)
 
 
-class BitMartAdapter(BatchCancelMixin):
+class BitMartAdapter(BatchCancelMixin, BaseAdapter):
+    cancel_batch_size = 50
+
     def __init__(self, cfg):
         self.cfg = cfg
         self.exchange_name = cfg.id
@@ -21,7 +28,7 @@ class BitMartAdapter(BatchCancelMixin):
         if not all([self.key, self.secret, self.memo]):
             raise ValueError("BitMart credentials incomplete")
 
-        self.session = requests.Session()
+        self.session = new_session(pool_size=self.CANCEL_CONCURRENCY, breakers=self.breakers)
         self.session.headers.update({"X-BM-KEY": self.key})
 
         # Track current cycle's order IDs (set by runner before cancel_all_orders)
@@ -65,25 +72,60 @@ class BitMartAdapter(BatchCancelMixin):
         logger.info(f"Connected {self.exchange_name} (BitMart)")
 
     def fetch_btc_last(self) -> float:
-        r = requests.get("https://api-cloud.bitmart.com/spot/quotation/v3/ticker?symbol=BTC_USDT", timeout=10).json()
-        return float(r["data"]["last"])
+        r = self.session.get("https://api-cloud.bitmart.com/spot/quotation/v3/ticker?symbol=BTC_USDT", timeout=10)
+        t = decode.bitmart_ticker(r.content)
+        if t is None or t.last is None:
+            raise RuntimeError(f"BTC ticker rejected: {r.text[:200]}")
+        return t.last
 
     def fetch_best_quotes(self) -> Tuple[Optional[float], Optional[float]]:
         symbol = self.symbol.replace("/", "_")
-        r = requests.get(f"https://api-cloud.bitmart.com/spot/quotation/v3/ticker?symbol={symbol}", timeout=10).json()
-        if r.get("code") == 1000:
-            d = r["data"]
-            return float(d.get("bid_px", 0) or 0), float(d.get("ask_px", 0) or 0)
-        return None, None
-
-    def fetch_open_orders(self) -> List[dict]:
-        """Fetch open orders with proper status filtering."""
+        r = self.session.get(f"https://api-cloud.bitmart.com/spot/quotation/v3/ticker?symbol={symbol}", timeout=10)
+        t = decode.bitmart_ticker(r.content)
+        if t is None:
+            return None, None
+        return t.bid or 0.0, t.ask or 0.0
+
+    def fetch_tickers(self, symbols) -> Dict[str, Tuple[Optional[float], Optional[float]]]:
+        """All markets in one call (v3/tickers rows: [symbol, last, ..., bid_px(8), bid_sz, ask_px(10), ...])."""
+        wanted = {s.replace("/", "_"): s for s in symbols}
+        r = self.session.get("https://api-cloud.bitmart.com/spot/quotation/v3/tickers", timeout=10)
+        return {wanted[t.symbol]: (t.bid or 0.0, t.ask or 0.0)
+                for t in decode.bitmart_tickers(r.content, wanted).values()}
+
+    def fetch_recent_trades(self) -> List[Tuple[float, float, float]]:
+        """Latest public trades as (ts, price, qty) — rows are [symbol, ts_ms, price, size, side]."""
+        symbol = self.symbol.replace("/", "_")
+        r = self.session.get(f"https://api-cloud.bitmart.com/spot/quotation/v3/trades?symbol={symbol}&limit=50",
+                             timeout=10)
+        r = decode.loads(r.content)
+        if r.get("code") != 1000:
+            return []
+        return [(int(row[1]) / 1000.0, float(row[2]), float(row[3])) for row in r.get("data", [])]
+
+    def fetch_balances(self, currencies) -> Dict[str, Dict[str, float]]:
+        """Spot wallet balances (GET /spot/v1/wallet)."""
+        r = self._request("GET", "/spot/v1/wallet")
+        if r.get("code") not in (1000, "1000"):
+            raise RuntimeError(f"wallet request rejected: {r}")
+        wanted = {c.upper() for c in currencies}
+        out = {}
+        for w in r.get("data", {}).get("wallet", []):
+            cur = str(w.get("id") or w.get("currency") or "").upper()
+            if cur in wanted:
+                out[cur] = {"free": float(w.get("available") or 0), "used": float(w.get("frozen") or 0)}
+        return out
+
+    def fetch_open_orders(self, strict: bool = False) -> List[dict]:
+        """Fetch open orders with proper status filtering. strict: raise on failure instead of returning []."""
         if self.dry_run:
             return []
         symbol = self.symbol.replace("/", "_")
         try:
             r = self._request("GET", "/spot/v2/orders", params={"symbol": symbol, "orderState": "pending"},
                               version="v2")
+            if r.get("code") not in (1000, "1000"):
+                raise RuntimeError(f"code={r.get('code')} message={r.get('message')}")
             orders = r.get("data", {}).get("orders", [])
             # CRITICAL: Only return orders that are actually open (not filled or cancelled)
             return [
@@ -92,6 +134,8 @@ class BitMartAdapter(BatchCancelMixin):
                 if o.get("order_id") and o.get("status") in ["new", "submitted", "partially_filled"]
             ]
         except Exception as e:
+            if strict:
+                raise
             logger.warning(f"{self.exchange_name} fetch_open_orders error: {e}")
             return []
 
@@ -115,27 +159,31 @@ class BitMartAdapter(BatchCancelMixin):
                 return
 
             open_ids_now = {str(o["id"]) for o in open_orders if o.get("id")}
+            if self.journal is not None:
+                self.journal.reconcile(open_ids_now, min_age_s=30, symbol=self.symbol)  # drop filled orders
 
             # CRITICAL: Cancel everything EXCEPT current cycle's orders
             to_cancel = [oid for oid in open_ids_now if oid not in self.current_cycle_order_ids]
 
             if to_cancel:
-                self.cancel_orders_by_ids(to_cancel)
+                live = self.cancel_orders_by_ids(to_cancel)
                 logger.info(
-                    f"{self.exchange_name} removed {len(to_cancel)} stale orders | kept {len(self.current_cycle_order_ids)}")
+                    f"{self.exchange_name} removed {len(to_cancel) - len(live)} stale orders | "
+                    f"kept {len(self.current_cycle_order_ids)}")
             else:
                 logger.debug(f"{self.exchange_name} no stale orders to cancel")
 
         except Exception as e:
             logger.error(f"{self.exchange_name} cancel_all_orders error: {e}")
 
-    def cancel_orders_by_ids(self, order_ids: List[str]):
+    def cancel_orders_by_ids(self, order_ids: List[str]) -> List[str]:
         """
         Cancel orders using BitMart's batch endpoint.
         BitMart v2/batch_orders_cancel accepts "order_ids" array.
+        Returns IDs that are still live.
         """
         if self.dry_run or not order_ids:
-            return
+            return []
 
         def payload_func(batch):
             return {
@@ -143,8 +191,37 @@ class BitMartAdapter(BatchCancelMixin):
                 "order_ids": batch  # BitMart expects array of order_id strings
             }
 
-        # Use batch cancel with default 50 batch size
-        self._cancel_in_batches(order_ids, "/spot/v2/batch_orders_cancel", payload_func)
+        return self._cancel_in_batches(order_ids, "/spot/v2/batch_orders_cancel", payload_func,
+                                       batch_size=self.cancel_batch_size)
+
+    def mass_cancel(self, symbol: Optional[str] = None) -> int:
+        """
+        Native cancel-all for one symbol (POST /spot/v4/cancel_all) — one round trip.
+        BitMart does not report how many orders it cancelled, so the count is the
+        number of orders this adapter was tracking. Falls back to fetch-and-cancel
+        if the endpoint rejects the call.
+        """
+        if self.dry_run:
+            return 0
+
+        view = self.for_symbol(symbol)
+        market = view.symbol.replace("/", "_")
+        try:
+            resp = self._request("POST", "/spot/v4/cancel_all", data={"symbol": market}, version="v4")
+            if resp.get("code") in (1000, "1000"):
+                tracked = set(view.current_cycle_order_ids)
+                if view.journal is not None:
+                    tracked |= view.journal.live_ids(view.symbol)
+                view._on_cancelled(list(tracked))
+                cancelled = len(tracked)
+                view.current_cycle_order_ids.clear()
+                logger.info(f"{self.exchange_name} cancel_all {market} accepted")
+                return cancelled
+            logger.warning(f"{self.exchange_name} cancel_all rejected: {resp}, falling back")
+        except Exception as e:
+            logger.warning(f"{self.exchange_name} cancel_all error: {e}, falling back")
+
+        return super().mass_cancel(symbol)
 
     # ---------------- Order placement ---------------- #
     def create_limit(self, side: str, price: float, amount: float) -> Optional[str]:
@@ -157,27 +234,83 @@ class BitMartAdapter(BatchCancelMixin):
             self.current_cycle_order_ids.add(fake_id)  # Track even in dry-run
             return fake_id
 
+        client_id = self.client_ids.next()
         payload = {
             "symbol": self.symbol.replace("/", "_"),
             "side": side,
             "type": "limit_maker",  # Post-only order type
             "size": amount_str,
             "price": price_str,
-            "client_order_id": f"oho{int(time.time() * 1000000)}"[:32]
+            "client_order_id": client_id
         }
 
-        try:
+        def send():
             resp = self._request("POST", "/spot/v2/submit_order", data=payload, version="v2")
             if resp.get("code") in ["1000", 1000]:
-                oid = str(resp.get("data", {}).get("order_id"))
+                return str(resp.get("data", {}).get("order_id"))
+            self._note_reject(resp)
+            return None
+
+        try:
+            oid = place_idempotent(self, client_id, send)
+            if oid:
                 logger.info(f"{self.exchange_name} {side.upper()} {amount_str} @ {price_str} id={oid}")
                 # CRITICAL: Track this order ID so it won't be cancelled
                 self.current_cycle_order_ids.add(oid)
-                return oid
+            return oid
         except Exception as e:
             logger.warning(f"{self.exchange_name} create_limit error: {e}")
+            self._note_reject(e)
         return None
 
+    def find_order_by_client_id(self, client_id: str) -> Optional[str]:
+        """
+        POST /spot/v4/query/client-order. Any non-1000 answer is treated as
+        "not placed": a resend reuses client_order_id, which BitMart refuses
+        to accept twice.
+        """
+        resp = self._request("POST", "/spot/v4/query/client-order",
+                             data={"clientOrderId": client_id, "queryState": "open"}, version="v4")
+        if resp.get("code") not in ("1000", 1000):
+            return None
+        oid = (resp.get("data") or {}).get("orderId")
+        return str(oid) if oid else None
+
+    # ---------------- Fills ---------------- #
+    def fetch_fills_since(self, cursor: Optional[str]) -> Tuple[List[Fill], Optional[str]]:
+        """
+        POST /spot/v4/query/trades from cursor (createTime ms, inclusive) to now.
+        BitMart returns only the newest 200 of a window, so a full page halves
+        the window until it fits; the cursor then moves to the window end and
+        the next page reads on from there, so nothing older is skipped.
+        """
+        now = int(time.time() * 1000)
+        start = int(cursor) if cursor else now - int(FILLS_BACKFILL_S * 1000)
+        end = now
+        while True:
+            resp = self._request("POST", "/spot/v4/query/trades", data={
+                "symbol": self.symbol.replace("/", "_"), "orderMode": "spot",
+                "startTime": start, "endTime": end, "limit": 200}, version="v4")
+            if resp.get("code") not in (1000, "1000"):
+                raise RuntimeError(f"trades request rejected: {resp}")
+            page = resp.get("data") or []
+            if len(page) < 200:
+                break
+            if end - start <= 1:
+                logger.warning(f"{self.exchange_name} over 200 fills at {start} ms — some may be missed")
+                break
+            end = start + (end - start) // 2
+
+        fills = sorted((Fill(str(t["tradeId"]), str(t.get("orderId")), self.symbol, str(t.get("side", "")).lower(),
+                             float(t.get("price") or 0), float(t.get("size") or 0), float(t.get("fee") or 0),
+                             str(t.get("feeCoinName") or ""), int(t["createTime"]) / 1000)
+                        for t in page), key=lambda f: f.ts)
+        if end < now:
+            return fills, str(end)
+        if fills:
+            return fills, str(int(fills[-1].ts * 1000))
+        return [], cursor or str(start)
+
     # ---------------- Precision & Limits ---------------- #
     def price_to_precision(self, p):
         return round(p, 8)
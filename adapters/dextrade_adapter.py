@@ -2,10 +2,12 @@
 import os
 import logging
 import time
-from typing import Tuple, List, Optional
-import requests
+from typing import Tuple, List, Optional, Dict, Set
 
 from helpers.batch_cancel import BatchCancelMixin
+from helpers.client_ids import place_idempotent
+from helpers.http import new_session
+from helpers import decode
 from .base import BaseAdapter
 
 logger = logging.getLogger(__name__)
@@ -14,6 +16,8 @@ BASE = "https://api.dex-trade.com"
 
 
 class DexTradeAdapter(BatchCancelMixin, BaseAdapter):
+    client_id_numeric = True  # request_id has always been sent as digits
+
     def __init__(self, cfg):
         self.cfg = cfg
         self.exchange_name = cfg.id
@@ -22,7 +26,7 @@ class DexTradeAdapter(BatchCancelMixin, BaseAdapter):
         self.dry_run = cfg.dry_run
 
         self.token = os.getenv("DEXTRADE_KEY", "")
-        self.session = requests.Session()
+        self.session = new_session(pool_size=self.CANCEL_CONCURRENCY, breakers=self.breakers)
         self.session.headers.update({
             "Accept": "application/json",
             "Content-Type": "application/json",
@@ -30,6 +34,11 @@ class DexTradeAdapter(BatchCancelMixin, BaseAdapter):
         if self.token:
             self.session.headers["X-AUTH-TOKEN"] = self.token
 
+        # Track current cycle's order IDs
+        self.current_cycle_order_ids: Set[str] = set()
+
+        self._placing: Dict[str, dict] = {}  # client id -> create-order payload in flight
+
     # ---------------- Helpers ---------------- #
 
     def _pair(self, symbol: str) -> str:
@@ -42,7 +51,7 @@ class DexTradeAdapter(BatchCancelMixin, BaseAdapter):
 
     # ---------------- Market Data ---------------- #
 
-    def fetch_btc_last(self) -> float:
+    def fetch_btc_last(self) -> Optional[float]:
         try:
             r = self.session.get(
                 f"{BASE}/v1/public/ticker",
@@ -50,10 +59,11 @@ class DexTradeAdapter(BatchCancelMixin, BaseAdapter):
                 timeout=10,
             )
             r.raise_for_status()
-            return float(r.json().get("last", 92000.0))
+            last = decode.dextrade_ticker(r.content, "BTCUSDT").last
+            return last
         except Exception as e:
             logger.warning(f"{self.exchange_name} fetch_btc_last failed: {e}")
-            return 92000.0
+            return None
 
     def fetch_best_quotes(self) -> Tuple[Optional[float], Optional[float]]:
         try:
@@ -63,111 +73,136 @@ class DexTradeAdapter(BatchCancelMixin, BaseAdapter):
                 timeout=10,
             )
             r.raise_for_status()
-            data = r.json()
-            return float(data.get("bid_price") or 0), float(data.get("ask_price") or 0)
+            t = decode.dextrade_ticker(r.content, self.symbol)
+            return t.bid or 0.0, t.ask or 0.0
         except Exception as e:
             logger.warning(f"{self.exchange_name} fetch_best_quotes failed: {e}")
             return None, None
 
     # ---------------- Orders ---------------- #
 
-    def fetch_open_orders(self) -> List[dict]:
+    def fetch_balances(self, currencies) -> Dict[str, Dict[str, float]]:
+        r = self.session.post(f"{BASE}/v1/private/balances", json={}, timeout=10)
+        r.raise_for_status()
+        j = r.json()
+        if not j.get("status"):
+            raise RuntimeError(f"balances request rejected: {j}")
+        wanted = {c.upper() for c in currencies}
+        out = {}
+        for item in j.get("data", {}).get("list", []):
+            cur = str((item.get("currency") or {}).get("iso3") or "").upper()
+            if cur in wanted:
+                b = item.get("balances") or {}
+                free = float(b.get("available") or 0)
+                out[cur] = {"free": free, "used": max(0.0, float(b.get("total") or 0) - free)}
+        return out
+
+    def _fetch_all_open_orders(self) -> List[dict]:
+        r = self.session.get(f"{BASE}/v1/private/orders", timeout=10)
+        r.raise_for_status()
+        j = r.json()
+        if not j.get("status"):
+            raise RuntimeError(f"status={j.get('status')} message={j.get('message')}")
+        return j.get("data", {}).get("list", [])
+
+    def fetch_open_orders(self, strict: bool = False) -> List[dict]:
+        """
+        /v1/private/orders returns every pair at once, so it is fetched once per
+        cycle for all of this adapter's markets and filtered by pair here (a
+        failed fetch is not cached).
+        """
         if self.dry_run:
             return []
 
+        pair = self._pair(self.symbol)
         try:
-            r = self.session.get(f"{BASE}/v1/private/orders", timeout=10)
-            r.raise_for_status()
-            j = r.json()
-
-            if j.get("status"):
-                orders = j.get("data", {}).get("list", [])
-                return [{"id": str(o.get("id"))} for o in orders if o.get("id")]
-
+            orders = self._cached("open_orders", self._fetch_all_open_orders)
         except Exception as e:
+            if strict:
+                raise
             logger.warning(f"{self.exchange_name} fetch_open_orders failed: {e}")
+            return []
+        return [
+            {"id": str(o.get("id"))}
+            for o in orders
+            if o.get("id") and self._pair(str(o.get("pair") or pair)) == pair
+        ]
 
-        return []
-
-    def cancel_orders_by_ids(self, order_ids: List[str]):
+    def cancel_orders_by_ids(self, order_ids: List[str]) -> List[str]:
+        """
+        Dex-Trade has no batch cancel — cancels go out concurrently through
+        the shared executor (3 attempts each, backoff between retries).
+        Returns IDs still live.
+        """
         if self.dry_run or not order_ids:
-            return
+            return []
 
         pair = self._pair(self.symbol)
 
-        for oid in order_ids:
-            for attempt in range(3):
-                try:
-                    payload = {
-                        "order_id": str(oid),
-                        "pair": pair,
-                    }
-                    r = self.session.post(
-                        f"{BASE}/v1/private/delete-order",
-                        json=payload,
-                        timeout=10,
-                    )
-                    r.raise_for_status()
-                    j = r.json()
-
-                    if j.get("status"):
-                        logger.info(f"{self.exchange_name} cancelled order {oid}")
-                        break
-                    else:
-                        logger.warning(
-                            f"{self.exchange_name} cancel failed for {oid}: {j}"
-                        )
-
-                except Exception as e:
-                    logger.warning(
-                        f"{self.exchange_name} cancel attempt {attempt + 1} failed "
-                        f"for order {oid}: {e}"
-                    )
-                    time.sleep(0.5)
+        def cancel_one(oid):
+            payload = {
+                "order_id": str(oid),
+                "pair": pair,
+            }
+            r = self.session.post(
+                f"{BASE}/v1/private/delete-order",
+                json=payload,
+                timeout=10,
+            )
+            r.raise_for_status()
+            j = r.json()
+
+            if not j.get("status"):
+                logger.debug(f"{self.exchange_name} cancel failed for {oid}: {j}")
+                return False
+            return True
+
+        return self._cancel_individually(order_ids, cancel_one)
 
     # ---------------- CRITICAL FIX ---------------- #
 
     def cancel_all_orders(self):
-        """
-        Cancels ALL open Dex-Trade orders.
-        Dex-Trade does not support true batch cancel — must cancel individually.
-        """
+        """SMART CANCEL: Cancel ONLY stale orders (preserves current cycle's orders)."""
         if self.dry_run:
             logger.info(f"[DRY] {self.exchange_name} skip cancel_all_orders()")
             return
 
         try:
-            orders = self.fetch_open_orders()
-            if not orders:
-                logger.info(f"{self.exchange_name} no open orders to cancel")
-                return
-
-            order_ids = [o["id"] for o in orders if o.get("id")]
-            if not order_ids:
+            open_orders = self.fetch_open_orders()
+            if not open_orders:
                 return
 
-            logger.info(f"{self.exchange_name} cancelling {len(order_ids)} open orders")
-            self.cancel_orders_by_ids(order_ids)
+            open_ids_now = {str(o["id"]) for o in open_orders if o.get("id")}
+            if self.journal is not None:
+                self.journal.reconcile(open_ids_now, min_age_s=30, symbol=self.symbol)  # drop filled orders
+            to_cancel = [oid for oid in open_ids_now if oid not in self.current_cycle_order_ids]
 
+            if to_cancel:
+                live = self.cancel_orders_by_ids(to_cancel)
+                logger.info(
+                    f"{self.exchange_name} removed {len(to_cancel) - len(live)} stale orders | "
+                    f"kept {len(self.current_cycle_order_ids)}")
         except Exception as e:
             logger.warning(f"{self.exchange_name} cancel_all_orders failed: {e}")
 
-    # ---------------- Order Placement ---------------- #
-
     def create_limit(self, side: str, price: float, amount: float) -> Optional[str]:
         if self.dry_run:
-            return f"dry_{int(time.time() * 1_000_000)}"
+            oid = f"dry_{int(time.time() * 1_000_000)}"
+            self.current_cycle_order_ids.add(oid)
+            return oid
 
+        client_id = self.client_ids.next()
         payload = {
             "type_trade": 0,
             "type": 0 if side.lower() == "buy" else 1,
             "rate": f"{price:.10f}",
             "volume": f"{amount}",
             "pair": self._pair(self.symbol),
-            "request_id": str(int(time.time() * 1000)),
+            "request_id": client_id,
         }
+        self._placing[client_id] = payload
 
-        try:
+        def send():
             r = self.session.post(
                 f"{BASE}/v1/private/create-order",
                 json=payload,
@@ -179,17 +214,68 @@ class DexTradeAdapter(BatchCancelMixin, BaseAdapter):
             if j.get("status"):
                 oid = j.get("data", {}).get("id")
                 if oid:
-                    logger.info(
-                        f"{self.exchange_name} {side.upper()} "
-                        f"{amount:.0f} @ {price:.10f} id={oid}"
-                    )
                     return str(oid)
+            self._note_reject(j)
+            return None
+
+        try:
+            oid = place_idempotent(self, client_id, send)
+            if oid:
+                logger.info(
+                    f"{self.exchange_name} {side.upper()} "
+                    f"{amount:.0f} @ {price:.10f} id={oid}"
+                )
+                self.current_cycle_order_ids.add(oid)
+            return oid
 
         except Exception as e:
             logger.warning(f"{self.exchange_name} create_limit failed: {e}")
+            self._note_reject(e)
+
+        finally:
+            self._placing.pop(client_id, None)
 
         return None
 
+    def find_order_by_client_id(self, client_id: str) -> Optional[str]:
+        """
+        Dex-Trade has no lookup by request_id: scan a fresh open-orders list
+        for the request_id, else (only with a journal, which knows every order
+        already ours) for an untracked order on the same pair, side, rate and
+        volume.
+        """
+        payload = self._placing.get(client_id)
+        if payload is None:
+            return None
+        r = self.session.get(f"{BASE}/v1/private/orders", timeout=10)
+        r.raise_for_status()
+        j = r.json()
+        if not j.get("status"):
+            raise RuntimeError(f"open orders request rejected: {j}")
+
+        orders = j.get("data", {}).get("list", [])
+        for o in orders:
+            if o.get("id") and str(o.get("request_id") or "") == client_id:
+                return str(o["id"])
+        if self.journal is None:
+            return None  # an older resting order at the same level would look identical
+
+        known = self.journal.live_ids() | self.current_cycle_order_ids
+        for o in orders:
+            oid = str(o.get("id") or "")
+            if not oid or oid in known:
+                continue
+            try:
+                same = self._pair(str(o.get("pair") or "")) == payload["pair"] and \
+                    int(o.get("type")) == payload["type"] and \
+                    abs(float(o.get("rate")) - float(payload["rate"])) < 1e-12 and \
+                    abs(float(o.get("volume")) - float(payload["volume"])) < 1e-9
+            except (TypeError, ValueError):
+                continue
+            if same:
+                return oid
+        return None
+
     # ---------------- Precision / Limits ---------------- #
 
     def price_to_precision(self, p):
@@ -5,16 +5,21 @@ import hmac
 import hashlib
 import base64
 import json
-import requests
 import logging
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Dict, Set
 
 from helpers.batch_cancel import BatchCancelMixin
+from helpers.fills import FILLS_BACKFILL_S, Fill
+from helpers.http import new_session
+from helpers import decode
 from .base import BaseAdapter
 
 logger = logging.getLogger(__name__)
 BASE = "https://api.p2pb2b.com"
 
+# executed_history accepts at most one day per query
+FILLS_WINDOW_S = 86400
+
 
 class P2BAdapter(BatchCancelMixin, BaseAdapter):
     def __init__(self, cfg):
@@ -26,7 +31,10 @@ class P2BAdapter(BatchCancelMixin, BaseAdapter):
 
         self.key = os.getenv("P2B_KEY", "")
         self.secret = os.getenv("P2B_SECRET", "")
-        self.session = requests.Session()
+        self.session = new_session(pool_size=self.CANCEL_CONCURRENCY, breakers=self.breakers)
+
+        # Track current cycle's order IDs
+        self.current_cycle_order_ids: Set[str] = set()
 
     # ---------------- Signing ---------------- #
 
@@ -69,51 +77,64 @@ class P2BAdapter(BatchCancelMixin, BaseAdapter):
 
     # ---------------- Market Data ---------------- #
 
-    def fetch_btc_last(self) -> float:
+    def fetch_btc_last(self) -> Optional[float]:
         try:
-            r = requests.get(
+            r = self.session.get(
                 BASE + "/api/v2/public/ticker",
                 params={"market": "BTC_USDT"},
                 timeout=10,
             )
-            data = r.json()
-            result = data.get("result") or {}
-
-            if "last" in result:
-                return float(result["last"])
-            if isinstance(result.get("ticker"), dict):
-                return float(result["ticker"].get("last", 92000.0))
+            t = decode.p2b_ticker(r.content, "BTC_USDT")
+            if t is not None and t.last is not None:
+                return t.last
 
         except Exception as e:
             logger.warning(f"p2b fetch_btc_last failed: {e}")
 
-        return 92000.0
+        return None
 
     def fetch_best_quotes(self) -> Tuple[Optional[float], Optional[float]]:
         try:
-            r = requests.get(
+            r = self.session.get(
                 BASE + "/api/v2/public/ticker",
                 params={"market": self.symbol.replace("/", "_")},
                 timeout=10,
             )
-            data = r.json()
-            result = data.get("result") or {}
-
-            if "bid" in result and "ask" in result:
-                return float(result["bid"]), float(result["ask"])
-
-            if isinstance(result.get("ticker"), dict):
-                t = result["ticker"]
-                return float(t.get("bid", 0)), float(t.get("ask", 0))
+            t = decode.p2b_ticker(r.content, self.symbol)
+            if t is not None and (t.bid is not None or t.ask is not None):
+                return t.bid or 0.0, t.ask or 0.0
 
         except Exception as e:
             logger.warning(f"p2b fetch_best_quotes failed: {e}")
 
         return None, None
 
+    def fetch_tickers(self, symbols) -> Dict[str, Tuple[Optional[float], Optional[float]]]:
+        """All markets in one call (/api/v2/public/tickers → {market: {"ticker": {...}}})."""
+        wanted = {s.replace("/", "_"): s for s in symbols}
+        out = {}
+        try:
+            r = self.session.get(BASE + "/api/v2/public/tickers", timeout=10)
+            for t in decode.p2b_tickers(r.content, wanted).values():
+                out[wanted[t.symbol]] = (t.bid, t.ask)
+        except Exception as e:
+            logger.warning(f"p2b fetch_tickers failed: {e}")
+        return out
+
     # ---------------- Orders ---------------- #
 
-    def fetch_open_orders(self) -> List[dict]:
+    def fetch_balances(self, currencies) -> Dict[str, Dict[str, float]]:
+        r = self._post("/api/v2/account/balances", {})
+        if not r.get("success"):
+            raise RuntimeError(f"balances request rejected: {r}")
+        result = r.get("result") or {}
+        out = {}
+        for cur in currencies:
+            b = result.get(cur.upper()) or {}
+            out[cur] = {"free": float(b.get("available") or 0), "used": float(b.get("freeze") or 0)}
+        return out
+
+    def fetch_open_orders(self, strict: bool = False) -> List[dict]:
         if self.dry_run:
             return []
 
@@ -128,63 +149,62 @@ class P2BAdapter(BatchCancelMixin, BaseAdapter):
             if r.get("success"):
                 records = r.get("result", {}).get("records", [])
                 return [{"id": str(o["id"])} for o in records if o.get("id")]
+            raise RuntimeError(f"errorCode={r.get('errorCode')} message={r.get('message')}")
 
         except Exception as e:
+            if strict:
+                raise
             logger.warning(f"p2b fetch_open_orders failed: {e}")
 
         return []
 
-    def cancel_orders_by_ids(self, order_ids: List[str]):
+    def cancel_orders_by_ids(self, order_ids: List[str]) -> List[str]:
+        """
+        P2B cancels one order per request — sent concurrently through the
+        shared executor. Returns IDs still live.
+        """
         if self.dry_run or not order_ids:
-            return
+            return []
 
-        def payload_func(batch):
-            return [
-                {
-                    "market": self.symbol.replace("/", "_"),
-                    "orderId": int(oid),
-                }
-                for oid in batch
-            ]
-
-        self._cancel_in_batches(
-            order_ids,
-            "/api/v2/order/cancel",
-            payload_func,
-        )
+        market = self.symbol.replace("/", "_")
+
+        def cancel_one(oid):
+            r = self._post("/api/v2/order/cancel", {"market": market, "orderId": int(oid)})
+            return bool(r.get("success"))
+
+        return self._cancel_individually(order_ids, cancel_one)
 
     # ---------------- CRITICAL FIX ---------------- #
 
     def cancel_all_orders(self):
-        """
-        Cancels ALL open P2B orders.
-        Uses fetch_open_orders + batch cancel endpoint.
-        """
+        """SMART CANCEL: Cancel ONLY stale orders (preserves current cycle's orders)."""
         if self.dry_run:
             logger.info(f"[DRY] {self.exchange_name} skip cancel_all_orders()")
             return
 
         try:
-            orders = self.fetch_open_orders()
-            if not orders:
-                logger.info(f"{self.exchange_name} no open orders to cancel")
-                return
-
-            order_ids = [o["id"] for o in orders if o.get("id")]
-            if not order_ids:
+            open_orders = self.fetch_open_orders()
+            if not open_orders:
                 return
 
-            logger.info(f"{self.exchange_name} cancelling {len(order_ids)} open orders")
-            self.cancel_orders_by_ids(order_ids)
+            open_ids_now = {str(o["id"]) for o in open_orders if o.get("id")}
+            if self.journal is not None:
+                self.journal.reconcile(open_ids_now, min_age_s=30, symbol=self.symbol)  # drop filled orders
+            to_cancel = [oid for oid in open_ids_now if oid not in self.current_cycle_order_ids]
 
+            if to_cancel:
+                live = self.cancel_orders_by_ids(to_cancel)
+                logger.info(
+                    f"{self.exchange_name} removed {len(to_cancel) - len(live)} stale orders | "
+                    f"kept {len(self.current_cycle_order_ids)}")
         except Exception as e:
             logger.warning(f"{self.exchange_name} cancel_all_orders failed: {e}")
 
-    # ---------------- Placement ---------------- #
-
     def create_limit(self, side: str, price: float, amount: float) -> Optional[str]:
         if self.dry_run:
-            return f"dry_{int(time.time() * 1_000_000)}"
+            oid = f"dry_{int(time.time() * 1_000_000)}"
+            self.current_cycle_order_ids.add(oid)
+            return oid
 
         payload = {
             "market": self.symbol.replace("/", "_"),
@@ -202,13 +222,52 @@ class P2BAdapter(BatchCancelMixin, BaseAdapter):
                         f"{self.exchange_name} {side.upper()} "
                         f"{amount:.0f} @ {price:.10f} id={oid}"
                     )
+                    self.current_cycle_order_ids.add(str(oid))
                     return str(oid)
+            self._note_reject(r)
 
         except Exception as e:
             logger.warning(f"p2b create_limit failed: {e}")
+            self._note_reject(e)
 
         return None
 
+    # ---------------- Fills ---------------- #
+
+    def fetch_fills_since(self, cursor: Optional[str]) -> Tuple[List[Fill], Optional[str]]:
+        """
+        POST /api/v2/account/executed_history over one day from cursor (epoch
+        seconds, inclusive), paged by offset. The cursor moves to the newest
+        fill, or to the window end once a past day has been read.
+        """
+        market = self.symbol.replace("/", "_")
+        now = int(time.time())
+        start = int(cursor) if cursor else now - int(FILLS_BACKFILL_S)
+        end = min(now, start + FILLS_WINDOW_S)
+
+        rows, offset = [], 0
+        while True:
+            r = self._post("/api/v2/account/executed_history",
+                           {"market": market, "startTime": start, "endTime": end, "offset": offset, "limit": 100})
+            if not r.get("success"):
+                raise RuntimeError(f"executed_history request rejected: {r}")
+            page = (r.get("result") or {}).get(market) or []
+            rows.extend(page)
+            if len(page) < 100:
+                break
+            offset += 100
+
+        quote = self.base_quote()[1]
+        fills = sorted((Fill(str(d["id"]), str(d.get("deal_order_id", "")), self.symbol, str(d.get("side", "")),
+                             float(d.get("price") or 0), float(d.get("amount") or 0), float(d.get("fee") or 0),
+                             quote, float(d.get("time") or 0))
+                        for d in rows if d.get("id")), key=lambda f: f.ts)
+        if end < now:
+            return fills, str(end)
+        if fills:
+            return fills, str(int(fills[-1].ts))
+        return [], cursor or str(start)
+
     # ---------------- Precision ---------------- #
 
     def price_to_precision(self, p):
@@ -0,0 +1,79 @@
+# adapters/registry.py — Lazy adapter registry (entry-point style)
+import importlib
+import logging
+from importlib.metadata import entry_points
+from typing import Dict, List, Union
+
+logger = logging.getLogger(__name__)
+
+# Third-party packages can ship their own venue adapters by declaring
+#   [project.entry-points."oho_bot.adapters"]
+#   myvenue = "my_pkg.adapter:MyVenueAdapter"
+ENTRY_POINT_GROUP = "oho_bot.adapters"
+
+# exchange id -> "module:Class" target. Modules are imported only when an
+# adapter for that exchange is actually built, so disabled venues cost nothing.
+_REGISTRY: Dict[str, Union[str, type]] = {
+    "bitmart": "adapters.bitmart_adapter:BitMartAdapter",
+    "p2b": "adapters.p2b_adapter:P2BAdapter",
+    "biconomy": "adapters.biconomy_adapter:BiconomyAdapter",
+    "tapbit": "adapters.tapbit_adapter:TapbitAdapter",
+    "dextrade": "adapters.dextrade_adapter:DexTradeAdapter",
+    "backtest": "adapters.backtest_adapter:BacktestAdapter",
+}
+
+_entry_points_loaded = False
+
+
+def register_adapter(exchange_id: str, target: Union[str, type]) -> None:
+    """
+    Register an adapter for an exchange id.
+
+    target is either the adapter class itself or a lazy "module:Class" string
+    (same format as a packaging entry point).
+    """
+    _REGISTRY[exchange_id] = target
+
+
+def _load_entry_points() -> None:
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    _entry_points_loaded = True
+
+    try:
+        eps = entry_points(group=ENTRY_POINT_GROUP)
+    except Exception as e:
+        logger.debug(f"adapter entry points unavailable: {e}")
+        return
+
+    for ep in eps:
+        # Built-in adapters win over plugins with the same name
+        _REGISTRY.setdefault(ep.name, ep.value)
+
+
+def resolve_adapter(exchange_id: str) -> type:
+    """Return the adapter class for exchange_id, importing its module on first use."""
+    _load_entry_points()
+
+    try:
+        target = _REGISTRY[exchange_id]
+    except KeyError:
+        raise KeyError(f"No adapter registered for exchange '{exchange_id}'") from None
+
+    if isinstance(target, str):
+        module_name, _, attr = target.partition(":")
+        module = importlib.import_module(module_name)
+        target = getattr(module, attr)
+        _REGISTRY[exchange_id] = target  # cache the resolved class
+
+    return target
+
+
+def available_adapters() -> List[str]:
+    _load_entry_points()
+    return sorted(_REGISTRY)
+
+
+def build_adapter(cfg):
+    return resolve_adapter(cfg.id)(cfg)
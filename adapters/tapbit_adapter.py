@@ -4,18 +4,20 @@ import os
 import time
 import hmac
 import hashlib
-from typing import Optional, List, Set
+from typing import Optional, List, Set, Dict
 
-import requests
 import logging
 
 from helpers.batch_cancel import BatchCancelMixin
+from helpers.http import new_session
+from helpers import decode
+from .base import BaseAdapter
 
 logger = logging.getLogger(__name__)
 BASE = "https://openapi.tapbit.com"
 
 
-class TapbitAdapter(BatchCancelMixin):
+class TapbitAdapter(BatchCancelMixin, BaseAdapter):
     def __init__(self, cfg):
         self.cfg = cfg
         self.exchange_name = cfg.id
@@ -25,7 +27,7 @@ class TapbitAdapter(BatchCancelMixin):
 
         self.key = os.getenv("TAPBIT_KEY", "")
         self.secret = os.getenv("TAPBIT_SECRET", "")
-        self.session = requests.Session()
+        self.session = new_session(pool_size=self.CANCEL_CONCURRENCY, breakers=self.breakers)
 
         # Track current cycle's order IDs
         self.current_cycle_order_ids: Set[str] = set()
@@ -52,36 +54,51 @@ class TapbitAdapter(BatchCancelMixin):
     def connect(self):
         logger.info(f"Connected {self.exchange_name} (Tapbit)")
 
-    def fetch_btc_last(self) -> float:
+    def fetch_btc_last(self) -> Optional[float]:
         try:
-            r = requests.get(BASE + "/api/v1/spot/market/ticker", params={"symbol": "BTCUSDT"},
-                             timeout=10).json()
-            if r.get("code") == 0:
-                return float(r["data"]["last"])
+            r = self.session.get(BASE + "/api/v1/spot/market/ticker", params={"symbol": "BTCUSDT"},
+                                 timeout=10)
+            t = decode.tapbit_ticker(r.content, "BTCUSDT")
+            if t is not None and t.last is not None:
+                return t.last
         except Exception:
             pass
-        return 92000.0
+        return None
 
     def fetch_best_quotes(self):
         try:
-            r = requests.get(BASE + "/api/v1/spot/market/ticker",
-                             params={"symbol": self.symbol.replace("/", "")}, timeout=10).json()
-            if r.get("code") == 0:
-                d = r["data"]
-                return float(d["bid"]), float(d["ask"])
+            symbol = self.symbol.replace("/", "")
+            r = self.session.get(BASE + "/api/v1/spot/market/ticker", params={"symbol": symbol}, timeout=10)
+            t = decode.tapbit_ticker(r.content, symbol)
+            if t is not None and t.bid is not None and t.ask is not None:
+                return t.bid, t.ask
         except Exception:
             pass
         return None, None
 
-    def fetch_open_orders(self) -> List[dict]:
+    def fetch_balances(self, currencies) -> Dict[str, Dict[str, float]]:
+        resp = self._post("/api/v1/spot/account/list", {})
+        if resp.get("code") != 0:
+            raise RuntimeError(f"balances request rejected: {resp}")
+        wanted = {c.upper() for c in currencies}
+        out = {}
+        for b in resp.get("data", []):
+            cur = str(b.get("currency") or "").upper()
+            if cur in wanted:
+                out[cur] = {"free": float(b.get("available") or 0), "used": float(b.get("frozen") or 0)}
+        return out
+
+    def fetch_open_orders(self, strict: bool = False) -> List[dict]:
         if self.dry_run:
             return []
         try:
             resp = self._post("/api/v1/spot/open_order_list", {"symbol": self.symbol.replace("/", "")})
             if resp.get("code") == 0:
                 return [{"id": str(o.get("orderId"))} for o in resp.get("data", []) if o.get("orderId")]
+            raise RuntimeError(f"code={resp.get('code')} message={resp.get('message')}")
         except Exception:
-            pass
+            if strict:
+                raise
         return []
 
     def cancel_all_orders(self):
@@ -96,32 +113,31 @@ class TapbitAdapter(BatchCancelMixin):
                 return
 
             open_ids_now = {str(o["id"]) for o in open_orders if o.get("id")}
+            if self.journal is not None:
+                self.journal.reconcile(open_ids_now, min_age_s=30, symbol=self.symbol)  # drop filled orders
             to_cancel = [oid for oid in open_ids_now if oid not in self.current_cycle_order_ids]
 
             if to_cancel:
-                self.cancel_orders_by_ids(to_cancel)
+                live = self.cancel_orders_by_ids(to_cancel)
                 logger.info(
-                    f"{self.exchange_name} removed {len(to_cancel)} stale orders | kept {len(self.current_cycle_order_ids)}")
+                    f"{self.exchange_name} removed {len(to_cancel) - len(live)} stale orders | "
+                    f"kept {len(self.current_cycle_order_ids)}")
         except Exception as e:
             logger.error(f"{self.exchange_name} cancel_all_orders error: {e}")
 
-    def cancel_orders_by_ids(self, order_ids: List[str]):
-        """Cancel orders individually (Tapbit requires per-order cancel)."""
+    def cancel_orders_by_ids(self, order_ids: List[str]) -> List[str]:
+        """Cancel orders individually (Tapbit requires per-order cancel). Returns IDs still live."""
         if self.dry_run or not order_ids:
-            return
+            return []
 
-        cancelled = 0
-        for oid in order_ids:
-            try:
-                payload = {"orderId": str(oid), "symbol": self.symbol.replace("/", "")}
-                resp = self._request("POST", "/api/v1/spot/cancel_order", payload)
-                if resp.get("code") == 0:
-                    cancelled += 1
-            except Exception as e:
-                logger.warning(f"{self.exchange_name} cancel failed for {oid}: {e}")
+        symbol = self.symbol.replace("/", "")
 
-        if cancelled > 0:
-            logger.info(f"{self.exchange_name} cancelled {cancelled} stale orders")
+        def cancel_one(oid):
+            payload = {"orderId": str(oid), "symbol": symbol}
+            resp = self._request("POST", "/api/v1/spot/cancel_order", payload)
+            return resp.get("code") == 0
+
+        return self._cancel_individually(order_ids, cancel_one)
 
     def create_limit(self, side: str, price: float, amount: float) -> Optional[str]:
         if self.dry_run:
@@ -144,8 +160,9 @@ class TapbitAdapter(BatchCancelMixin):
                 logger.info(f"{self.exchange_name} {side.upper()} {amount:.0f} @ {price:.10f} id={oid}")
                 self.current_cycle_order_ids.add(oid)
                 return oid
-        except Exception:
-            pass
+            self._note_reject(resp)
+        except Exception as e:
+            self._note_reject(e)
         return None
 
     def price_to_precision(self, p):
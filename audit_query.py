@@ -0,0 +1,211 @@
+# audit_query.py — Time-range / group-by aggregations over the order-action audit log
+#
+#   python audit_query.py --venue p2b --since 7d --group-by venue,event
+#   python audit_query.py --since 2026-10-01 --until 2026-11-01 --event ack,reject --group-by day,venue
+#   python audit_query.py --event cancel --group-by venue,symbol,side     # rest times per market
+#
+# Only segments for the requested days are opened and blocks outside the
+# range are skipped from their headers. With numpy every block is filtered
+# and grouped with array operations (np.unique + bincount); without it the
+# same aggregation runs row by row.
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from helpers.audit_log import CANCEL, EVENTS, SIDES, iter_blocks, np, segments
+
+AUDIT_DIR = os.getenv("AUDIT_DIR", "audit")
+
+KEYS = ("venue", "symbol", "side", "event", "day", "hour")
+SIDE_NAMES = {0: "buy", 1: "sell", -1: "?"}
+
+def parse_time(value: Optional[str]) -> Optional[int]:
+    """'7d' / '12h' / '30m' before now, 'YYYY-MM-DD' or ISO datetime (UTC) → ns."""
+    if not value:
+        return None
+    units = {"d": 86400, "h": 3600, "m": 60}
+    if value[-1] in units and value[:-1].replace(".", "", 1).isdigit():
+        return time.time_ns() - int(float(value[:-1]) * units[value[-1]] * 1e9)
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1e9)
+
+
+def _day(ts_ns: Optional[int]) -> Optional[str]:
+    return datetime.fromtimestamp(ts_ns / 1e9, tz=timezone.utc).strftime("%Y-%m-%d") if ts_ns else None
+
+
+def _merge(acc: Dict[tuple, list], key: tuple, part) -> None:
+    cur = acc.get(key)
+    if cur is None:
+        acc[key] = list(part)
+        return
+    for i in range(7):
+        cur[i] += part[i]
+    cur[7] = max(cur[7], part[7])
+
+
+def _aggregate_numpy(block, venue: str, group_by, ts_from, ts_to, events, sides, symbols, acc) -> None:
+    ts = block["ts_ns"]
+    mask = np.ones(len(ts), dtype=bool)
+    if ts_from is not None:
+        mask &= ts >= ts_from
+    if ts_to is not None:
+        mask &= ts < ts_to
+    if events is not None:
+        mask &= np.isin(block["event"], events)
+    if sides is not None:
+        mask &= np.isin(block["side"], sides)
+    names = block["symbols"]
+    if symbols is not None:
+        mask &= np.isin(block["symbol"], [i for i, s in enumerate(names) if s in symbols])
+    if not mask.any():
+        return
+
+    ts = ts[mask]
+    qty = block["qty"][mask]
+    notional = block["price_ticks"][mask] * block["tick"] * qty
+    latency = block["latency_us"][mask].astype(np.int64)
+    rest = block["rest_ms"][mask]
+    event = block["event"][mask]
+    side = block["side"][mask]
+
+    columns = []
+    for k in group_by:
+        if k == "venue":
+            columns.append(np.zeros(len(ts), dtype=np.int64))
+        elif k == "symbol":
+            columns.append(block["symbol"][mask].astype(np.int64))
+        elif k == "side":
+            columns.append(side.astype(np.int64))
+        elif k == "event":
+            columns.append(event.astype(np.int64))
+        elif k == "day":
+            columns.append(ts // 86_400_000_000_000)
+        else:
+            columns.append(ts // 3_600_000_000_000)
+    if columns:
+        uniq, inverse = np.unique(np.stack(columns, axis=1), axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+    else:
+        uniq, inverse = np.zeros((1, 0), dtype=np.int64), np.zeros(len(ts), dtype=np.int64)
+    n = len(uniq)
+
+    has_lat = latency > 0
+    has_rest = (event == CANCEL) & (side >= 0)  # cancels of orders placed this run
+    count = np.bincount(inverse, minlength=n)
+    qty_sum = np.bincount(inverse, weights=qty, minlength=n)
+    not_sum = np.bincount(inverse, weights=notional, minlength=n)
+    lat_sum = np.bincount(inverse, weights=latency, minlength=n)
+    lat_n = np.bincount(inverse, weights=has_lat, minlength=n)
+    rest_sum = np.bincount(inverse, weights=rest, minlength=n)
+    rest_n = np.bincount(inverse, weights=has_rest, minlength=n)
+    rest_max = np.zeros(n, dtype=np.int64)
+    np.maximum.at(rest_max, inverse, rest)
+
+    for g in range(n):
+        key = tuple(_label(k, int(v), venue, names) for k, v in zip(group_by, uniq[g]))
+        _merge(acc, key, (int(count[g]), float(qty_sum[g]), float(not_sum[g]), int(lat_sum[g]),
+                          int(lat_n[g]), int(rest_sum[g]), int(rest_n[g]), int(rest_max[g])))
+
+
+def _aggregate_rows(block, venue: str, group_by, ts_from, ts_to, events, sides, symbols, acc) -> None:
+    names = block["symbols"]
+    tick = block["tick"]
+    cols = [block[c] for c in ("ts_ns", "event", "side", "symbol", "price_ticks", "qty", "latency_us", "rest_ms")]
+    for ts, ev, side, sym, ticks, qty, lat, rest in zip(*cols):
+        if (ts_from is not None and ts < ts_from) or (ts_to is not None and ts >= ts_to):
+            continue
+        if (events is not None and ev not in events) or (sides is not None and side not in sides):
+            continue
+        if symbols is not None and names[sym] not in symbols:
+            continue
+        raw = {"venue": 0, "symbol": sym, "side": side, "event": ev,
+               "day": ts // 86_400_000_000_000, "hour": ts // 3_600_000_000_000}
+        key = tuple(_label(k, raw[k], venue, names) for k in group_by)
+        known = ev == CANCEL and side >= 0
+        _merge(acc, key, (1, qty, ticks * tick * qty, lat, 1 if lat > 0 else 0,
+                          rest, 1 if known else 0, rest))
+
+
+def _label(key: str, value: int, venue: str, names: List[str]) -> str:
+    if key == "venue":
+        return venue
+    if key == "symbol":
+        return names[value]
+    if key == "side":
+        return SIDE_NAMES.get(value, "?")
+    if key == "event":
+        return EVENTS[value]
+    if key == "day":
+        return _day(value * 86_400_000_000_000)
+    return datetime.fromtimestamp(value * 3600, tz=timezone.utc).strftime("%Y-%m-%d %H:00")
+
+
+def query(directory: str, group_by: List[str], venues=None, ts_from=None, ts_to=None, events=None,
+          sides=None, symbols=None) -> Dict[tuple, list]:
+    aggregate = _aggregate_numpy if np is not None else _aggregate_rows
+    acc: Dict[tuple, list] = {}
+    for venue, _, path in segments(directory, venues, _day(ts_from), _day(ts_to)):
+        for block in iter_blocks(path, ts_from, ts_to):
+            aggregate(block, venue, group_by, ts_from, ts_to, events, sides, symbols, acc)
+    return acc
+
+
+def print_table(group_by: List[str], acc: Dict[tuple, list]) -> None:
+    headers = list(group_by) + ["count", "qty", "notional", "lat ms", "rest avg s", "rest max s"]
+    rows = []
+    for key in sorted(acc):
+        c, qty, notional, lat_sum, lat_n, rest_sum, rest_n, rest_max = acc[key]
+        rows.append(list(key) + [
+            str(c), f"{qty:,.0f}", f"{notional:,.4f}",
+            f"{lat_sum / lat_n / 1000:.1f}" if lat_n else "-",
+            f"{rest_sum / rest_n / 1000:.1f}" if rest_n else "-",
+            f"{rest_max / 1000:.1f}" if rest_n else "-",
+        ])
+    widths = [max(len(h), *(len(r[i]) for r in rows)) if rows else len(h) for i, h in enumerate(headers)]
+    print("  ".join(h.rjust(w) for h, w in zip(headers, widths)))
+    for r in rows:
+        print("  ".join(v.rjust(w) for v, w in zip(r, widths)))
+
+
+def _csv(value: Optional[str]) -> Optional[List[str]]:
+    return [v.strip() for v in value.split(",") if v.strip()] if value else None
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Aggregate the order-action audit log.")
+    p.add_argument("--dir", default=AUDIT_DIR, help="audit directory (AUDIT_DIR)")
+    p.add_argument("--since", help="7d, 12h, YYYY-MM-DD or ISO datetime (UTC)")
+    p.add_argument("--until", help="same formats; exclusive")
+    p.add_argument("--venue", help="comma-separated venue ids")
+    p.add_argument("--symbol", help="comma-separated symbols")
+    p.add_argument("--event", help=f"comma-separated: {','.join(EVENTS)}")
+    p.add_argument("--side", help="buy, sell")
+    p.add_argument("--group-by", default="venue,event", help=f"comma-separated: {','.join(KEYS)}")
+    args = p.parse_args(argv)
+
+    group_by = _csv(args.group_by) or []
+    unknown = [k for k in group_by if k not in KEYS]
+    if unknown:
+        p.error(f"unknown group-by key(s): {', '.join(unknown)}")
+    events = [EVENTS.index(e) for e in _csv(args.event)] if args.event else None
+    sides = [SIDES[s] for s in _csv(args.side)] if args.side else None
+    symbols = set(_csv(args.symbol)) if args.symbol else None
+
+    started = time.perf_counter()
+    acc = query(args.dir, group_by, _csv(args.venue), parse_time(args.since), parse_time(args.until),
+                events, sides, symbols)
+    print_table(group_by, acc)
+    rows = sum(v[0] for v in acc.values())
+    print(f"\n{rows:,} rows in {time.perf_counter() - started:.2f}s"
+          f"{'' if np is not None else ' (numpy not installed: row-by-row scan)'}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,352 @@
+# budget_check.py — API-call budget regression check: run_once against stubbed venues
+#
+#   python budget_check.py                          # compare with call_budgets.json, exit 1 on any overrun
+#   python budget_check.py --record                 # rewrite the budgets from this run
+#   python budget_check.py --venues p2b,dextrade --depths 5,20 --cycles 4
+#
+# Each venue's real adapter is built with dummy credentials and its session is
+# mounted on an in-memory stub of the venue API (tickers, balances, open
+# orders, place and cancel in the venue's own request/response shapes), so the
+# counts are the adapter's actual request pattern. A venue cycle is what main
+# runs: begin_cycle, the reference fetch, then run_once per market. The budget
+# per venue and ladder depth is the worst cycle's count per endpoint class and
+# in total — the first cycle pays the balance fetch, later ones the cleanup of
+# the previous ladder. Stubbed calls always succeed, so retries are not counted.
+import argparse
+import copy
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+import threading
+from typing import Dict, List
+from urllib.parse import parse_qsl, urlsplit
+
+os.environ["LOG_LEVEL"] = os.getenv("LOG_LEVEL") or "WARNING"
+os.environ["ORDER_JOURNAL_DIR"] = ""
+os.environ["HTTP_CASSETTE_MODE"] = ""
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+from adapters.registry import build_adapter
+from helpers import batch_cancel
+from helpers.call_budget import by_class, counter_for
+from main import market_key, reference_mid
+from runner import run_once
+
+logging.getLogger(batch_cancel.logger.name).setLevel(os.environ["LOG_LEVEL"])  # pinned to INFO on import
+
+BUDGETS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "call_budgets.json")
+
+BTC = 90_000.0
+BALANCE = "1000000000"
+
+
+def _norm(market: str) -> str:
+    return market.replace("/", "").replace("_", "").replace("-", "").upper()
+
+
+def _body(request) -> dict:
+    raw = request.body
+    if not raw:
+        return {}
+    if isinstance(raw, bytes):
+        raw = raw.decode()
+    try:
+        body = json.loads(raw)
+        return body if isinstance(body, dict) else {}
+    except ValueError:
+        return dict(parse_qsl(raw, keep_blank_values=True))
+
+
+class StubVenue(HTTPAdapter):
+    """One venue's API in memory: routes by (method, path) and keeps the open orders per market."""
+
+    def __init__(self, venue: str, markets: List[str], currencies: List[str]):
+        super().__init__()
+        self.routes = ROUTES[venue]
+        self.markets = [m.replace("/", "_") for m in markets] + ["BTC_USDT"]
+        self.currencies = sorted(set(currencies) | {"BTC", "USDT"})
+        self.orders: Dict[str, str] = {}  # order id -> normalized market
+        self._ids = itertools.count(10_000_000)
+        self._lock = threading.Lock()
+
+    # Book
+    def place(self, market: str) -> str:
+        with self._lock:
+            oid = str(next(self._ids))
+            self.orders[oid] = _norm(market)
+        return oid
+
+    def cancel(self, oid) -> bool:
+        with self._lock:
+            return self.orders.pop(str(oid), None) is not None
+
+    def cancel_market(self, market: str) -> None:
+        with self._lock:
+            for oid in [o for o, m in self.orders.items() if m == _norm(market)]:
+                del self.orders[oid]
+
+    def open(self, market: str = None) -> List[tuple]:
+        with self._lock:
+            return [(o, m) for o, m in self.orders.items() if market is None or m == _norm(market)]
+
+    # Quotes
+    def quote(self, market: str) -> tuple:
+        """(bid, ask, last) — BTC at BTC, everything else around the bot's reference mid."""
+        mid = BTC if _norm(market).startswith("BTC") else BTC * config.SETTINGS.reference_multiplier
+        return mid * 0.98, mid * 1.02, mid
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        handler = self.routes.get((request.method, parts.path))
+        resp = requests.Response()
+        if handler is None:
+            resp.status_code = 404
+            payload = {"error": f"no stub for {request.method} {parts.path}"}
+        else:
+            resp.status_code = 200
+            payload = handler(self, dict(parse_qsl(parts.query)), _body(request))
+        resp._content = json.dumps(payload).encode()
+        resp.encoding = "utf-8"
+        resp.headers["Content-Type"] = "application/json"
+        resp.url = request.url
+        resp.request = request
+        return resp
+
+
+# ---------------- Venue routes ---------------- #
+
+def _bitmart_ticker(stub, q, b):
+    bid, ask, last = stub.quote(q["symbol"])
+    return {"code": 1000, "data": {"symbol": q["symbol"], "last": str(last), "bid_px": str(bid), "ask_px": str(ask)}}
+
+
+def _bitmart_tickers(stub, q, b):
+    rows = []
+    for m in stub.markets:
+        bid, ask, last = stub.quote(m)
+        rows.append([m, str(last), "0", "0", "0", "0", "0", "0", str(bid), "1", str(ask), "1"])
+    return {"code": 1000, "data": rows}
+
+
+def _bitmart_batch_cancel(stub, q, b):
+    for oid in b.get("order_ids", []):
+        stub.cancel(oid)
+    return {"code": 1000, "data": {}}
+
+
+def _bitmart_cancel_all(stub, q, b):
+    stub.cancel_market(b["symbol"])
+    return {"code": 1000, "data": {}}
+
+
+def _p2b_ticker(stub, q, b):
+    bid, ask, last = stub.quote(q["market"])
+    return {"success": True, "result": {"bid": str(bid), "ask": str(ask), "last": str(last)}}
+
+
+def _p2b_tickers(stub, q, b):
+    result = {}
+    for m in stub.markets:
+        bid, ask, last = stub.quote(m)
+        result[m] = {"ticker": {"bid": str(bid), "ask": str(ask), "last": str(last)}}
+    return {"success": True, "result": result}
+
+
+def _dextrade_ticker(stub, q, b):
+    bid, ask, last = stub.quote(q["pair"])
+    return {"last": last, "bid_price": bid, "ask_price": ask}
+
+
+def _biconomy_tickers(stub, q, b):
+    rows = []
+    for m in stub.markets:
+        bid, ask, last = stub.quote(m)
+        rows.append({"symbol": m, "buy": str(bid), "sell": str(ask), "last": str(last)})
+    return {"ticker": rows}
+
+
+def _biconomy_cancel_batch(stub, q, b):
+    for o in json.loads(b.get("orders_json") or "[]"):
+        stub.cancel(o["order_id"])
+    return {"code": 0, "result": []}
+
+
+def _tapbit_ticker(stub, q, b):
+    bid, ask, last = stub.quote(q["symbol"])
+    return {"code": 0, "data": {"bid": str(bid), "ask": str(ask), "last": str(last)}}
+
+
+ROUTES = {
+    "bitmart": {
+        ("GET", "/spot/quotation/v3/ticker"): _bitmart_ticker,
+        ("GET", "/spot/quotation/v3/tickers"): _bitmart_tickers,
+        ("GET", "/spot/quotation/v3/trades"): lambda s, q, b: {"code": 1000, "data": []},
+        ("GET", "/spot/v1/wallet"): lambda s, q, b: {"code": 1000, "data": {"wallet": [
+            {"id": c, "available": BALANCE, "frozen": "0"} for c in s.currencies]}},
+        ("GET", "/spot/v2/orders"): lambda s, q, b: {"code": 1000, "data": {"orders": [
+            {"order_id": o, "status": "new"} for o, _ in s.open(q["symbol"])]}},
+        ("POST", "/spot/v2/batch_orders_cancel"): _bitmart_batch_cancel,
+        ("POST", "/spot/v4/cancel_all"): _bitmart_cancel_all,
+        ("POST", "/spot/v2/submit_order"): lambda s, q, b: {"code": 1000, "data": {"order_id": s.place(b["symbol"])}},
+    },
+    "p2b": {
+        ("GET", "/api/v2/public/ticker"): _p2b_ticker,
+        ("GET", "/api/v2/public/tickers"): _p2b_tickers,
+        ("POST", "/api/v2/account/balances"): lambda s, q, b: {"success": True, "result": {
+            c: {"available": BALANCE, "freeze": "0"} for c in s.currencies}},
+        ("POST", "/api/v2/orders"): lambda s, q, b: {"success": True, "result": {"records": [
+            {"id": int(o)} for o, _ in s.open(b["market"])]}},
+        ("POST", "/api/v2/order/cancel"): lambda s, q, b: {"success": s.cancel(b["orderId"])},
+        ("POST", "/api/v2/order/new"): lambda s, q, b: {"success": True, "result": {"orderId": int(s.place(b["market"]))}},
+    },
+    "dextrade": {
+        ("GET", "/v1/public/ticker"): _dextrade_ticker,
+        ("POST", "/v1/private/balances"): lambda s, q, b: {"status": True, "data": {"list": [
+            {"currency": {"iso3": c}, "balances": {"available": BALANCE, "total": BALANCE}} for c in s.currencies]}},
+        ("GET", "/v1/private/orders"): lambda s, q, b: {"status": True, "data": {"list": [
+            {"id": int(o), "pair": m} for o, m in s.open()]}},
+        ("POST", "/v1/private/delete-order"): lambda s, q, b: {"status": s.cancel(b["order_id"])},
+        ("POST", "/v1/private/create-order"): lambda s, q, b: {"status": True, "data": {"id": int(s.place(b["pair"]))}},
+    },
+    "biconomy": {
+        ("GET", "/api/v1/tickers"): _biconomy_tickers,
+        ("POST", "/api/v1/private/user"): lambda s, q, b: {"code": 0, "result": {
+            c: {"available": BALANCE, "freeze": "0"} for c in s.currencies}},
+        ("POST", "/api/v1/private/order/pending"): lambda s, q, b: {"code": 0, "result": {"records": [
+            {"id": int(o)} for o, _ in s.open(b["market"])]}},
+        ("POST", "/api/v1/private/trade/cancel_batch"): _biconomy_cancel_batch,
+        ("POST", "/api/v1/private/trade/cancel"): lambda s, q, b: {"code": 0 if s.cancel(b["order_id"]) else 1},
+        ("POST", "/api/v1/private/order/create"): lambda s, q, b: {"code": 0, "result": {
+            "order_id": int(s.place(b["market"]))}},
+    },
+    "tapbit": {
+        ("GET", "/api/v1/spot/market/ticker"): _tapbit_ticker,
+        ("POST", "/api/v1/spot/account/list"): lambda s, q, b: {"code": 0, "data": [
+            {"currency": c, "available": BALANCE, "frozen": "0"} for c in s.currencies]},
+        ("POST", "/api/v1/spot/open_order_list"): lambda s, q, b: {"code": 0, "data": [
+            {"orderId": o} for o, _ in s.open(b["symbol"])]},
+        ("POST", "/api/v1/spot/cancel_order"): lambda s, q, b: {"code": 0 if s.cancel(b["orderId"]) else 1},
+        ("POST", "/api/v1/spot/order"): lambda s, q, b: {"code": 0, "data": {"orderId": s.place(b["symbol"])}},
+    },
+}
+
+
+# ---------------- Measure / compare ---------------- #
+
+def measure(cfg, depth: int, cycles: int) -> Dict[str, int]:
+    """Worst venue cycle over `cycles` cycles at a fixed ladder depth: {endpoint class: calls, "total": calls}."""
+    cfg = copy.copy(cfg)
+    cfg.enabled, cfg.dry_run, cfg.shadow = True, False, False
+    for name in (cfg.api_key_env, cfg.secret_env, cfg.uid_env):
+        if name:
+            os.environ.setdefault(name, "budget-check")
+    config.SETTINGS.depth_min = config.SETTINGS.depth_max = depth
+    random.seed(depth)
+
+    ad = build_adapter(cfg)
+    stub = StubVenue(cfg.id, ad.markets(), [c for view in ad.symbol_views() for c in view.base_quote()])
+    ad.session.mount("https://", stub)
+    ad.session.mount("http://", stub)
+    ad.connect()
+
+    calls = counter_for(cfg.id)
+    calls.take()
+    prev_ids: Dict[str, set] = {}
+    worst: Dict[str, int] = {}
+    for _ in range(cycles):
+        ad.begin_cycle()
+        reference_mid(ad)
+        for view in ad.symbol_views():
+            mkey = market_key(view)
+            prev_ids[mkey] = run_once(view, prev_ids.get(mkey))
+        used = by_class(calls.take())
+        used["total"] = sum(used.values())
+        for cls, n in used.items():
+            worst[cls] = max(worst.get(cls, 0), n)
+    return worst
+
+
+def compare(measured: Dict[str, Dict[str, Dict[str, int]]], budgets: dict) -> List[str]:
+    """Overruns as messages (empty = within budget)."""
+    failures = []
+    for venue, depths in measured.items():
+        for depth, counts in depths.items():
+            budget = budgets.get(venue, {}).get(depth)
+            if budget is None:
+                failures.append(f"{venue} depth {depth}: no budget recorded (run with --record)")
+                continue
+            for cls, n in sorted(counts.items()):
+                if n > budget.get(cls, 0):
+                    failures.append(f"{venue} depth {depth}: {cls} {n} calls > budget {budget.get(cls, 0)}")
+    return failures
+
+
+def print_table(measured: dict, budgets: dict) -> None:
+    classes = sorted({c for depths in measured.values() for counts in depths.values() for c in counts} - {"total"})
+    headers = ["venue", "depth"] + classes + ["total"]
+    rows = []
+    for venue, depths in measured.items():
+        for depth, counts in depths.items():
+            budget = budgets.get(venue, {}).get(depth, {})
+            cells = []
+            for cls in classes + ["total"]:
+                n, cap = counts.get(cls, 0), budget.get(cls)
+                cells.append(f"{n}/{cap}" if cap is not None else str(n))
+            rows.append([venue, depth] + cells)
+    widths = [max(len(h), *(len(r[i]) for r in rows)) if rows else len(h) for i, h in enumerate(headers)]
+    print("  ".join(h.rjust(w) for h, w in zip(headers, widths)))
+    for r in rows:
+        print("  ".join(v.rjust(w) for v, w in zip(r, widths)))
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Count API calls per run_once cycle and check them against budgets.")
+    p.add_argument("--venues", help=f"comma-separated (default: {','.join(ROUTES)})")
+    p.add_argument("--depths", default="5,20", help="comma-separated ladder depths per side")
+    p.add_argument("--cycles", type=int, default=3, help="venue cycles per depth")
+    p.add_argument("--budgets", default=BUDGETS_FILE, help="budget file")
+    p.add_argument("--record", action="store_true", help="write the measured counts as the new budgets")
+    args = p.parse_args(argv)
+
+    venues = [v for v in (args.venues or ",".join(ROUTES)).split(",") if v]
+    unknown = [v for v in venues if v not in ROUTES]
+    if unknown:
+        p.error(f"no stub for venue(s): {', '.join(unknown)}")
+    depths = [int(d) for d in args.depths.split(",") if d]
+    configs = {cfg.id: cfg for cfg in config.EXCHANGES}
+
+    measured = {}
+    for venue in venues:
+        cfg = configs.get(venue) or config.ExchangeConfig(id=venue, symbol="OHO/USDT", btc_symbol="BTC/USDT")
+        measured[venue] = {str(d): measure(cfg, d, args.cycles) for d in depths}
+
+    budgets = {}
+    if os.path.exists(args.budgets):
+        with open(args.budgets, encoding="utf-8") as fh:
+            budgets = json.load(fh)
+
+    if args.record:
+        for venue, depths in measured.items():
+            budgets.setdefault(venue, {}).update(depths)
+        with open(args.budgets, "w", encoding="utf-8") as fh:
+            json.dump(budgets, fh, indent=2, sort_keys=True)
+            fh.write("\n")
+        print_table(measured, budgets)
+        print(f"\nbudgets written to {args.budgets}", file=sys.stderr)
+        return 0
+
+    print_table(measured, budgets)
+    failures = compare(measured, budgets)
+    for f in failures:
+        print(f"OVER BUDGET  {f}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,5 @@
 # config.py — CORRECTED with proper BitMart symbol format
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Optional, List
 
 
@@ -15,6 +15,14 @@ class ExchangeConfig:
     uid_env: str = ""
     hostname_env: str = ""
     symbol_override: Optional[str] = None
+    # Extra markets quoted by the same adapter (one session, one BTC fetch,
+    # batched tickers). All markets share BotSettings, e.g. OHO/USDT + OHO/USDC.
+    symbols: List[str] = field(default_factory=list)
+    # With dry_run: keep a simulated order book matched against live quotes/trades
+    # and report fills, quote uptime and would-be API calls (helpers/shadow.py)
+    shadow: bool = False
+    # Base inventory the venue aims to hold; the PnL engine reports drift from it
+    inventory_target: float = 0.0
 
 
 @dataclass
@@ -66,6 +74,13 @@ class BotSettings:
     # Safety features (not in original requirements but recommended)
     maker_guard_ticks: int = 3  # Stay N ticks away from best bid/ask to avoid immediate fills
 
+    # Event-triggered requoting (each venue keeps its own interval_min_s..interval_max_s deadline)
+    requote_trigger_ticks: float = 5    # Reference move (in ticks) that requotes a venue early; 0 = off
+    requote_min_move_ticks: float = 1   # Smaller move at the deadline → skip and stretch; 0 = always requote
+    requote_stretch: float = 1.5        # Interval multiplier per skipped refresh
+    requote_max_idle_s: float = 60      # Requote at least this often even if nothing moved
+    reference_poll_s: float = 1.0       # How often BTC is checked between deadlines; 0 = off
+
 
 SETTINGS = BotSettings()
 
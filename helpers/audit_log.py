@@ -0,0 +1,292 @@
+# helpers/audit_log.py — Append-only columnar audit log of order actions
+#
+#   audit/<venue>/<YYYY-MM-DD>.oal      one segment per venue per UTC day
+#
+# Every placement, ack, reject and cancel becomes one row. Rows are buffered
+# and appended as self-describing column blocks (one contiguous array per
+# column), so a query reads only the blocks of the days it asks for, skips
+# blocks outside the time range from their header, and decodes each column
+# with a single frombuffer. numpy is optional for reading: without it the
+# same columns come back as array.array and aggregation loops in Python.
+#
+# Block layout (little-endian, padded to 8 bytes):
+#   header  magic "OAB1", rows, body bytes, symbol count, price tick, ts min, ts max
+#   body    ts_ns i8 | price_ticks i8 | qty f8 | rest_ms i8 | latency_us u4 |
+#           id_offsets u4[rows+1] | symbol u2 | event u1 | side i1 | id bytes |
+#           symbol dictionary (u2 length + utf-8 each)
+import array
+import logging
+import os
+import struct
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # optional: vectorized queries
+    np = None
+
+logger = logging.getLogger("oho_bot")
+
+MAGIC = b"OAB1"
+HEADER = struct.Struct("<4sIIIdqq")  # 40 bytes
+
+PLACE, ACK, REJECT, CANCEL = 0, 1, 2, 3
+EVENTS = ("place", "ack", "reject", "cancel")
+SIDES = {"buy": 0, "sell": 1}
+
+# (name, array typecode, numpy dtype) in body order
+NUMERIC = (("ts_ns", "q", "<i8"), ("price_ticks", "q", "<i8"), ("qty", "d", "<f8"),
+           ("rest_ms", "q", "<i8"), ("latency_us", "I", "<u4"))
+SMALL = (("symbol", "H", "<u2"), ("event", "B", "u1"), ("side", "b", "i1"))
+
+# Resting orders we never see cancelled (filled) are forgotten after this long
+LIVE_MAX_AGE_S = 7 * 86400
+
+
+def _day(ts_ns: int) -> str:
+    return datetime.fromtimestamp(ts_ns / 1e9, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def _pad8(n: int) -> bytes:
+    return b"\0" * (-n % 8)
+
+
+class AuditLog:
+    """
+    Writer for one venue. Rows are flushed as a block every block_rows rows
+    or flush_interval_s seconds (checked at the end of each cycle), and on
+    close — a crash loses at most the unflushed tail, never a written block.
+    A block torn by a crash is truncated when the log is next opened, so new
+    blocks are not appended behind it.
+    """
+
+    def __init__(self, directory: str, venue: str, tick: float, block_rows: int = 4096,
+                 flush_interval_s: float = 30.0):
+        self.directory = os.path.join(directory, venue)
+        os.makedirs(self.directory, exist_ok=True)
+        self.venue = venue
+        self.tick = tick
+        self.block_rows = block_rows
+        self.flush_interval_s = flush_interval_s
+
+        self._lock = threading.Lock()
+        self._rows: List[tuple] = []
+        self._last_flush = time.monotonic()
+        self._live: Dict[str, tuple] = {}  # order id -> (symbol, side, price_ticks, qty, acked ts_ns)
+
+        for name in os.listdir(self.directory):
+            if name.endswith(".oal"):
+                _truncate_torn(os.path.join(self.directory, name))
+
+    # ---------------- Events ---------------- #
+
+    def placing(self, symbol: str, side: str, price: float, qty: float) -> float:
+        """Record an order about to be sent. Returns the start time for acked()/rejected()."""
+        self._add(time.time_ns(), PLACE, symbol, SIDES.get(side, -1), self._ticks(price), qty, "", 0, 0)
+        return time.perf_counter()
+
+    def acked(self, symbol: str, side: str, price: float, qty: float, order_id: str, started: float) -> None:
+        now = time.time_ns()
+        ticks = self._ticks(price)
+        self._add(now, ACK, symbol, SIDES.get(side, -1), ticks, qty, str(order_id), self._latency(started), 0)
+        with self._lock:
+            self._live[str(order_id)] = (symbol, SIDES.get(side, -1), ticks, qty, now)
+
+    def rejected(self, symbol: str, side: str, price: float, qty: float, started: float) -> None:
+        self._add(time.time_ns(), REJECT, symbol, SIDES.get(side, -1), self._ticks(price), qty, "",
+                  self._latency(started), 0)
+
+    def cancelled(self, order_ids: Iterable[str], symbol: str = "") -> None:
+        now = time.time_ns()
+        for oid in order_ids:
+            oid = str(oid)
+            with self._lock:
+                o = self._live.pop(oid, None)
+            if o is not None:
+                self._add(now, CANCEL, o[0], o[1], o[2], o[3], oid, 0, (now - o[4]) // 1_000_000)
+            else:  # placed before this run (restored from the journal)
+                self._add(now, CANCEL, symbol, -1, 0, 0.0, oid, 0, 0)
+
+    def _ticks(self, price: float) -> int:
+        return round(price / self.tick) if self.tick > 0 else 0
+
+    @staticmethod
+    def _latency(started: float) -> int:
+        return min(int((time.perf_counter() - started) * 1e6), 0xFFFFFFFF)
+
+    def _add(self, *row) -> None:
+        with self._lock:
+            self._rows.append(row)
+            if len(self._rows) >= self.block_rows:
+                self._flush_locked()
+
+    # ---------------- Writing ---------------- #
+
+    def checkpoint(self) -> None:
+        """End-of-cycle hook: write a block once enough rows or time have accumulated."""
+        with self._lock:
+            if self._rows and time.monotonic() - self._last_flush >= self.flush_interval_s:
+                self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        by_day = defaultdict(list)
+        for row in self._rows:
+            by_day[_day(row[0])].append(row)
+        for day, rows in by_day.items():
+            with open(os.path.join(self.directory, f"{day}.oal"), "ab") as fh:
+                fh.write(encode_block(rows, self.tick))
+        self._rows = []
+        self._last_flush = time.monotonic()
+
+        cutoff = time.time_ns() - int(LIVE_MAX_AGE_S * 1e9)
+        for oid in [oid for oid, o in self._live.items() if o[4] < cutoff]:
+            del self._live[oid]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._rows:
+                self._flush_locked()
+
+
+def encode_block(rows: List[tuple], tick: float) -> bytes:
+    """rows: (ts_ns, event, symbol, side, price_ticks, qty, order_id, latency_us, rest_ms)"""
+    symbols: Dict[str, int] = {}
+    ts, ticks, qty, rest, latency = (array.array(code) for _, code, _ in NUMERIC)
+    sym, event, side = (array.array(code) for _, code, _ in SMALL)
+    offsets = array.array("I", [0])
+    ids = bytearray()
+    for r in rows:
+        ts.append(r[0])
+        event.append(r[1])
+        sym.append(symbols.setdefault(r[2], len(symbols)))
+        side.append(r[3])
+        ticks.append(r[4])
+        qty.append(r[5])
+        ids += r[6].encode()
+        offsets.append(len(ids))
+        latency.append(r[7])
+        rest.append(r[8])
+
+    parts = [ts, ticks, qty, rest, latency, offsets, sym, event, side]
+    if sys.byteorder != "little":
+        for a in parts:
+            a.byteswap()
+    body = b"".join(a.tobytes() for a in parts) + bytes(ids)
+    for name in symbols:
+        raw = name.encode()
+        body += struct.pack("<H", len(raw)) + raw
+    body += _pad8(len(body))
+    return HEADER.pack(MAGIC, len(rows), len(body), len(symbols), tick, min(ts), max(ts)) + body
+
+
+# ---------------- Reading ---------------- #
+
+def _column(buf: bytes, offset: int, code: str, dtype: str, n: int):
+    if np is not None:
+        return np.frombuffer(buf, dtype=dtype, count=n, offset=offset)
+    a = array.array(code)
+    a.frombytes(buf[offset:offset + n * a.itemsize])
+    if sys.byteorder != "little":
+        a.byteswap()
+    return a
+
+
+def decode_block(rows: int, n_symbols: int, tick: float, body: bytes, with_ids: bool = False) -> dict:
+    cols, pos = {}, 0
+    for name, code, dtype in NUMERIC:
+        cols[name] = _column(body, pos, code, dtype, rows)
+        pos += rows * array.array(code).itemsize
+    offsets = _column(body, pos, "I", "<u4", rows + 1)
+    pos += (rows + 1) * 4
+    for name, code, dtype in SMALL:
+        cols[name] = _column(body, pos, code, dtype, rows)
+        pos += rows * array.array(code).itemsize
+    id_bytes = body[pos:pos + int(offsets[-1])]
+    pos += int(offsets[-1])
+    symbols = []
+    for _ in range(n_symbols):
+        (size,) = struct.unpack_from("<H", body, pos)
+        symbols.append(body[pos + 2:pos + 2 + size].decode())
+        pos += 2 + size
+    cols["symbols"] = symbols
+    cols["tick"] = tick
+    if with_ids:
+        cols["order_id"] = [id_bytes[offsets[i]:offsets[i + 1]].decode() for i in range(rows)]
+    return cols
+
+
+def _header_ok(magic: bytes, rows: int, size: int, n_symbols: int, ts_min: int, ts_max: int) -> bool:
+    """A header the writer could have produced (44 body bytes per row, 4 + 2 per symbol at least)."""
+    return (magic == MAGIC and rows > 0 and size % 8 == 0 and ts_min <= ts_max
+            and size >= 44 * rows + 4 + 2 * n_symbols)
+
+
+def _scan(fh, end: int) -> Iterator[tuple]:
+    """(body offset, header fields) of each complete block, stopping at the first bad or torn one."""
+    pos = 0
+    while pos + HEADER.size <= end:
+        fh.seek(pos)
+        fields = HEADER.unpack(fh.read(HEADER.size))
+        magic, rows, size, n_symbols, _, ts_min, ts_max = fields
+        if not _header_ok(magic, rows, size, n_symbols, ts_min, ts_max) or pos + HEADER.size + size > end:
+            return
+        yield pos + HEADER.size, fields
+        pos += HEADER.size + size
+
+
+def _truncate_torn(path: str) -> None:
+    """Cut a segment back to its last complete block (a crash mid-append leaves a partial one)."""
+    end = os.path.getsize(path)
+    with open(path, "r+b") as fh:
+        good_end = 0
+        for body_at, fields in _scan(fh, end):
+            good_end = body_at + fields[2]
+        if good_end < end:
+            logger.warning(f"{path}: dropping {end - good_end} bytes of a torn block")
+            fh.truncate(good_end)
+
+
+def iter_blocks(path: str, ts_from: Optional[int] = None, ts_to: Optional[int] = None,
+                with_ids: bool = False) -> Iterator[dict]:
+    """Decoded blocks of one segment; blocks entirely outside [ts_from, ts_to) are skipped unread."""
+    end = os.path.getsize(path)
+    with open(path, "rb") as fh:
+        good_end = 0
+        for body_at, (_, rows, size, n_symbols, tick, ts_min, ts_max) in _scan(fh, end):
+            good_end = body_at + size
+            if (ts_from is not None and ts_max < ts_from) or (ts_to is not None and ts_min >= ts_to):
+                continue
+            fh.seek(body_at)
+            body = fh.read(size)
+            yield decode_block(rows, n_symbols, tick, body, with_ids)
+        if good_end < end:
+            logger.warning(f"{path}: bad or torn block at byte {good_end}, ignoring the rest of the segment")
+
+
+def segments(directory: str, venues: Optional[Iterable[str]] = None, day_from: Optional[str] = None,
+             day_to: Optional[str] = None) -> Iterator[tuple]:
+    """(venue, day, path) for every segment in range, oldest day first."""
+    if not os.path.isdir(directory):
+        return
+    wanted = set(venues) if venues else None
+    found = []
+    for venue in sorted(os.listdir(directory)):
+        if wanted is not None and venue not in wanted:
+            continue
+        vdir = os.path.join(directory, venue)
+        if not os.path.isdir(vdir):
+            continue
+        for name in os.listdir(vdir):
+            if not name.endswith(".oal"):
+                continue
+            day = name[:-4]
+            if (day_from and day < day_from) or (day_to and day > day_to):
+                continue
+            found.append((day, venue, os.path.join(vdir, name)))
+    for day, venue, path in sorted(found):
+        yield venue, day, path
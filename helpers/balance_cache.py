@@ -0,0 +1,134 @@
+# helpers/balance_cache.py — Cached free balances kept current between refreshes
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from helpers import clock
+
+logger = logging.getLogger("oho_bot")
+
+# Reservations older than this belong to orders that filled long ago
+RESERVATION_MAX_AGE_S = 3600.0
+
+
+class BalanceCache:
+    """
+    Free balances per currency for one venue.
+
+    Refreshed from the exchange at most every ttl_s; in between it is kept
+    current locally: placing an order reserves its cost (quote for buys, base
+    for sells), a confirmed cancel releases it, and a fill moves funds between
+    base and quote. Each currency has its own refresh time, so markets with
+    different quotes don't refetch each other's balances. invalidate() forces
+    a refetch on the next read (e.g. after an insufficient-funds rejection).
+    """
+
+    def __init__(self, fetch: Callable[[Sequence[str]], Dict[str, Dict[str, float]]], ttl_s: float = 30.0):
+        self._fetch = fetch
+        self.ttl_s = ttl_s
+        self._free: Dict[str, float] = {}
+        self._fetched_at: Dict[str, float] = {}  # currency -> monotonic time of its last refresh
+        self._fetched_wall: Dict[str, float] = {}  # currency -> epoch time of its last refresh
+        self._reserved: Dict[str, Tuple[str, float, float]] = {}  # order_id -> (currency, amount, ts)
+        self._lock = threading.Lock()
+        self.available = True  # False once the venue turns out not to support balances
+
+    def free(self, currencies: Sequence[str]) -> Optional[Dict[str, float]]:
+        """Free amount per currency, or None if balances can't be fetched."""
+        if not self.available:
+            return None
+
+        with self._lock:
+            now = clock.monotonic()
+            stale = any(now - self._fetched_at.get(c, -self.ttl_s) >= self.ttl_s for c in currencies)
+
+        if stale:
+            try:
+                raw = self._fetch(list(currencies))
+            except NotImplementedError:
+                self.available = False
+                return None
+            except Exception as e:
+                logger.warning(f"balance refresh failed: {e}")
+                raw = None
+
+            with self._lock:
+                if raw is not None:
+                    # Fresh figures already net out open orders; reservations are kept
+                    # so a later cancel still releases them (old ones are for fills).
+                    now, wall = clock.monotonic(), time.time()
+                    for c, b in raw.items():
+                        self._free[c] = float((b or {}).get("free") or 0.0)
+                        self._fetched_at[c] = now
+                        self._fetched_wall[c] = wall
+                    cutoff = time.time() - RESERVATION_MAX_AGE_S
+                    self._reserved = {k: v for k, v in self._reserved.items() if v[2] >= cutoff}
+                elif not self._free:
+                    return None
+
+        with self._lock:
+            return {c: self._free.get(c, 0.0) for c in currencies}
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._fetched_at.clear()
+
+    # ---------------- Local updates ---------------- #
+
+    def reserve(self, order_id: str, currency: str, amount: float) -> None:
+        with self._lock:
+            self._free[currency] = self._free.get(currency, 0.0) - amount
+            self._reserved[str(order_id)] = (currency, amount, time.time())
+
+    def release(self, order_ids: Sequence[str]) -> None:
+        with self._lock:
+            for oid in order_ids:
+                hit = self._reserved.pop(str(oid), None)
+                if hit:
+                    currency, amount, _ = hit
+                    self._free[currency] = self._free.get(currency, 0.0) + amount
+
+    def fill(self, order_id: str, base: str, quote: str, side: str, price: float, amount: float,
+             ts: Optional[float] = None) -> None:
+        """
+        Apply a (partial) fill: the reserved side is consumed, the other side is
+        credited — unless the fill (epoch ts) predates that side's last refresh,
+        which already counted it.
+        """
+        with self._lock:
+            hit = self._reserved.get(str(order_id))
+            if hit:
+                currency, reserved, reserved_at = hit
+                used = amount * price if side == "buy" else amount
+                left = reserved - used
+                if left > 1e-12:
+                    self._reserved[str(order_id)] = (currency, left, reserved_at)
+                else:
+                    self._reserved.pop(str(order_id), None)
+            credit = base if side == "buy" else quote
+            if ts is not None and ts <= self._fetched_wall.get(credit, 0.0):
+                return
+            if side == "buy":
+                self._free[base] = self._free.get(base, 0.0) + amount
+            else:
+                self._free[quote] = self._free.get(quote, 0.0) + amount * price
+
+
+def trim_to_inventory(orders: List[Tuple[int, float, float]], side: str, available: float,
+                      cushion: float = 0.01) -> List[Tuple[int, float, float]]:
+    """
+    Keep ladder levels (nearest first) while their cumulative cost fits in
+    `available` (quote for buys, base for sells); deeper levels are dropped.
+    orders: [(level, price, qty), ...]
+    """
+    budget = available * (1.0 - cushion)
+    kept = []
+    used = 0.0
+    for level, price, qty in orders:
+        cost = price * qty if side == "buy" else qty
+        if used + cost > budget:
+            break
+        used += cost
+        kept.append((level, price, qty))
+    return kept
@@ -1,6 +1,8 @@
-import os, time, hmac, hashlib, json, logging, requests
+import os, time, hmac, hashlib, json, logging, requests, threading
 from typing import List, Optional, Tuple
 
+from helpers.cancel_executor import CancelExecutor
+
 logger = logging.getLogger("adapters")
 logger.setLevel(logging.INFO)
 
@@ -12,14 +14,60 @@ class BatchCancelMixin:
 
     Automatically handles:
     - Batching order IDs into safe chunks
-    - Fallback to individual cancels if batch fails
+    - Fallback to concurrent individual cancels (with retries) if batch fails
     - Deduplication of order IDs
     - Logging of cancel operations
     """
 
     BATCH_SIZE = 50  # safe default for most APIs
+    CANCEL_CONCURRENCY = 20  # max single cancels in flight per venue (also sizes the HTTP pool)
+    CANCEL_MAX_ATTEMPTS = 3  # attempts per order before reporting it as still live
+
+    @property
+    def cancel_slots(self) -> threading.BoundedSemaphore:
+        """Single cancels in flight across all of this venue's symbol views and callers."""
+        s = self.__dict__.get("_cancel_slots")
+        if s is None:
+            s = self._cancel_slots = threading.BoundedSemaphore(self.CANCEL_CONCURRENCY)
+        return s
+
+    def _cancel_ok(self, resp) -> bool:
+        """Whether a cancel response means success (override per venue if needed)."""
+        if not isinstance(resp, dict):
+            return False
+        return resp.get("code") in (1000, "1000", 0) or resp.get("success") is True
+
+    def _cancel_individually(self, order_ids, cancel_one) -> List[str]:
+        """
+        Cancel orders one by one through a CancelExecutor.
+
+        cancel_one(order_id) -> bool is sent concurrently (CANCEL_CONCURRENCY in flight per venue)
+        and retried with backoff (CANCEL_MAX_ATTEMPTS). Returns IDs still live.
+        """
+        if self.dry_run or not order_ids:
+            return []
+
+        executor = CancelExecutor(
+            cancel_one,
+            max_concurrency=self.CANCEL_CONCURRENCY,
+            max_attempts=self.CANCEL_MAX_ATTEMPTS,
+            name=self.exchange_name,
+            slots=self.cancel_slots,
+        )
+        ids = self._cancel_priority(list(dict.fromkeys(str(oid) for oid in order_ids)))
+        live = executor.run(ids)
+        still_live = set(live)
+        self._on_cancelled([oid for oid in ids if oid not in still_live])
+
+        cancelled = len(ids) - len(live)
+        if cancelled > 0:
+            logger.info(f"{self.exchange_name} cancelled {cancelled} stale orders")
+        if live:
+            logger.warning(f"{self.exchange_name} {len(live)} orders still live after cancel: {live[:10]}")
+        return live
 
-    def _cancel_in_batches(self, order_ids: list, endpoint: str, payload_func, batch_size: int = None):
+    def _cancel_in_batches(self, order_ids: list, endpoint: str, payload_func, batch_size: int = None,
+                           cancel_one=None) -> List[str]:
         """
         Generic batch cancel helper.
 
@@ -29,19 +77,22 @@ class BatchCancelMixin:
             payload_func: callable(batch_ids) -> dict payload
                          Example: lambda batch: {"symbol": "OHO_USDT", "order_ids": batch}
             batch_size: optional override for BATCH_SIZE (useful for exchanges with lower limits)
+            cancel_one: optional callable(order_id) -> bool used for the fallback;
+                        defaults to a one-element batch on the same endpoint
 
         The method automatically:
         1. Deduplicates order IDs
         2. Splits into batches of batch_size (or BATCH_SIZE)
         3. Attempts batch cancel via endpoint
-        4. Falls back to individual cancels if batch fails
-        5. Logs total cancelled count
+        4. Sends IDs from rejected batches through the concurrent single-cancel executor
+        5. Returns the IDs that are still live
         """
         if self.dry_run or not order_ids:
-            return
+            return []
 
-        remaining = list({str(oid) for oid in order_ids})  # dedupe
+        remaining = self._cancel_priority(list(dict.fromkeys(str(oid) for oid in order_ids)))  # dedupe, nearest first
         cancelled = 0
+        failed: List[str] = []
         chunk_size = batch_size or self.BATCH_SIZE
 
         # ---- Batch cancel ----
@@ -50,20 +101,23 @@ class BatchCancelMixin:
             try:
                 payload = payload_func(batch)
                 resp = self._request("POST", endpoint, data=payload)
-                if resp.get("code") in (1000, "1000", 0):  # accept multiple success codes
+                if self._cancel_ok(resp):
                     cancelled += len(batch)
+                    self._on_cancelled(batch)
                 else:
                     raise RuntimeError(f"Batch cancel rejected: {resp}")
             except Exception as e:
                 logger.debug(f"{self.exchange_name} batch cancel failed: {e}, falling back to single cancels")
-                # fallback to individual cancels
-                for oid in batch:
-                    try:
-                        single_payload = payload_func([oid])
-                        self._request("POST", endpoint, data=single_payload)
-                        cancelled += 1
-                    except Exception:
-                        pass
+                failed.extend(batch)
 
         if cancelled > 0:
-            logger.info(f"{self.exchange_name} cancelled {cancelled} stale orders")
\ No newline at end of file
+            logger.info(f"{self.exchange_name} cancelled {cancelled} stale orders")
+
+        if not failed:
+            return []
+
+        if cancel_one is None:
+            def cancel_one(oid):
+                return self._cancel_ok(self._request("POST", endpoint, data=payload_func([oid])))
+
+        return self._cancel_individually(failed, cancel_one)
@@ -0,0 +1,74 @@
+# helpers/call_budget.py — HTTP request counts per venue and endpoint class
+#
+# Every request a venue's GuardedSession sends is counted here, keyed by its
+# endpoint class (market, balance, orders, place, cancel, fills) and path.
+# main takes the counts at the end of each venue cycle and logs them at DEBUG;
+# budget_check.py drives run_once against stubbed venues and compares the
+# counts with the budgets recorded in call_budgets.json.
+import re
+import threading
+from collections import Counter
+from typing import Dict, Tuple
+from urllib.parse import urlsplit
+
+# First match wins (lowercased path); public trades are market data, own trades are fills
+ENDPOINT_CLASSES = (
+    ("market", re.compile(r"/public/|/quotation/|/market/|/tickers?$")),
+    ("cancel", re.compile(r"cancel|delete")),
+    ("place", re.compile(r"create|submit|/order/new$|/spot/order$")),
+    ("fills", re.compile(r"trades|executed_history")),
+    ("balance", re.compile(r"balance|wallet|/account/list$|/private/user$")),
+    ("orders", re.compile(r"order")),
+)
+
+
+def endpoint_class(url: str) -> str:
+    path = urlsplit(url).path.lower()
+    for name, pattern in ENDPOINT_CLASSES:
+        if pattern.search(path):
+            return name
+    return "other"
+
+
+class CallCounter:
+    """Requests sent by one venue since the last take(), keyed by (endpoint class, "METHOD path")."""
+
+    def __init__(self, venue: str):
+        self.venue = venue
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, method: str, url: str) -> None:
+        key = (endpoint_class(url), f"{method.upper()} {urlsplit(url).path}")
+        with self._lock:
+            self._counts[key] += 1
+
+    def take(self) -> Dict[Tuple[str, str], int]:
+        """Counts since the previous take(); starts a new window."""
+        with self._lock:
+            counts, self._counts = dict(self._counts), Counter()
+        return counts
+
+
+def by_class(counts: Dict[Tuple[str, str], int]) -> Dict[str, int]:
+    out: Counter = Counter()
+    for (cls, _), n in counts.items():
+        out[cls] += n
+    return dict(out)
+
+
+def format_counts(counts: Dict[str, int]) -> str:
+    return " ".join(f"{k}={v}" for k, v in sorted(counts.items()))
+
+
+_counters: Dict[str, CallCounter] = {}
+_counters_lock = threading.Lock()
+
+
+def counter_for(venue: str) -> CallCounter:
+    """The venue's counter (shared by its sessions and symbol views, kept across config reloads)."""
+    with _counters_lock:
+        counter = _counters.get(venue)
+        if counter is None:
+            counter = _counters[venue] = CallCounter(venue)
+        return counter
@@ -0,0 +1,103 @@
+# helpers/cancel_executor.py — Concurrent single-order cancels with bounded retries
+import heapq
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Iterable, List, Optional
+
+logger = logging.getLogger("adapters")
+
+
+class CancelExecutor:
+    """
+    Sends individual cancels concurrently (up to max_concurrency in flight)
+    and re-schedules failures with exponential backoff without holding up
+    the other cancels. With slots (a semaphore shared by every executor of one
+    venue), a request is only sent while holding a slot, so concurrent runs
+    together stay within the venue's limit.
+
+    cancel_one(order_id) must return True when the venue confirms the order
+    is gone; False or an exception counts as a failed attempt.
+
+    run() returns the IDs that could NOT be confirmed cancelled (still live),
+    in the order they were given.
+    """
+
+    def __init__(
+            self,
+            cancel_one: Callable[[str], bool],
+            max_concurrency: int = 20,
+            max_attempts: int = 3,
+            backoff_s: float = 0.25,
+            backoff_max_s: float = 2.0,
+            name: str = "",
+            slots: Optional[threading.Semaphore] = None,
+    ):
+        self.cancel_one = cancel_one
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_s = backoff_s
+        self.backoff_max_s = backoff_max_s
+        self.name = name
+        self.slots = slots
+
+    def _attempt(self, oid: str):
+        try:
+            if self.slots is None:
+                return bool(self.cancel_one(oid)), None
+            with self.slots:
+                return bool(self.cancel_one(oid)), None
+        except Exception as e:
+            return False, e
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.backoff_max_s, self.backoff_s * (2 ** (attempt - 1)))
+        return delay * random.uniform(0.8, 1.2)
+
+    def run(self, order_ids: Iterable[str]) -> List[str]:
+        ids = list(dict.fromkeys(str(oid) for oid in order_ids))  # dedupe, keep order
+        if not ids:
+            return []
+
+        live = set(ids)
+        attempts = {oid: 0 for oid in ids}
+        queue = deque(ids)
+        retries = []   # heap of (due_monotonic, oid)
+        pending = {}   # future -> oid
+        workers = min(self.max_concurrency, len(ids))
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"cancel-{self.name}") as pool:
+            while queue or pending or retries:
+                now = time.monotonic()
+                while retries and retries[0][0] <= now:
+                    queue.append(heapq.heappop(retries)[1])
+
+                while queue and len(pending) < workers:
+                    oid = queue.popleft()
+                    attempts[oid] += 1
+                    pending[pool.submit(self._attempt, oid)] = oid
+
+                if not pending:
+                    # Only backed-off retries left — sleep until the next one is due
+                    time.sleep(max(0.0, retries[0][0] - time.monotonic()))
+                    continue
+
+                timeout = max(0.0, retries[0][0] - now) if retries else None
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+                for fut in done:
+                    oid = pending.pop(fut)
+                    ok, err = fut.result()
+                    if ok:
+                        live.discard(oid)
+                    elif attempts[oid] < self.max_attempts:
+                        heapq.heappush(retries, (time.monotonic() + self._backoff(attempts[oid]), oid))
+                    else:
+                        logger.warning(
+                            f"{self.name} cancel gave up on {oid} after {attempts[oid]} attempts"
+                            + (f": {err}" if err else ""))
+
+        return [oid for oid in ids if oid in live]
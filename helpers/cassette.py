@@ -0,0 +1,241 @@
+# helpers/cassette.py — Record / replay HTTP traffic for offline, deterministic runs
+#
+#   HTTP_CASSETTE_MODE=record HTTP_CASSETTE_DIR=cassettes/run1 python main.py
+#   HTTP_CASSETTE_MODE=replay HTTP_CASSETTE_DIR=cassettes/run1 python main.py
+#
+# Recording keeps every request/response of each venue session in
+# <dir>/<venue>.jsonl.gz (one JSON object per line; credentials, signatures,
+# nonces and timestamps redacted, request headers dropped) plus session.json
+# with the RNG seed and cycle count. Replay serves the responses back per
+# (method, path, non-volatile query) in recorded order, sleeping the recorded
+# latency × HTTP_CASSETTE_LATENCY (0 = no wait), and main re-runs the same
+# seed for the same number of cycles, fast-forwarding helpers.clock through
+# the requote deadlines and reference polls instead of waiting for them.
+# Calls made inside channel(name) (the reference polls) are keyed apart from
+# the same request made by a cycle, so neither can consume the other's
+# responses.
+# The order journal, audit log and fill ingestion are off in replay.
+import gzip
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger("oho_bot")
+
+MODE = os.getenv("HTTP_CASSETTE_MODE", "").lower()   # "", "record" or "replay"
+DIRECTORY = os.getenv("HTTP_CASSETTE_DIR", "cassettes")
+LATENCY_SCALE = float(os.getenv("HTTP_CASSETTE_LATENCY", "1.0"))
+
+REDACTED = "REDACTED"
+# Field names whose values are secret or change on every call
+SENSITIVE = ("key", "sign", "secret", "token", "memo", "passphrase", "password", "auth", "uid")
+VOLATILE = ("timestamp", "nonce", "recvwindow", "request_id", "requestid", "time", "ts")
+
+
+class CassetteMiss(requests.exceptions.ConnectionError):
+    """Replay has no (more) recorded responses for a request."""
+
+
+def _redact_name(name: str) -> bool:
+    n = name.lower().replace("-", "").replace("_", "")
+    return any(s in n for s in SENSITIVE) or n in VOLATILE
+
+
+def _redact_query(query: str) -> str:
+    pairs = parse_qsl(query, keep_blank_values=True)
+    return urlencode([(k, REDACTED if _redact_name(k) else v) for k, v in pairs])
+
+
+def _redact_json(obj):
+    if isinstance(obj, dict):
+        return {k: (REDACTED if _redact_name(k) else _redact_json(v)) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_redact_json(v) for v in obj]
+    return obj
+
+
+def _redact_body(body) -> Optional[str]:
+    if body is None:
+        return None
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", "replace")
+    try:
+        return json.dumps(_redact_json(json.loads(body)), separators=(",", ":"))
+    except ValueError:
+        return _redact_query(body) if "=" in body else REDACTED
+
+
+def redact_url(url: str) -> str:
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, _redact_query(parts.query), ""))
+
+
+def match_key(method: str, url: str) -> str:
+    """Requests match on method, path and query without secret/volatile params."""
+    parts = urlsplit(url)
+    stable = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _redact_name(k))
+    return f"{method.upper()} {parts.path}?{urlencode(stable)}"
+
+
+_local = threading.local()
+
+
+@contextmanager
+def channel(name: str):
+    """Record/replay this thread's requests under their own match keys."""
+    previous = getattr(_local, "channel", "")
+    _local.channel = name
+    try:
+        yield
+    finally:
+        _local.channel = previous
+
+
+def _channel_key(request) -> str:
+    key = match_key(request.method, request.url)
+    name = getattr(_local, "channel", "")
+    return f"[{name}] {key}" if name else key
+
+
+class Cassette:
+    """One venue's recorded interactions."""
+
+    def __init__(self, path: str, mode: str):
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._entries = []
+        self._queues: Dict[str, deque] = defaultdict(deque)
+        if mode == "replay":
+            with gzip.open(path, "rt", encoding="utf-8") as fh:
+                for line in fh:
+                    entry = json.loads(line)
+                    self._queues[entry["k"]].append(entry)
+            self.total = sum(len(q) for q in self._queues.values())
+
+    def record(self, request, response: requests.Response, latency_s: float) -> None:
+        entry = {
+            "k": _channel_key(request),
+            "m": request.method,
+            "u": redact_url(request.url),
+            "b": _redact_body(request.body),
+            "s": response.status_code,
+            "ct": response.headers.get("Content-Type", ""),
+            "c": response.content.decode("utf-8", "replace"),
+            "l": round(latency_s, 4),
+        }
+        with self._lock:
+            self._entries.append(entry)
+
+    def next(self, request) -> dict:
+        key = _channel_key(request)
+        with self._lock:
+            queue = self._queues.get(key)
+            if not queue:
+                raise CassetteMiss(f"no recorded response left for {key}")
+            return queue.popleft()
+
+    def remaining(self) -> int:
+        with self._lock:
+            return sum(len(q) for q in self._queues.values())
+
+    def save(self) -> None:
+        if self.mode != "record":
+            return
+        tmp = self.path + ".tmp"
+        with self._lock, gzip.open(tmp, "wt", encoding="utf-8") as fh:
+            for entry in self._entries:
+                fh.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        os.replace(tmp, self.path)
+
+
+class CassetteAdapter(HTTPAdapter):
+    """Transport that records real responses or serves recorded ones without touching the network."""
+
+    def __init__(self, cassette: Cassette, latency_scale: float = LATENCY_SCALE, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+        self.latency_scale = latency_scale
+
+    def send(self, request, **kwargs):
+        if self.cassette.mode == "record":
+            started = time.monotonic()
+            response = super().send(request, **kwargs)
+            self.cassette.record(request, response, time.monotonic() - started)
+            return response
+
+        entry = self.cassette.next(request)
+        if self.latency_scale > 0:
+            time.sleep(entry["l"] * self.latency_scale)
+        response = requests.Response()
+        response.status_code = entry["s"]
+        response._content = entry["c"].encode("utf-8")
+        response.headers = CaseInsensitiveDict({"Content-Type": entry["ct"]} if entry["ct"] else {})
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        response.reason = "REPLAYED"
+        return response
+
+
+# ---------------- Session-wide state ---------------- #
+
+_cassettes: Dict[str, Cassette] = {}
+_registry_lock = threading.Lock()
+
+
+def active() -> bool:
+    return MODE in ("record", "replay")
+
+
+def cassette_for(venue: str) -> Optional[Cassette]:
+    """The venue's cassette when recording/replaying, else None."""
+    if not active():
+        return None
+    with _registry_lock:
+        cassette = _cassettes.get(venue)
+        if cassette is None:
+            os.makedirs(DIRECTORY, exist_ok=True)
+            cassette = _cassettes[venue] = Cassette(os.path.join(DIRECTORY, f"{venue}.jsonl.gz"), MODE)
+        return cassette
+
+
+def begin_session() -> Optional[dict]:
+    """Seed the RNG (recorded seed on replay) and return the session header, or None when inactive."""
+    if not active():
+        return None
+    path = os.path.join(DIRECTORY, "session.json")
+    if MODE == "replay":
+        with open(path, encoding="utf-8") as fh:
+            session = json.load(fh)
+        logger.info(f"Replaying HTTP cassettes from {DIRECTORY} ({session['cycles']} cycles, "
+                    f"latency ×{LATENCY_SCALE:g})")
+    else:
+        session = {"seed": random.randrange(2 ** 32), "cycles": 0}
+        logger.info(f"Recording HTTP cassettes to {DIRECTORY}")
+    random.seed(session["seed"])
+    return session
+
+
+def end_session(session: Optional[dict], cycles: int) -> None:
+    if session is None:
+        return
+    for venue, cassette in _cassettes.items():
+        if MODE == "replay" and cassette.remaining():
+            logger.info(f"{venue}: {cassette.remaining()} recorded responses not replayed")
+        cassette.save()
+    if MODE == "record":
+        session["cycles"] = cycles
+        with open(os.path.join(DIRECTORY, "session.json"), "w", encoding="utf-8") as fh:
+            json.dump(session, fh)
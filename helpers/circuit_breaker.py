@@ -0,0 +1,113 @@
+# helpers/circuit_breaker.py — Per-venue / per-endpoint circuit breakers for the HTTP sessions
+import logging
+import threading
+from typing import Dict
+from urllib.parse import urlsplit
+
+from helpers import clock
+
+logger = logging.getLogger("oho_bot")
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+FAILURE_THRESHOLD = 3         # consecutive failures that open an endpoint
+VENUE_FAILURE_THRESHOLD = 5   # consecutive failures on any endpoint that open the whole venue
+SLOW_CALL_S = 5.0             # a call slower than this counts as a failure (latency spike)
+RESET_TIMEOUT_S = 15.0        # first open period, doubled after each failed probe
+RESET_TIMEOUT_MAX_S = 120.0
+
+
+class CircuitBreaker:
+    """
+    closed → (threshold consecutive failures) → open → (reset timeout) →
+    half-open: exactly one probe call goes through; success closes the
+    breaker, failure re-opens it with a doubled timeout.
+    """
+
+    def __init__(self, name: str, threshold: int = FAILURE_THRESHOLD, reset_timeout_s: float = RESET_TIMEOUT_S):
+        self.name = name
+        self.threshold = threshold
+        self.base_reset_s = reset_timeout_s
+        self.reset_s = reset_timeout_s
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def retry_in(self) -> float:
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_s - clock.monotonic())
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if clock.monotonic() - self.opened_at < self.reset_s:
+                    return False
+                self.state = HALF_OPEN
+                self._probing = False
+            if self._probing:
+                return False  # one probe at a time
+            self._probing = True
+            return True
+
+    def record(self, ok: bool) -> None:
+        with self._lock:
+            if ok:
+                if self.state != CLOSED:
+                    logger.info(f"circuit {self.name} closed")
+                self.state = CLOSED
+                self.failures = 0
+                self.reset_s = self.base_reset_s
+                self._probing = False
+                return
+
+            self.failures += 1
+            if self.state == HALF_OPEN:
+                self.reset_s = min(RESET_TIMEOUT_MAX_S, self.reset_s * 2)
+            elif self.failures < self.threshold:
+                return
+            if self.state != OPEN:
+                logger.warning(f"circuit {self.name} open for {self.reset_s:.0f}s "
+                               f"after {self.failures} consecutive failures")
+            self.state = OPEN
+            self.opened_at = clock.monotonic()
+            self._probing = False
+
+    def release(self) -> None:
+        """Free the half-open slot taken by allow() for a call that was never sent."""
+        with self._lock:
+            self._probing = False
+
+
+class BreakerBoard:
+    """All breakers for one venue: one for the venue, one per endpoint (method + path)."""
+
+    def __init__(self, venue: str, slow_call_s: float = SLOW_CALL_S):
+        self.venue = venue
+        self.slow_call_s = slow_call_s
+        self.venue_breaker = CircuitBreaker(venue, VENUE_FAILURE_THRESHOLD)
+        self.endpoints: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def endpoint(self, method: str, url: str) -> CircuitBreaker:
+        key = f"{method.upper()} {urlsplit(url).path}"
+        with self._lock:
+            breaker = self.endpoints.get(key)
+            if breaker is None:
+                breaker = self.endpoints[key] = CircuitBreaker(f"{self.venue} {key}")
+            return breaker
+
+    def is_open(self) -> bool:
+        """Whole venue down and not yet due for a probe — skip its cycle outright."""
+        return self.venue_breaker.retry_in() > 0
+
+    def retry_in(self) -> float:
+        return self.venue_breaker.retry_in()
+
+    def summary(self) -> str:
+        tripped = [b for b in (self.venue_breaker, *self.endpoints.values()) if b.state != CLOSED]
+        return " ".join(f"{b.name}={b.state}" for b in tripped)
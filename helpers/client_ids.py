@@ -0,0 +1,97 @@
+# helpers/client_ids.py — Collision-free client order IDs and safe placement retries
+#
+# A placement that times out may or may not have reached the book. Every
+# order therefore carries a client ID that is unique per venue (process start
+# time + pid + sequence, so it never repeats within a burst, across threads or
+# across restarts). When the response is lost, the order is looked up by that
+# ID before anything is resent, and a resend reuses the same ID so venues
+# that dedupe on it can never open a second order.
+#
+#   PLACE_ATTEMPTS=2          sends per order (1 = never resend after a timeout)
+import itertools
+import logging
+import os
+import string
+import threading
+import time
+from typing import Callable, Optional
+
+import requests
+
+from helpers.http import CircuitOpenError
+
+logger = logging.getLogger("oho_bot")
+
+PLACE_ATTEMPTS = int(os.getenv("PLACE_ATTEMPTS", "2"))
+
+_B36 = string.digits + string.ascii_lowercase
+
+
+def _base36(n: int) -> str:
+    out = ""
+    while True:
+        n, r = divmod(n, 36)
+        out = _B36[r] + out
+        if not n:
+            return out
+
+
+class ClientIdGenerator:
+    """
+    IDs for one venue. `numeric` venues get digits only, others
+    prefix + base36 — both fit in `max_len` characters.
+    """
+
+    def __init__(self, prefix: str = "oho", max_len: int = 32, numeric: bool = False):
+        self.prefix = "" if numeric else prefix
+        self.max_len = max_len
+        self.numeric = numeric
+        self._seq = itertools.count(1)
+        self._lock = threading.Lock()
+        start_ms = int(time.time() * 1000)
+        pid = os.getpid()
+        if numeric:
+            self._session = f"{start_ms}{pid % 100000:05d}"
+        else:
+            self._session = f"{_base36(start_ms)}{_base36(pid % 36 ** 4):0>4}"
+
+    def next(self) -> str:
+        with self._lock:
+            seq = next(self._seq)
+        cid = f"{self.prefix}{self._session}{seq if self.numeric else _base36(seq)}"
+        if len(cid) > self.max_len:
+            raise ValueError(f"client order id {cid!r} exceeds {self.max_len} chars")
+        return cid
+
+
+def place_idempotent(adapter, client_id: str, send: Callable[[], Optional[str]],
+                     attempts: int = PLACE_ATTEMPTS) -> Optional[str]:
+    """
+    Run send() (which posts the order carrying client_id and returns its
+    order ID or None on a clear rejection). When the outcome is unknown — read
+    timeout or dropped connection after the request went out — the order is
+    looked up with adapter.find_order_by_client_id before resending. Venues
+    without a lookup are never resent: a possible orphan is swept by the next
+    cycle's cleanup, a duplicate would be extra exposure.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return send()
+        except (requests.exceptions.ConnectTimeout, CircuitOpenError):
+            raise  # never sent
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            if attempt == attempts:
+                raise
+            try:
+                oid = adapter.find_order_by_client_id(client_id)
+            except NotImplementedError:
+                raise e from None
+            except Exception as lookup_error:
+                logger.warning(f"{adapter.exchange_name} lookup of {client_id} failed after "
+                               f"placement error ({lookup_error}); not resending")
+                raise e from None
+            if oid:
+                logger.info(f"{adapter.exchange_name} order {client_id} landed despite {type(e).__name__} id={oid}")
+                return oid
+            logger.info(f"{adapter.exchange_name} order {client_id} not found after {type(e).__name__}; resending")
+    return None
@@ -0,0 +1,22 @@
+# helpers/clock.py — Monotonic clock for deadlines and TTLs that replay can fast-forward
+#
+# Live and record runs read plain time.monotonic(). A cassette replay skips the
+# waits between requote deadlines and reference polls by advancing this clock
+# instead, so the scheduler, market-data / balance TTLs and circuit breakers
+# see the same elapsed time they saw when the session was recorded.
+import threading
+import time
+
+_lock = threading.Lock()
+_offset = 0.0
+
+
+def monotonic() -> float:
+    return time.monotonic() + _offset
+
+
+def advance_to(t: float) -> None:
+    """Jump forward to monotonic time t (never backwards)."""
+    global _offset
+    with _lock:
+        _offset += max(0.0, t - (time.monotonic() + _offset))
@@ -0,0 +1,168 @@
+# helpers/config_watch.py — Validated hot reload of BotSettings / ExchangeConfig from a JSON file
+#
+# The file overlays the defaults in config.py; keys left out keep their code
+# value, so deleting a key reverts it:
+#
+#   {
+#     "settings":  {"depth_min": 8, "interval_max_s": 12},
+#     "exchanges": [{"id": "tapbit", "enabled": false},
+#                   {"id": "bitmart", "symbols": ["OHO/USDC"]}]
+#   }
+#
+# Entries in "exchanges" are merged by id onto the code config; an unknown id
+# adds a venue (symbol and btc_symbol required).
+import copy
+import json
+import logging
+import os
+from dataclasses import fields, replace
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config import BotSettings, ExchangeConfig
+
+logger = logging.getLogger("oho_bot")
+
+_NUMBER = (int, float)
+
+
+class ConfigError(ValueError):
+    pass
+
+
+def _check_type(owner: str, name: str, value, ftype) -> None:
+    if ftype is bool:
+        ok = isinstance(value, bool)
+    elif ftype is int:
+        ok = isinstance(value, int) and not isinstance(value, bool)
+    elif ftype is float:
+        ok = isinstance(value, _NUMBER) and not isinstance(value, bool)
+    elif ftype is str:
+        ok = isinstance(value, str)
+    elif ftype == Optional[str]:
+        ok = value is None or isinstance(value, str)
+    elif ftype == List[str]:
+        ok = isinstance(value, list) and all(isinstance(v, str) for v in value)
+    else:
+        ok = True
+    if not ok:
+        raise ConfigError(f"{owner}.{name}: bad value {value!r}")
+
+
+def _overlay(owner: str, base, values: dict):
+    if not isinstance(values, dict):
+        raise ConfigError(f"{owner}: expected an object")
+    known = {f.name: f.type for f in fields(base)}
+    for name, value in values.items():
+        if name not in known:
+            raise ConfigError(f"{owner}: unknown field '{name}'")
+        _check_type(owner, name, value, known[name])
+    values = {k: (float(v) if known[k] is float else v) for k, v in values.items()}
+    return replace(base, **values)
+
+
+def validate_settings(s: BotSettings) -> None:
+    for lo, hi in (("gap_min", "gap_max"), ("depth_min", "depth_max"), ("size_min", "size_max"),
+                   ("interval_min_s", "interval_max_s")):
+        if getattr(s, lo) <= 0 or getattr(s, hi) < getattr(s, lo):
+            raise ConfigError(f"settings: need 0 < {lo} <= {hi}")
+    if s.reference_multiplier <= 0:
+        raise ConfigError("settings: reference_multiplier must be > 0")
+    for name in ("maker_guard_ticks", "requote_trigger_ticks", "requote_min_move_ticks",
+                 "requote_max_idle_s", "reference_poll_s"):
+        if getattr(s, name) < 0:
+            raise ConfigError(f"settings: {name} must be >= 0")
+    if s.requote_stretch < 1:
+        raise ConfigError("settings: requote_stretch must be >= 1")
+
+
+def load_config(path: str, base_settings: BotSettings, base_exchanges: Sequence[ExchangeConfig],
+                known_venues: Sequence[str] = ()) -> Tuple[BotSettings, List[ExchangeConfig]]:
+    """Parse and validate `path` on top of the code defaults; raises ConfigError."""
+    try:
+        with open(path, encoding="utf-8") as fh:
+            raw = json.load(fh)
+    except (OSError, ValueError) as e:
+        raise ConfigError(f"cannot read {path}: {e}") from e
+    if not isinstance(raw, dict):
+        raise ConfigError("top level must be an object")
+    unknown = set(raw) - {"settings", "exchanges"}
+    if unknown:
+        raise ConfigError(f"unknown section(s): {', '.join(sorted(unknown))}")
+
+    settings = _overlay("settings", base_settings, raw.get("settings", {}))
+    validate_settings(settings)
+
+    exchanges = [copy.deepcopy(c) for c in base_exchanges]
+    by_id = {c.id: i for i, c in enumerate(exchanges)}
+    entries = raw.get("exchanges", [])
+    if not isinstance(entries, list):
+        raise ConfigError("exchanges: expected a list")
+    for entry in entries:
+        if not isinstance(entry, dict) or not isinstance(entry.get("id"), str):
+            raise ConfigError(f"exchanges: every entry needs an 'id' ({entry!r})")
+        xid = entry["id"]
+        if xid in by_id:
+            exchanges[by_id[xid]] = _overlay(f"exchanges[{xid}]", exchanges[by_id[xid]], entry)
+            continue
+        if known_venues and xid not in known_venues:
+            raise ConfigError(f"exchanges[{xid}]: no adapter registered for '{xid}'")
+        if not entry.get("symbol") or not entry.get("btc_symbol"):
+            raise ConfigError(f"exchanges[{xid}]: new venues need symbol and btc_symbol")
+        base = ExchangeConfig(id=xid, symbol=entry["symbol"], btc_symbol=entry["btc_symbol"])
+        by_id[xid] = len(exchanges)
+        exchanges.append(_overlay(f"exchanges[{xid}]", base, entry))
+
+    return settings, exchanges
+
+
+def diff_exchanges(old: Sequence[ExchangeConfig], new: Sequence[ExchangeConfig]
+                   ) -> Tuple[List[ExchangeConfig], List[ExchangeConfig], List[Tuple[ExchangeConfig, ExchangeConfig]]]:
+    """(started, stopped, changed) enabled venues between two configs."""
+    before: Dict[str, ExchangeConfig] = {c.id: c for c in old if c.enabled}
+    after: Dict[str, ExchangeConfig] = {c.id: c for c in new if c.enabled}
+    started = [c for xid, c in after.items() if xid not in before]
+    stopped = [c for xid, c in before.items() if xid not in after]
+    changed = [(before[xid], c) for xid, c in after.items() if xid in before and before[xid] != c]
+    return started, stopped, changed
+
+
+class ConfigWatcher:
+    """
+    Watches a JSON overlay file (mtime/size) and hands back a validated
+    (settings, exchanges) pair when it changes. An invalid file is reported
+    once and ignored — the running config stays in force.
+    """
+
+    def __init__(self, path: str, base_settings: BotSettings, base_exchanges: Sequence[ExchangeConfig],
+                 known_venues: Sequence[str] = ()):
+        self.path = path
+        # Snapshot the code defaults so every reload starts from the same base
+        self.base_settings = replace(base_settings)
+        self.base_exchanges = [copy.deepcopy(c) for c in base_exchanges]
+        self.known_venues = tuple(known_venues)
+        self._stamp = None
+
+    def _current_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def poll(self) -> Optional[Tuple[BotSettings, List[ExchangeConfig]]]:
+        stamp = self._current_stamp()
+        if stamp is None or stamp == self._stamp:
+            return None  # missing or unchanged file keeps the running config
+        self._stamp = stamp
+        try:
+            return load_config(self.path, self.base_settings, self.base_exchanges, self.known_venues)
+        except ConfigError as e:
+            logger.warning(f"config reload rejected ({e}) — keeping the running config")
+            return None
+
+
+def apply_settings(target: BotSettings, new: BotSettings) -> List[str]:
+    """Swap every field of `target` in one step (other modules hold a reference to it). Returns changed names."""
+    changed = [f.name for f in fields(new) if getattr(target, f.name) != getattr(new, f.name)]
+    target.__dict__.update({f.name: getattr(new, f.name) for f in fields(new)})
+    return changed
@@ -0,0 +1,192 @@
+# helpers/decode.py — Typed decoding of venue market-data payloads
+#
+# Responses are decoded straight from the raw bytes with orjson when it is
+# installed (stdlib json otherwise) into small typed tuples, instead of full
+# dict trees walked with chained .get() calls. For all-market list payloads
+# only the objects for the wanted symbols are located and decoded; the scan
+# stops as soon as every wanted symbol has been found.
+import json
+from typing import Dict, Iterable, NamedTuple, Optional
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+
+def loads(raw):
+    """Decode JSON bytes/str (orjson when available)."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+class Ticker(NamedTuple):
+    symbol: str
+    bid: Optional[float]
+    ask: Optional[float]
+    last: Optional[float]
+
+
+def _num(v) -> Optional[float]:
+    if v is None or v == "":
+        return None
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+# ---------------- Partial scanning ---------------- #
+
+_OPEN_CLOSE = {ord("{"): ord("}"), ord("["): ord("]")}
+
+
+def _extract(raw: bytes, start: int) -> Optional[bytes]:
+    """The JSON object/array starting at raw[start], matched by depth (string-aware)."""
+    open_ch = raw[start]
+    close_ch = _OPEN_CLOSE.get(open_ch)
+    if close_ch is None:
+        return None
+    depth = 0
+    in_str = False
+    i = start
+    n = len(raw)
+    while i < n:
+        c = raw[i]
+        if in_str:
+            if c == 0x5C:      # backslash: skip the escaped byte
+                i += 1
+            elif c == 0x22:    # closing quote
+                in_str = False
+        elif c == 0x22:
+            in_str = True
+        elif c == open_ch:
+            depth += 1
+        elif c == close_ch:
+            depth -= 1
+            if depth == 0:
+                return raw[start:i + 1]
+        i += 1
+    return None
+
+
+def scan_objects(raw: bytes, key: Optional[str], wanted: Iterable[str], container: str = "{"
+                 ) -> Optional[Dict[str, object]]:
+    """
+    Find and decode only the list elements for `wanted` symbols.
+
+    key: the symbol field name ("symbol" → matches "symbol":"X"), or None when
+         the symbol is the first element of an array row / the key of an object
+    container: "{" or "[" — the element type holding the symbol
+
+    Returns {symbol: decoded element}, or None if the payload's layout isn't
+    recognised (callers then fall back to a full parse).
+    """
+    found: Dict[str, object] = {}
+    for sym in wanted:
+        name = json.dumps(sym).encode()
+        if key is not None:
+            needles = (f'"{key}":'.encode() + name, f'"{key}": '.encode() + name)
+        elif container == "[":
+            needles = (b"[" + name + b",", b"[" + name + b", ")
+        else:
+            needles = (name + b":{", name + b": {")
+        pos = -1
+        for needle in needles:
+            pos = raw.find(needle)
+            if pos != -1:
+                break
+        if pos == -1:
+            if raw.find(name) != -1:
+                return None  # present in an unexpected shape
+            continue  # not listed
+
+        if key is None and container == "{":
+            start = raw.find(b"{", pos + len(name))
+        else:
+            start = raw.rfind(container.encode(), 0, pos + 1)
+        chunk = _extract(raw, start) if start != -1 else None
+        if chunk is None:
+            return None
+        try:
+            obj = loads(chunk)
+        except ValueError:
+            return None
+        if key is not None and (not isinstance(obj, dict) or obj.get(key) != sym) or \
+                key is None and container == "[" and (not obj or obj[0] != sym):
+            return None
+        found[sym] = obj
+    return found
+
+
+# ---------------- Per-endpoint decoders ---------------- #
+
+def bitmart_ticker(raw: bytes) -> Optional[Ticker]:
+    """GET /spot/quotation/v3/ticker → {"code":1000,"data":{"symbol","last","bid_px","ask_px",...}}"""
+    r = loads(raw)
+    if r.get("code") != 1000:
+        return None
+    d = r["data"]
+    return Ticker(d.get("symbol", ""), _num(d.get("bid_px")), _num(d.get("ask_px")), _num(d.get("last")))
+
+
+def bitmart_tickers(raw: bytes, symbols: Iterable[str]) -> Dict[str, Ticker]:
+    """GET /spot/quotation/v3/tickers → rows [symbol, last, ..., bid_px(8), bid_sz, ask_px(10), ...]"""
+    symbols = list(symbols)
+    rows = scan_objects(raw, None, symbols, container="[")
+    if rows is None:
+        r = loads(raw)
+        wanted = set(symbols)
+        rows = {row[0]: row for row in r.get("data", []) if row and row[0] in wanted}
+    return {s: Ticker(s, _num(row[8]), _num(row[10]), _num(row[1])) for s, row in rows.items()}
+
+
+def biconomy_tickers(raw: bytes, symbols: Iterable[str]) -> Dict[str, Ticker]:
+    """GET /api/v1/tickers → {"ticker":[{"symbol","buy","sell","last",...}, ...]} (every market)"""
+    symbols = list(symbols)
+    objs = scan_objects(raw, "symbol", symbols)
+    if objs is None:
+        wanted = set(symbols)
+        objs = {t.get("symbol"): t for t in loads(raw).get("ticker", []) if t.get("symbol") in wanted}
+    return {s: Ticker(s, _num(t.get("buy")), _num(t.get("sell")), _num(t.get("last"))) for s, t in objs.items()}
+
+
+def p2b_ticker(raw: bytes, symbol: str) -> Optional[Ticker]:
+    """GET /api/v2/public/ticker → {"result":{"bid","ask","last",...}} (older layout nests under "ticker")"""
+    result = loads(raw).get("result") or {}
+    if isinstance(result.get("ticker"), dict):
+        result = result["ticker"]
+    if not result:
+        return None
+    return Ticker(symbol, _num(result.get("bid")), _num(result.get("ask")), _num(result.get("last")))
+
+
+def p2b_tickers(raw: bytes, symbols: Iterable[str]) -> Dict[str, Ticker]:
+    """GET /api/v2/public/tickers → {"result":{market: {"ticker": {...}}}}"""
+    symbols = list(symbols)
+    objs = scan_objects(raw, None, symbols)
+    if objs is None:
+        result = loads(raw).get("result") or {}
+        objs = {s: result[s] for s in symbols if s in result}
+    out = {}
+    for s, o in objs.items():
+        t = (o or {}).get("ticker") or {}
+        if "bid" in t and "ask" in t:
+            out[s] = Ticker(s, _num(t["bid"]), _num(t["ask"]), _num(t.get("last")))
+    return out
+
+
+def tapbit_ticker(raw: bytes, symbol: str) -> Optional[Ticker]:
+    """GET /api/v1/spot/market/ticker → {"code":0,"data":{"bid","ask","last",...}}"""
+    r = loads(raw)
+    if r.get("code") != 0:
+        return None
+    d = r["data"]
+    return Ticker(symbol, _num(d.get("bid")), _num(d.get("ask")), _num(d.get("last")))
+
+
+def dextrade_ticker(raw: bytes, symbol: str) -> Ticker:
+    """GET /v1/public/ticker → {"last","bid_price","ask_price",...}"""
+    d = loads(raw)
+    return Ticker(symbol, _num(d.get("bid_price")), _num(d.get("ask_price")), _num(d.get("last")))
@@ -0,0 +1,210 @@
+# helpers/fills.py — Incremental fill (own trade history) ingestion
+#
+#   fills/<venue>.jsonl      one fill per line, append-only, deduplicated by trade id
+#   fills/<venue>.cursor     {symbol: cursor} — where the next poll resumes
+#
+#   FILLS_DIR=fills          set "" to disable
+#   FILLS_POLL_S=30          seconds between polls per venue
+#
+# Adapters implement fetch_fills_since(cursor) → (fills, next_cursor): one page
+# of fills newer than cursor, oldest first (cursor None = start of the backfill
+# window). The ingester pages forward until the cursor stops moving, so after
+# the first backfill each poll only moves the fills made since the previous one. Pages may overlap at the cursor
+# boundary (venues with second/millisecond time filters); the trade ids of
+# recent fills are kept to drop those repeats.
+import json
+import logging
+import os
+import threading
+from collections import deque
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from adapters.base import BaseAdapter
+
+logger = logging.getLogger("oho_bot")
+
+FILLS_DIR = os.getenv("FILLS_DIR", "fills")
+FILLS_POLL_S = float(os.getenv("FILLS_POLL_S", "30"))
+
+FILLS_BACKFILL_S = float(os.getenv("FILLS_BACKFILL_S", str(7 * 86400)))  # history fetched on first run
+
+MAX_PAGES_PER_POLL = 50   # a long backfill continues on the next poll
+SEEN_IDS = 20_000         # recent trade ids remembered per venue for dedupe
+
+
+class Fill(NamedTuple):
+    trade_id: str
+    order_id: str
+    symbol: str
+    side: str        # "buy" / "sell"
+    price: float
+    qty: float
+    fee: float
+    fee_ccy: str
+    ts: float        # epoch seconds
+
+
+def load_fills(directory: str, venue: str) -> List[Fill]:
+    """Every stored fill of one venue, in file order (torn lines skipped)."""
+    path = os.path.join(directory, f"{venue}.jsonl")
+    out = []
+    if not os.path.exists(path):
+        return out
+    with open(path, "rb") as fh:
+        for raw in fh:
+            try:
+                out.append(Fill(**json.loads(raw)))
+            except (ValueError, TypeError):
+                continue
+    return out
+
+
+class FillStore:
+    """Append-only fills file plus per-symbol cursors for one venue."""
+
+    def __init__(self, directory: str, venue: str):
+        os.makedirs(directory, exist_ok=True)
+        self.venue = venue
+        self.path = os.path.join(directory, f"{venue}.jsonl")
+        self.cursor_path = os.path.join(directory, f"{venue}.cursor")
+        self.cursors: Dict[str, Optional[str]] = {}
+        self._seen = set()
+        self._order = deque()
+        self.count = 0
+
+        if os.path.exists(self.cursor_path):
+            with open(self.cursor_path, encoding="utf-8") as fh:
+                self.cursors = json.load(fh)
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as fh:
+                for raw in fh:
+                    try:
+                        self._remember(json.loads(raw)["trade_id"])
+                        self.count += 1
+                    except (ValueError, KeyError):
+                        continue  # torn last line after a crash
+        self._fh = open(self.path, "ab")
+
+    def _remember(self, trade_id: str) -> None:
+        self._seen.add(trade_id)
+        self._order.append(trade_id)
+        if len(self._order) > SEEN_IDS:
+            self._seen.discard(self._order.popleft())
+
+    def append(self, fills: Iterable[Fill]) -> List[Fill]:
+        """Persist the fills not seen before; returns them."""
+        new = []
+        for f in fills:
+            if f.trade_id in self._seen:
+                continue
+            self._remember(f.trade_id)
+            self._fh.write(json.dumps(f._asdict(), separators=(",", ":")).encode() + b"\n")
+            new.append(f)
+        if new:
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self.count += len(new)
+        return new
+
+    def save_cursor(self, symbol: str, cursor: Optional[str]) -> None:
+        # Written after the fills it covers, so a crash in between only re-reads a page
+        self.cursors[symbol] = cursor
+        tmp = self.cursor_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(self.cursors, fh)
+        os.replace(tmp, self.cursor_path)
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+class FillIngester:
+    """
+    Background thread polling every attached venue's fills, market by market
+    (each symbol view has its own cursor, and a failing market doesn't hold up
+    the others). Venues whose adapter doesn't implement fetch_fills_since are
+    skipped (logged once). Listeners get each batch of newly stored fills:
+    callback(venue, fills).
+    """
+
+    def __init__(self, directory: str = FILLS_DIR, poll_s: float = FILLS_POLL_S):
+        self.directory = directory
+        self.poll_s = poll_s
+        self.listeners: List[Callable[[str, List[Fill]], None]] = []
+        self._venues: Dict[str, tuple] = {}  # venue -> (adapter, store)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, adapter) -> None:
+        with self._lock:
+            if adapter.exchange_name in self._venues:
+                return
+            if type(adapter).fetch_fills_since is BaseAdapter.fetch_fills_since:
+                logger.info(f"{adapter.exchange_name}: no fill history endpoint — fills not ingested")
+                return
+            self._venues[adapter.exchange_name] = (adapter, FillStore(self.directory, adapter.exchange_name))
+
+    def remove(self, venue: str) -> None:
+        with self._lock:
+            entry = self._venues.pop(venue, None)
+        if entry is not None:
+            entry[1].close()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="fills", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        with self._lock:
+            for _, store in self._venues.values():
+                store.close()
+            self._venues.clear()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            with self._lock:
+                venues = list(self._venues.items())
+            for venue, (adapter, store) in venues:
+                if self._stop.is_set():
+                    break
+                try:
+                    self.poll(adapter, store)
+                except Exception as e:
+                    logger.warning(f"{venue}: fill ingestion failed ({e})")
+            self._stop.wait(self.poll_s)
+
+    def poll(self, adapter, store: FillStore) -> int:
+        """Page every market of one venue forward from its stored cursor. Returns fills stored."""
+        stored = 0
+        for view in adapter.symbol_views():
+            try:
+                stored += self._poll_market(adapter.exchange_name, view, store)
+            except Exception as e:
+                logger.warning(f"{adapter.exchange_name}:{view.symbol}: fill ingestion failed ({e})")
+        if stored:
+            logger.info(f"{adapter.exchange_name}: ingested {stored} new fill(s) ({store.count} stored)")
+        return stored
+
+    def _poll_market(self, venue: str, view, store: FillStore) -> int:
+        stored = 0
+        cursor = store.cursors.get(view.symbol)
+        for _ in range(MAX_PAGES_PER_POLL):
+            fills, next_cursor = view.fetch_fills_since(cursor)
+            new = store.append(fills)
+            if new:
+                stored += len(new)
+                for callback in self.listeners:
+                    try:
+                        callback(venue, new)
+                    except Exception as e:
+                        logger.warning(f"fill listener failed: {e}")
+            if next_cursor == cursor:
+                break
+            store.save_cursor(view.symbol, next_cursor)
+            cursor = next_cursor
+        return stored
@@ -0,0 +1,77 @@
+# helpers/http.py — Pooled requests sessions shared by the adapters
+import time
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from helpers.call_budget import counter_for
+from helpers.cassette import CassetteAdapter, cassette_for
+from helpers.circuit_breaker import BreakerBoard
+
+DEFAULT_POOL_SIZE = 20
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of sending a request while its breaker is open."""
+
+
+class GuardedSession(requests.Session):
+    """
+    requests.Session that routes every call through the venue's breakers:
+    an open breaker raises CircuitOpenError immediately instead of waiting
+    out a 10-15s timeout. Transport errors, 5xx/429 and calls slower than
+    slow_call_s count as failures; other 4xx are the caller's problem.
+    Requests actually sent are counted per endpoint class (call_budget).
+    """
+
+    def __init__(self, breakers: BreakerBoard):
+        super().__init__()
+        self.breakers = breakers
+        self.calls = counter_for(breakers.venue)
+
+    def request(self, method, url, *args, **kwargs):
+        venue = self.breakers.venue_breaker
+        endpoint = self.breakers.endpoint(method, url)
+        if not venue.allow():
+            raise CircuitOpenError(f"{venue.name} circuit open (retry in {venue.retry_in():.0f}s)")
+        if not endpoint.allow():
+            venue.release()
+            raise CircuitOpenError(f"{endpoint.name} circuit open (retry in {endpoint.retry_in():.0f}s)")
+
+        self.calls.record(method, url)
+        started = time.monotonic()
+        try:
+            resp = super().request(method, url, *args, **kwargs)
+        except requests.exceptions.RequestException:
+            endpoint.record(False)
+            venue.record(False)
+            raise
+        except BaseException:
+            endpoint.release()
+            venue.release()
+            raise
+
+        ok = resp.status_code < 500 and resp.status_code != 429 and \
+            time.monotonic() - started < self.breakers.slow_call_s
+        endpoint.record(ok)
+        venue.record(ok)
+        return resp
+
+
+def new_session(pool_size: int = DEFAULT_POOL_SIZE, breakers: Optional[BreakerBoard] = None) -> requests.Session:
+    """
+    requests.Session with a connection pool large enough for concurrent
+    cancels/placements (requests' default keeps only 10 connections per host).
+    With `breakers`, every call goes through the venue's circuit breakers and,
+    when HTTP_CASSETTE_MODE is set, is recorded to / replayed from its cassette.
+    """
+    session = GuardedSession(breakers) if breakers is not None else requests.Session()
+    cassette = cassette_for(breakers.venue) if breakers is not None else None
+    if cassette is not None:
+        adapter = CassetteAdapter(cassette, pool_connections=4, pool_maxsize=pool_size)
+    else:
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
@@ -0,0 +1,182 @@
+# helpers/md_bus.py — Shared-memory market-data bus for co-located bot processes
+#
+# One sidecar process (md_sidecar.py) polls reference and top-of-book data and
+# publishes it into a fixed-layout multiprocessing.shared_memory segment. Bot
+# processes attach read-only and read slots lock-free with a per-slot seqlock:
+#
+#   header: magic(4s) version(H) slots(H) pad(8x)                       16 bytes
+#   slot:   seq(Q) key(32s) bid(d) ask(d) last(d) ts(d)                  72 bytes
+#
+# The writer bumps seq to odd, writes the fields, then bumps it to even. A
+# reader retries until it sees the same even seq before and after copying the
+# fields, so it never returns a half-written slot, and checks the slot still
+# holds the key it asked for. Writers in one process (the sidecar publishes from
+# a thread pool) take a lock, so slots are claimed and filled in order. Values
+# are unpacked straight from the shared buffer; nothing is pickled or copied
+# through a pipe.
+import struct
+import threading
+import time
+import logging
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger("oho_bot")
+
+MAGIC = b"OHMD"
+VERSION = 1
+DEFAULT_NAME = "oho_md"
+DEFAULT_SLOTS = 128
+
+_HEADER = struct.Struct("<4sHH8x")
+_SEQ = struct.Struct("<Q")
+_SLOT = struct.Struct("<Q32sdddd")
+_FIELDS = struct.Struct("<32sdddd")   # slot without seq
+KEY_BYTES = 32
+
+
+def _key_bytes(key: str) -> bytes:
+    raw = key.encode()
+    if len(raw) > KEY_BYTES:
+        raise ValueError(f"market-data key too long: {key!r}")
+    return raw.ljust(KEY_BYTES, b"\0")
+
+
+def reference_key(venue: str) -> str:
+    return f"{venue}:btc"
+
+
+def quote_key(venue: str, symbol: str) -> str:
+    return f"{venue}:{symbol}"
+
+
+class MarketDataBus:
+    """Fixed-layout shared-memory segment. Use create() in the sidecar, attach() in bots."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self._shm = shm
+        self._buf = shm.buf
+        self.owner = owner
+
+        magic, version, slots = _HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"shared memory '{shm.name}' is not a v{VERSION} market-data bus")
+        self.slots = slots
+        self._index: Dict[str, int] = {}   # key -> slot (readers fill lazily, writer eagerly)
+        self._write_lock = threading.Lock()
+
+    # ---------------- Lifecycle ---------------- #
+
+    @classmethod
+    def create(cls, name: str = DEFAULT_NAME, slots: int = DEFAULT_SLOTS) -> "MarketDataBus":
+        size = _HEADER.size + slots * _SLOT.size
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left over from a crashed sidecar — take it over
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        shm.buf[:size] = bytes(size)
+        _HEADER.pack_into(shm.buf, 0, MAGIC, VERSION, slots)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str = DEFAULT_NAME) -> "MarketDataBus":
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            # Python < 3.13 registers attached segments with the resource
+            # tracker, which would unlink the sidecar's segment when we exit.
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return cls(shm, owner=False)
+
+    def close(self) -> None:
+        self._buf = None
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+    def _offset(self, slot: int) -> int:
+        return _HEADER.size + slot * _SLOT.size
+
+    # ---------------- Writer (sidecar) ---------------- #
+
+    def publish(self, key: str, bid: Optional[float] = None, ask: Optional[float] = None,
+                last: Optional[float] = None) -> None:
+        raw_key = _key_bytes(key)
+        nan = float("nan")
+        with self._write_lock:
+            slot = self._index.get(key)
+            if slot is None:
+                slot = len(self._index)
+                if slot >= self.slots:
+                    raise RuntimeError(f"market-data bus full ({self.slots} slots)")
+                self._index[key] = slot
+
+            off = self._offset(slot)
+            seq = _SEQ.unpack_from(self._buf, off)[0]
+            _SEQ.pack_into(self._buf, off, seq + 1)  # odd: write in progress
+            _FIELDS.pack_into(self._buf, off + _SEQ.size, raw_key,
+                              nan if bid is None else bid,
+                              nan if ask is None else ask,
+                              nan if last is None else last,
+                              time.time())
+            _SEQ.pack_into(self._buf, off, seq + 2)  # even: consistent
+
+    # ---------------- Reader (bots) ---------------- #
+
+    def _find(self, key: str) -> Optional[int]:
+        slot = self._index.get(key)
+        if slot is not None:
+            return slot
+        want = _key_bytes(key)
+        for i in range(self.slots):
+            off = self._offset(i) + _SEQ.size
+            raw = bytes(self._buf[off:off + KEY_BYTES])
+            if raw == want:
+                self._index[key] = i
+                return i
+            if raw[0] == 0:
+                break  # slots are filled in order; the rest are empty
+        return None
+
+    def read(self, key: str, max_age_s: float = 3.0, retries: int = 100
+             ) -> Optional[Tuple[float, float, float, float]]:
+        """(bid, ask, last, ts) for key, or None if missing, stale or torn."""
+        slot = self._find(key)
+        if slot is None:
+            return None
+
+        want = _key_bytes(key)
+        off = self._offset(slot)
+        for _ in range(retries):
+            s1 = _SEQ.unpack_from(self._buf, off)[0]
+            if s1 & 1:
+                continue
+            raw_key, bid, ask, last, ts = _FIELDS.unpack_from(self._buf, off + _SEQ.size)
+            if _SEQ.unpack_from(self._buf, off)[0] == s1:
+                if raw_key != want:
+                    self._index.pop(key, None)  # slot now holds another key (sidecar restarted)
+                    return None
+                if s1 == 0 or time.time() - ts > max_age_s:
+                    return None
+                return bid, ask, last, ts
+        return None
+
+    def reference_last(self, venue: str, max_age_s: float = 3.0) -> Optional[float]:
+        hit = self.read(reference_key(venue), max_age_s)
+        if hit is None or hit[2] != hit[2]:  # NaN check
+            return None
+        return hit[2]
+
+    def best_quotes(self, venue: str, symbol: str, max_age_s: float = 3.0
+                    ) -> Optional[Tuple[Optional[float], Optional[float]]]:
+        hit = self.read(quote_key(venue, symbol), max_age_s)
+        if hit is None:
+            return None
+        bid, ask = hit[0], hit[1]
+        return (None if bid != bid else bid), (None if ask != ask else ask)
@@ -0,0 +1,126 @@
+# helpers/memprof.py — Opt-in long-run memory profiling (tracemalloc diffs + adapter state sizes)
+#
+#   MEMPROF=1                 turn it on
+#   MEMPROF_EVERY=50          venue cycles between snapshots (snapshot cost grows with live allocations)
+#   MEMPROF_FRAMES=1          traceback depth recorded per allocation (more = slower, more precise)
+#   MEMPROF_TOP=10            allocation sites / state counters reported per snapshot
+import logging
+import os
+import tracemalloc
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger("oho_bot")
+
+_IGNORE = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def _rss_mb() -> Optional[float]:
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3  # peak, KiB on Linux
+    except Exception:
+        return None
+
+
+def _size(obj) -> int:
+    try:
+        return len(obj)
+    except TypeError:
+        return 0
+
+
+def adapter_state(ad) -> Dict[str, int]:
+    """Sizes of the per-venue containers that live for the whole run."""
+    d = ad.__dict__
+    views = d.get("_views") or [ad]
+    state = {
+        "current_cycle_order_ids": sum(_size(v.__dict__.get("current_cycle_order_ids", ())) for v in views),
+        "market_data": _size(d.get("_md", ())),
+        "views": _size(d.get("_views", ())),
+    }
+    if ad.journal is not None:
+        state["journal.live"] = len(ad.journal.live)
+        state["journal.pending"] = len(ad.journal.pending)
+    cache = d.get("_balance_cache")
+    if cache is not None:
+        state["balance.reserved"] = len(cache._reserved)
+    validator = d.get("_validator")
+    if validator is not None:
+        state["validator.reasons"] = len(validator.venue_rejects) + len(validator.local_rejects)
+    breakers = d.get("_breakers")
+    if breakers is not None:
+        state["breakers.endpoints"] = len(breakers.endpoints)
+    if ad.shadow is not None:
+        state["shadow.orders"] = len(ad.shadow.orders)
+        state["shadow.fills"] = len(ad.shadow.fills)
+    session = d.get("session")
+    if session is not None:
+        state["session.cookies"] = len(session.cookies)
+    return state
+
+
+class MemoryProfiler:
+    """
+    Every `every` venue cycles: take a tracemalloc snapshot, diff it against
+    the previous one by allocation site and log the top growers, together
+    with RSS and the adapter/loop container sizes that grew since last time.
+    """
+
+    def __init__(self, every: int = 50, frames: int = 1, top: int = 10):
+        self.every = max(1, every)
+        self.top = top
+        self.cycles = 0
+        self._prev = None
+        self._prev_state: Dict[str, int] = {}
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(max(1, frames))
+        self.frames = tracemalloc.get_traceback_limit()
+        logger.info(f"Memory profiling on: snapshot every {self.every} cycles, {self.frames} frame(s) per allocation")
+
+    @classmethod
+    def from_env(cls) -> Optional["MemoryProfiler"]:
+        if os.getenv("MEMPROF", "") in ("", "0"):
+            return None
+        return cls(every=int(os.getenv("MEMPROF_EVERY", "50")),
+                   frames=int(os.getenv("MEMPROF_FRAMES", "1")),
+                   top=int(os.getenv("MEMPROF_TOP", "10")))
+
+    def on_cycle(self, adapters: Iterable, extra: Optional[Dict[str, int]] = None) -> None:
+        self.cycles += 1
+        if self.cycles % self.every:
+            return
+
+        snap = tracemalloc.take_snapshot().filter_traces(_IGNORE)
+        current, peak = tracemalloc.get_traced_memory()
+        rss = _rss_mb()
+        rss_txt = f"rss={rss:.1f}MB " if rss is not None else ""
+        logger.info(f"memprof cycle {self.cycles}: {rss_txt}traced={current / 1e6:.2f}MB peak={peak / 1e6:.2f}MB")
+
+        if self._prev is not None:
+            stats = [s for s in snap.compare_to(self._prev, "lineno") if s.size_diff > 0]
+            for s in stats[:self.top]:
+                frame = s.traceback[0]
+                logger.info(f"memprof   +{s.size_diff / 1024:8.1f} KiB {s.count_diff:+6d} blocks  "
+                            f"{frame.filename}:{frame.lineno}")
+        self._prev = snap
+
+        state = dict(extra or {})
+        for ad in adapters:
+            for name, n in adapter_state(ad).items():
+                state[f"{ad.exchange_name}.{name}"] = n
+        grown = sorted(((n - self._prev_state.get(k, 0), k, n) for k, n in state.items()
+                        if n > self._prev_state.get(k, 0)), reverse=True)
+        if grown and self._prev_state:
+            logger.info("memprof   state growth: " + ", ".join(f"{k}={n} (+{d})" for d, k, n in grown[:self.top]))
+        self._prev_state = state
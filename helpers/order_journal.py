@@ -0,0 +1,239 @@
+# helpers/order_journal.py — Crash-safe per-venue order journal
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional, Set
+
+logger = logging.getLogger("oho_bot")
+
+
+class OrderJournal:
+    """
+    Append-only journal of our order intents, acks, rejects and cancels for one venue.
+
+    One JSON record per line:
+        intent  {ref, side, px, qty, sym}   written BEFORE the order is sent
+        ack     {ref, id}                   venue accepted, id assigned
+        reject  {ref}                       venue refused / request failed
+        cancel  {id}                        venue confirmed the cancel
+        gone    {id}                        no longer open (filled or cancelled elsewhere)
+        live    {id, side, px, qty, sym}    snapshot record written by compaction
+
+    Writes are buffered and fsync'd in batches (sync_every records or
+    sync_interval_s, whichever comes first). A torn last line after a crash is
+    ignored on replay. Once compact_every records have accumulated, the file is
+    rewritten as a snapshot of what is still live; intents never acked or
+    rejected (a crash mid-placement) are dropped once older than
+    pending_max_age_s, as their outcome can no longer be learned.
+    """
+
+    def __init__(self, directory: str, venue: str, sync_every: int = 32, sync_interval_s: float = 1.0,
+                 compact_every: int = 5000, pending_max_age_s: float = 3600.0):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.venue = venue
+        self.path = os.path.join(directory, f"{venue}.journal")
+        self.sync_every = sync_every
+        self.sync_interval_s = sync_interval_s
+        self.compact_every = compact_every
+        self.pending_max_age_s = pending_max_age_s
+
+        self.live: Dict[str, dict] = {}      # order_id -> {side, px, qty, sym, ts}
+        self.pending: Dict[int, dict] = {}   # ref -> intent not yet acked/rejected
+
+        self._lock = threading.Lock()
+        self._next_ref = 1
+        self._records = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        self._replay()
+        self._fh = open(self.path, "ab")
+
+    # ---------------- Replay ---------------- #
+
+    def _replay(self) -> None:
+        if not os.path.exists(self.path):
+            return
+
+        good_end = 0
+        with open(self.path, "rb") as fh:
+            for raw in fh:
+                if not raw.endswith(b"\n"):
+                    break  # torn write at crash time
+                good_end += len(raw)
+                try:
+                    rec = json.loads(raw)
+                except ValueError:
+                    continue
+                self._apply(rec)
+                self._records += 1
+
+        # Drop a torn tail so new records don't get glued onto it
+        if good_end < os.path.getsize(self.path):
+            with open(self.path, "r+b") as fh:
+                fh.truncate(good_end)
+
+        if self.pending:
+            logger.warning(
+                f"{self.venue} journal: {len(self.pending)} placements were in flight at shutdown "
+                f"— outcome unknown")
+
+    def _apply(self, rec: dict) -> None:
+        ev = rec.get("ev")
+        if ev == "intent":
+            ref = int(rec["ref"])
+            self.pending[ref] = {k: rec.get(k) for k in ("side", "px", "qty", "sym", "ts")}
+            self._next_ref = max(self._next_ref, ref + 1)
+        elif ev == "ack":
+            intent = self.pending.pop(int(rec["ref"]), None) or {}
+            self.live[str(rec["id"])] = intent
+        elif ev == "reject":
+            self.pending.pop(int(rec["ref"]), None)
+        elif ev in ("cancel", "gone"):
+            self.live.pop(str(rec["id"]), None)
+        elif ev == "live":
+            self.live[str(rec["id"])] = {k: rec.get(k) for k in ("side", "px", "qty", "sym", "ts")}
+
+    # ---------------- Writes ---------------- #
+
+    def _append(self, rec: dict) -> None:
+        self._fh.write(json.dumps(rec, separators=(",", ":")).encode() + b"\n")
+        self._records += 1
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every or time.monotonic() - self._last_sync >= self.sync_interval_s:
+            self._sync_locked()
+
+    def _sync_locked(self) -> None:
+        if not self._unsynced:
+            return
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def intent(self, side: str, price: float, amount: float, symbol: str) -> int:
+        """Record an order about to be sent. Returns the ref to pass to ack()/reject()."""
+        with self._lock:
+            ref = self._next_ref
+            self._next_ref += 1
+            rec = {"ev": "intent", "ref": ref, "ts": time.time(), "side": side, "px": price, "qty": amount,
+                   "sym": symbol}
+            self._apply(rec)
+            self._append(rec)
+            return ref
+
+    def ack(self, ref: int, order_id: str) -> None:
+        with self._lock:
+            rec = {"ev": "ack", "ref": ref, "id": str(order_id)}
+            self._apply(rec)
+            self._append(rec)
+
+    def reject(self, ref: int) -> None:
+        with self._lock:
+            rec = {"ev": "reject", "ref": ref}
+            self._apply(rec)
+            self._append(rec)
+
+    def cancelled(self, order_ids: Iterable[str]) -> None:
+        with self._lock:
+            for oid in order_ids:
+                oid = str(oid)
+                if oid in self.live:
+                    rec = {"ev": "cancel", "id": oid}
+                    self._apply(rec)
+                    self._append(rec)
+
+    def prices(self, order_ids: Iterable[str]) -> Dict[str, float]:
+        """Limit price of each live order we know about."""
+        with self._lock:
+            out = {}
+            for oid in order_ids:
+                px = (self.live.get(str(oid)) or {}).get("px")
+                if px is not None:
+                    out[str(oid)] = float(px)
+            return out
+
+    def live_ids(self, symbol: Optional[str] = None) -> Set[str]:
+        with self._lock:
+            return {oid for oid, o in self.live.items() if symbol is None or o.get("sym") == symbol}
+
+    def reconcile(self, open_ids: Iterable[str], min_age_s: float = 0.0,
+                  symbol: Optional[str] = None) -> Set[str]:
+        """
+        Drop journal entries the venue no longer reports as open (filled or
+        cancelled behind our back). Entries younger than min_age_s are kept,
+        since a fresh order may not show up in the open-orders list yet. With
+        a symbol, open_ids covers that market only and other markets' entries
+        are left alone. Returns our order IDs that are still live.
+        """
+        open_ids = {str(oid) for oid in open_ids}
+        cutoff = time.time() - min_age_s
+        with self._lock:
+            for oid, o in list(self.live.items()):
+                if symbol is not None and o.get("sym") != symbol:
+                    continue
+                if oid not in open_ids and (o.get("ts") or 0) <= cutoff:
+                    rec = {"ev": "gone", "id": oid}
+                    self._apply(rec)
+                    self._append(rec)
+            self._sync_locked()
+            return set(self.live) & open_ids
+
+    # ---------------- Durability ---------------- #
+
+    def sync(self) -> None:
+        with self._lock:
+            self._sync_locked()
+
+    def checkpoint(self) -> None:
+        """End-of-cycle hook: fsync pending records and compact if the log has grown."""
+        with self._lock:
+            self._sync_locked()
+            if self._records >= self.compact_every:
+                self._compact_locked()
+
+    def _compact_locked(self) -> None:
+        cutoff = time.time() - self.pending_max_age_s
+        expired = [ref for ref, o in self.pending.items() if (o.get("ts") or 0) < cutoff]
+        for ref in expired:
+            del self.pending[ref]
+        if expired:
+            logger.info(f"{self.venue} journal: dropped {len(expired)} placement(s) with unknown outcome")
+
+        tmp = self.path + ".tmp"
+        records = 0
+        with open(tmp, "wb") as out:
+            for oid, o in self.live.items():
+                out.write(json.dumps({"ev": "live", "id": oid, **o}, separators=(",", ":")).encode() + b"\n")
+                records += 1
+            for ref, o in self.pending.items():
+                out.write(json.dumps({"ev": "intent", "ref": ref, **o}, separators=(",", ":")).encode() + b"\n")
+                records += 1
+            out.flush()
+            os.fsync(out.fileno())
+
+        self._fh.close()
+        os.replace(tmp, self.path)
+        if hasattr(os, "O_DIRECTORY"):
+            dir_fd = os.open(self.directory, os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+        self._fh = open(self.path, "ab")
+        self._records = records
+        logger.debug(f"{self.venue} journal compacted to {records} records")
+
+    def compact(self) -> None:
+        with self._lock:
+            self._sync_locked()
+            self._compact_locked()
+
+    def close(self) -> None:
+        with self._lock:
+            self._sync_locked()
+            self._fh.close()
@@ -0,0 +1,250 @@
+# helpers/pnl.py — Inventory and PnL per venue/market from the fill stream
+#
+# Average-cost accounting, all in quote currency:
+#   position     base bought − base sold since fills were first ingested
+#   avg_cost     average entry price of the open position
+#   realized     closed quantity × (exit − avg_cost), after fees
+#   unrealized   position × (mark − avg_cost), marked to run_once's mid_price
+#   drift        position − the venue's inventory_target
+#
+# Live fills update a Position in O(1). recompute() rebuilds the same figures
+# from stored history in one pass of array operations (numpy, when installed)
+# for audits and to seed the engine at startup.
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from helpers.fills import Fill
+
+try:
+    import numpy as np
+except ImportError:  # optional: vectorized recompute
+    np = None
+
+logger = logging.getLogger("oho_bot")
+
+# Positions smaller than this (base units) are flat; absorbs float residue of fractional sizes
+QTY_EPS = 1e-9
+
+# Fills per vectorized step of recompute(); keeps the running products well inside float range
+RECOMPUTE_CHUNK = 4096
+
+
+class Position:
+    __slots__ = ("qty", "cost", "cash", "realized", "fees", "fills", "mark", "target")
+
+    def __init__(self, target: float = 0.0):
+        self.qty = 0.0        # base inventory (signed)
+        self.cost = 0.0       # qty × avg_cost
+        self.cash = 0.0       # quote in minus quote out, fees included
+        self.realized = 0.0
+        self.fees = 0.0
+        self.fills = 0
+        self.mark: Optional[float] = None
+        self.target = target
+
+    @property
+    def avg_cost(self) -> float:
+        return self.cost / self.qty if self.qty else 0.0
+
+    @property
+    def unrealized(self) -> float:
+        return self.qty * self.mark - self.cost if self.mark is not None else 0.0
+
+    @property
+    def drift(self) -> float:
+        return self.qty - self.target
+
+    def apply(self, side: str, price: float, qty: float, fee_quote: float = 0.0) -> None:
+        """One fill, O(1)."""
+        q = qty if side == "buy" else -qty
+        self.cash -= q * price + fee_quote
+        self.fees += fee_quote
+        self.realized -= fee_quote
+        self.fills += 1
+
+        pos = self.qty
+        if pos == 0 or (pos > 0) == (q > 0):
+            self.cost += q * price
+            self.qty = pos + q
+            return
+
+        closed = min(abs(q), abs(pos))
+        avg = self.cost / pos
+        self.realized += closed * (price - avg) * (1 if pos > 0 else -1)
+        self.qty = pos + q
+        if abs(self.qty) < QTY_EPS:
+            self.qty = 0.0
+        if abs(q) <= abs(pos):
+            self.cost = self.qty * avg if self.qty else 0.0
+        else:  # flipped: the remainder opens at this price
+            self.cost = self.qty * price
+
+    def as_dict(self) -> dict:
+        return {"position": self.qty, "avg_cost": self.avg_cost, "realized": self.realized,
+                "unrealized": self.unrealized, "fees": self.fees, "cash": self.cash,
+                "mark": self.mark, "drift": self.drift, "fills": self.fills}
+
+
+def _fee_quote(f: Fill, base: str) -> float:
+    """Fees charged in the base currency are valued at the fill price."""
+    return f.fee * f.price if f.fee_ccy and f.fee_ccy.upper() == base else f.fee
+
+
+def _base(symbol: str) -> str:
+    s = symbol.upper()
+    for sep in ("/", "_", "-"):
+        if sep in s:
+            return s.split(sep, 1)[0]
+    for quote in ("USDT", "USDC", "BTC", "ETH"):
+        if s.endswith(quote) and len(s) > len(quote):
+            return s[:-len(quote)]
+    return s
+
+
+class PnLEngine:
+    """
+    Positions keyed by (venue, symbol). on_fills is a FillIngester listener
+    (background thread); mark() is called from run_once with the cycle's mid.
+    """
+
+    def __init__(self, targets: Optional[Dict[str, float]] = None):
+        self.targets = targets or {}
+        self.positions: Dict[Tuple[str, str], Position] = {}
+        self._lock = threading.Lock()
+
+    def _position(self, venue: str, symbol: str) -> Position:
+        key = (venue, symbol)
+        p = self.positions.get(key)
+        if p is None:
+            p = self.positions[key] = Position(self.targets.get(venue, 0.0))
+        return p
+
+    def on_fills(self, venue: str, fills: Iterable[Fill]) -> None:
+        with self._lock:
+            for f in fills:
+                self._position(venue, f.symbol).apply(f.side, f.price, f.qty, _fee_quote(f, _base(f.symbol)))
+
+    def mark(self, venue: str, symbol: str, mid: float) -> None:
+        with self._lock:
+            p = self.positions.get((venue, symbol))
+            if p is not None:
+                p.mark = mid
+
+    def seed(self, venue: str, fills: Sequence[Fill]) -> None:
+        """Replace the venue's positions with a batch recompute over stored history."""
+        by_symbol: Dict[str, List[Fill]] = {}
+        for f in fills:
+            by_symbol.setdefault(f.symbol, []).append(f)
+        with self._lock:
+            for symbol, rows in by_symbol.items():
+                p = recompute(rows, target=self.targets.get(venue, 0.0))
+                p.mark = getattr(self.positions.get((venue, symbol)), "mark", None)
+                self.positions[(venue, symbol)] = p
+
+    def summary(self, venue: str, symbol: str) -> Optional[str]:
+        with self._lock:
+            p = self.positions.get((venue, symbol))
+            if p is None or not p.fills:
+                return None
+            return (f"inv={p.qty:+,.0f} (drift {p.drift:+,.0f}) avg={p.avg_cost:.10f} "
+                    f"rPnL={p.realized:+.4f} uPnL={p.unrealized:+.4f}")
+
+    def snapshot(self) -> Dict[Tuple[str, str], dict]:
+        with self._lock:
+            return {k: p.as_dict() for k, p in self.positions.items()}
+
+
+# ---------------- Batch recompute ---------------- #
+
+def _cost_basis(q, price, pos_before, pos_after, adding):
+    """
+    Cost basis after every fill. C_k = a_k·C_{k-1} + b_k with a = pos_k/pos_{k-1}
+    on reductions (1 otherwise) and b = price × qty on additions, so
+    C_k = p_k · Σ b_j/p_j with p the running product of a. A run restarts
+    from zero whenever the position was flat before a fill (fills that flip
+    the side were already split in two). Evaluated chunk by chunk, carrying
+    the basis across chunk borders.
+    """
+    n = len(q)
+    start = pos_before == 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        a = np.where(adding | (pos_after == 0), 1.0, pos_after / pos_before)
+    b = np.where(adding, price * q, 0.0)
+    positions = np.arange(n)
+
+    cost = np.empty(n)
+    carry = 0.0
+    for lo in range(0, n, RECOMPUTE_CHUNK):
+        hi = min(n, lo + RECOMPUTE_CHUNK)
+        p = np.cumprod(a[lo:hi])
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            terms = b[lo:hi] / p
+        total = np.cumsum(terms)
+        # Last run start at or before each fill (-1: run continues from the previous chunk)
+        last = np.maximum.accumulate(np.where(start[lo:hi], positions[:hi - lo], -1))
+        before = np.where(last >= 0, total[last] - terms[np.maximum(last, 0)], -carry)
+        chunk = p * (total - before)
+        chunk[pos_after[lo:hi] == 0] = 0.0
+        cost[lo:hi] = chunk
+        carry = chunk[-1]
+    return cost
+
+
+def recompute(fills: Sequence[Fill], mark: Optional[float] = None, target: float = 0.0) -> Position:
+    """
+    Position after every fill in `fills` (time order). With numpy the
+    average-cost recursion is solved with array operations (see _cost_basis);
+    without it the fills are replayed through Position.apply.
+    """
+    fills = sorted(fills, key=lambda f: f.ts)
+    if np is None or len(fills) < 2:
+        p = Position(target)
+        for f in fills:
+            p.apply(f.side, f.price, f.qty, _fee_quote(f, _base(f.symbol)))
+        p.mark = mark
+        return p
+
+    base = _base(fills[0].symbol)
+    price = np.array([f.price for f in fills], dtype=float)
+    q = np.array([f.qty if f.side == "buy" else -f.qty for f in fills], dtype=float)
+    fee = np.array([_fee_quote(f, base) for f in fills], dtype=float)
+
+    pos_after = np.cumsum(q)
+    pos_after[np.abs(pos_after) < QTY_EPS] = 0.0
+    pos_before = np.r_[0.0, pos_after[:-1]]
+
+    # Split fills that flip the position into a closing part and an opening part
+    flip = (pos_before != 0) & (pos_after != 0) & (np.sign(pos_before) != np.sign(pos_after))
+    if flip.any():
+        idx = np.nonzero(flip)[0]
+        close_q = -pos_before[idx]
+        q[idx] = close_q
+        q = np.insert(q, idx + 1, pos_after[idx])
+        price = np.insert(price, idx + 1, price[idx])
+        pos_after = np.cumsum(q)
+        pos_after[np.abs(pos_after) < QTY_EPS] = 0.0
+        pos_before = np.r_[0.0, pos_after[:-1]]
+
+    adding = (pos_before == 0) | (np.sign(pos_before) == np.sign(q))
+    cost = _cost_basis(q, price, pos_before, pos_after, adding)
+
+    avg_before = np.where(pos_before != 0, np.r_[0.0, cost[:-1]] / np.where(pos_before != 0, pos_before, 1.0), 0.0)
+    closed = np.where(adding, 0.0, np.minimum(np.abs(q), np.abs(pos_before)))
+    realized = float(np.sum(closed * (price - avg_before) * np.sign(pos_before)) - fee.sum())
+
+    out = Position(target)
+    out.qty = float(pos_after[-1])
+    out.cost = float(cost[-1]) if out.qty else 0.0
+    out.cash = float(-np.sum(q * price) - fee.sum())
+    out.realized = realized
+    out.fees = float(fee.sum())
+    out.fills = len(fills)
+    out.mark = mark
+    if not np.isfinite(cost).all():  # extreme reductions underflow the products: replay instead
+        out = Position(target)
+        for f in fills:
+            out.apply(f.side, f.price, f.qty, _fee_quote(f, base))
+        out.mark = mark
+    return out
+
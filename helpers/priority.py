@@ -0,0 +1,28 @@
+# helpers/priority.py — Inside-out ordering of placements and cancels
+#
+# When throughput is the bottleneck (rate limits, a halted side, a slow
+# venue) the levels nearest the reference price are the ones that trade and
+# set the spread, so they go first: placements nearest mid first, alternating
+# buy and sell; stale orders cancelled nearest mid first (prices from the
+# order journal), so the old touch is cleared before the deep levels.
+import itertools
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+def placement_order(buys: Sequence[Tuple[int, float, float]], sells: Sequence[Tuple[int, float, float]],
+                    mid: float) -> List[Tuple[str, int, float, float]]:
+    """(side, level, price, qty) of both ladders: rank k of each side in turn, the nearer of the two first."""
+    ranked = [sorted(((side, i, price, qty) for i, price, qty in orders), key=lambda o: abs(o[2] - mid))
+              for side, orders in (("buy", buys), ("sell", sells))]
+    out = []
+    for pair in itertools.zip_longest(*ranked):
+        out.extend(sorted((o for o in pair if o is not None), key=lambda o: abs(o[2] - mid)))
+    return out
+
+
+def cancel_order(order_ids: Sequence[str], prices: Dict[str, float], mid: Optional[float]) -> List[str]:
+    """Order ids nearest mid first; ids without a known price keep their relative order, last."""
+    if mid is None or not prices:
+        return list(order_ids)
+    known = sorted((oid for oid in order_ids if oid in prices), key=lambda oid: abs(prices[oid] - mid))
+    return known + [oid for oid in order_ids if oid not in prices]
@@ -0,0 +1,168 @@
+# helpers/sampler.py — On-demand sampling profiler (SIGUSR1 or local control socket)
+#
+#   kill -USR1 <pid>                  start sampling; send again to stop and write the profile
+#   echo toggle | nc 127.0.0.1 $PROFILER_PORT   same, where signals aren't available
+#
+#   PROFILER_HZ=200                   samples per second while running
+#   PROFILER_FORMAT=collapsed         "collapsed" (flamegraph.pl / speedscope import) or "speedscope" (JSON)
+#   PROFILER_DIR=profiles             output directory
+#   PROFILER_ALL_THREADS=0            1 = sample every thread, not just the main loop
+#   PROFILER_PORT=                    enable the 127.0.0.1 control socket on this port
+#
+# While off there is no sampling thread at all; the only cost is the
+# installed signal handler (and the idle control-socket thread if enabled).
+import json
+import logging
+import os
+import signal
+import socketserver
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional, Tuple
+
+logger = logging.getLogger("oho_bot")
+
+Stack = Tuple[Tuple[str, str, int], ...]   # root-first (function, file, line)
+
+
+class StackSampler:
+    def __init__(self, hz: float = 200.0, out_dir: str = "profiles", fmt: str = "collapsed",
+                 all_threads: bool = False):
+        self.interval_s = 1.0 / max(1.0, hz)
+        self.out_dir = out_dir
+        self.fmt = fmt
+        self.all_threads = all_threads
+        self.target = threading.main_thread().ident
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "StackSampler":
+        return cls(hz=float(os.getenv("PROFILER_HZ", "200")),
+                   out_dir=os.getenv("PROFILER_DIR", "profiles"),
+                   fmt=os.getenv("PROFILER_FORMAT", "collapsed"),
+                   all_threads=os.getenv("PROFILER_ALL_THREADS", "0") == "1")
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # ---------------- Control ---------------- #
+
+    def toggle(self, *_) -> None:
+        """Signal-handler safe: only starts a thread or sets an event."""
+        with self._lock:
+            if self.running:
+                self._stop.set()
+            else:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="sampler", daemon=True)
+                self._thread.start()
+
+    def install(self, port: Optional[int] = None) -> None:
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, self.toggle)
+        if port:
+            serve_control(self, port)
+
+    # ---------------- Sampling ---------------- #
+
+    def _run(self) -> None:
+        logger.info(f"Profiler started ({1 / self.interval_s:.0f} Hz, "
+                    f"{'all threads' if self.all_threads else 'main thread'})")
+        own = threading.get_ident()
+        names = {}
+        counts: Counter = Counter()
+        started = time.perf_counter()
+        next_at = started
+        while not self._stop.is_set():
+            frames = sys._current_frames()
+            if not self.all_threads:
+                frames = {self.target: frames[self.target]} if self.target in frames else {}
+            for tid, frame in frames.items():
+                if tid == own:
+                    continue
+                if tid not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_name, code.co_filename, frame.f_lineno))
+                    frame = frame.f_back
+                if self.all_threads:
+                    stack.append((names.get(tid, str(tid)), "<thread>", 0))
+                counts[tuple(reversed(stack))] += 1
+            next_at += self.interval_s
+            self._stop.wait(max(0.0, next_at - time.perf_counter()))
+        elapsed = time.perf_counter() - started
+
+        try:
+            path = self._write(counts, elapsed)
+            logger.info(f"Profiler stopped: {sum(counts.values())} samples over {elapsed:.1f}s → {path}")
+        except Exception as e:
+            logger.warning(f"Profiler output failed: {e}")
+
+    # ---------------- Output ---------------- #
+
+    def _write(self, counts: Counter, elapsed: float) -> str:
+        os.makedirs(self.out_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        if self.fmt == "speedscope":
+            path = os.path.join(self.out_dir, f"profile-{os.getpid()}-{stamp}.speedscope.json")
+            with open(path, "w", encoding="utf-8") as fh:
+                json.dump(to_speedscope(counts, self.interval_s, elapsed), fh)
+        else:
+            path = os.path.join(self.out_dir, f"profile-{os.getpid()}-{stamp}.collapsed")
+            with open(path, "w", encoding="utf-8") as fh:
+                for stack, n in counts.most_common():
+                    fh.write(";".join(f"{fn} ({os.path.basename(f)}:{ln})" for fn, f, ln in stack) + f" {n}\n")
+        return path
+
+
+def to_speedscope(counts: Counter, interval_s: float, elapsed: float) -> dict:
+    frames, index = [], {}
+    samples, weights = [], []
+    for stack, n in counts.items():
+        ids = []
+        for fn, f, ln in stack:
+            key = (fn, f, ln)
+            if key not in index:
+                index[key] = len(frames)
+                frames.append({"name": fn, "file": f, "line": ln})
+            ids.append(index[key])
+        samples.append(ids)
+        weights.append(n * interval_s)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled", "name": f"oho_bot pid {os.getpid()}", "unit": "seconds",
+            "startValue": 0, "endValue": elapsed, "samples": samples, "weights": weights,
+        }],
+        "exporter": "oho_bot sampler",
+    }
+
+
+def serve_control(sampler: StackSampler, port: int) -> None:
+    """127.0.0.1-only line protocol: start | stop | toggle | status."""
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            cmd = self.rfile.readline().decode(errors="replace").strip().lower()
+            if cmd == "toggle" or (cmd == "start" and not sampler.running) or \
+                    (cmd == "stop" and sampler.running):
+                sampler.toggle()
+            time.sleep(0.05)
+            self.wfile.write(b"running\n" if sampler.running else b"stopped\n")
+
+    try:
+        server = socketserver.ThreadingTCPServer(("127.0.0.1", port), Handler)
+    except OSError as e:
+        logger.warning(f"Profiler control socket unavailable on port {port}: {e}")
+        return
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="profiler-control", daemon=True).start()
+    logger.info(f"Profiler control socket on 127.0.0.1:{port}")
@@ -0,0 +1,141 @@
+# helpers/scheduler.py — Per-venue requote deadlines driven by reference-price moves
+import heapq
+import random
+from typing import Dict, List, Optional
+
+from helpers import clock
+
+
+class VenueSchedule:
+    def __init__(self, key: str):
+        self.key = key
+        self.deadline = 0.0
+        self.quoted_at = 0.0
+        self.mid: Optional[float] = None   # reference mid the live ladder was built from
+        self.tick = 1e-10
+        self.stretch = 1.0                 # grows while the reference stays put
+        self.version = 0                   # invalidates superseded heap entries
+
+
+class RequoteScheduler:
+    """
+    Decides when each venue's ladders are rebuilt.
+
+    Every venue has its own jittered deadline (interval_min_s..interval_max_s)
+    in a heap, so one slow venue doesn't hold up the others. Between
+    deadlines:
+
+      - moved(): a reference move of >= trigger_ticks since the venue last
+        quoted pulls its deadline in to now (early requote)
+      - should_requote(): at the deadline, a reference that has moved less
+        than min_move_ticks skips the requote and the next interval is
+        stretched (x stretch_factor, capped so a venue is never left
+        untouched for more than max_idle_s)
+    """
+
+    def __init__(self, interval_min_s: float, interval_max_s: float, trigger_ticks: float = 0,
+                 min_move_ticks: float = 0, stretch_factor: float = 1.5, max_idle_s: float = 60.0):
+        self.interval_min_s = interval_min_s
+        self.interval_max_s = interval_max_s
+        self.trigger_ticks = trigger_ticks
+        self.min_move_ticks = min_move_ticks
+        self.stretch_factor = max(1.0, stretch_factor)
+        self.max_idle_s = max_idle_s
+        self.venues: Dict[str, VenueSchedule] = {}
+        self._heap: List[tuple] = []
+        self.early = 0
+        self.skipped = 0
+
+    # ---------------- Deadlines ---------------- #
+
+    def add(self, key: str, now: Optional[float] = None) -> None:
+        """Start tracking a venue; its first requote is due immediately."""
+        self.venues[key] = VenueSchedule(key)
+        self._schedule(self.venues[key], clock.monotonic() if now is None else now)
+
+    def remove(self, key: str) -> None:
+        v = self.venues.pop(key, None)
+        if v is not None:
+            v.version += 1
+
+    def _schedule(self, v: VenueSchedule, deadline: float) -> None:
+        v.version += 1
+        v.deadline = deadline
+        heapq.heappush(self._heap, (deadline, v.key, v.version))
+
+    def next_deadline(self) -> Optional[float]:
+        while self._heap:
+            deadline, key, version = self._heap[0]
+            v = self.venues.get(key)
+            if v is not None and v.version == version:
+                return deadline
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self, now: Optional[float] = None) -> List[str]:
+        """Venues whose deadline has passed, earliest first."""
+        now = clock.monotonic() if now is None else now
+        due = []
+        while self.next_deadline() is not None and self._heap[0][0] <= now:
+            _, key, _ = heapq.heappop(self._heap)
+            due.append(key)
+        return due
+
+    def defer(self, key: str, delay_s: float, now: Optional[float] = None) -> None:
+        """Push a venue's next requote out by delay_s (e.g. while its circuit breaker is open)."""
+        v = self.venues.get(key)
+        if v is not None:
+            self._schedule(v, (clock.monotonic() if now is None else now) + max(0.1, delay_s))
+
+    # ---------------- Reference moves ---------------- #
+
+    def _moved_ticks(self, v: VenueSchedule, mid: float) -> float:
+        if v.mid is None:
+            return float("inf")
+        return abs(mid - v.mid) / v.tick
+
+    def moved(self, key: str, mid: float, now: Optional[float] = None) -> bool:
+        """Feed a fresh reference mid; returns True if it pulled the venue's requote forward."""
+        v = self.venues.get(key)
+        if v is None or self.trigger_ticks <= 0:
+            return False
+        now = clock.monotonic() if now is None else now
+        if v.deadline > now and self._moved_ticks(v, mid) >= self.trigger_ticks:
+            self.early += 1
+            self._schedule(v, now)
+            return True
+        return False
+
+    def should_requote(self, key: str, mid: Optional[float], now: Optional[float] = None) -> bool:
+        """
+        Called at a venue's deadline. False means nothing has changed enough to
+        be worth a requote; the venue is rescheduled with a stretched interval.
+        """
+        v = self.venues[key]
+        now = clock.monotonic() if now is None else now
+        if (mid is None or self.min_move_ticks <= 0 or v.mid is None
+                or now - v.quoted_at >= self.max_idle_s
+                or self._moved_ticks(v, mid) >= self.min_move_ticks):
+            return True
+
+        self.skipped += 1
+        v.stretch *= self.stretch_factor
+        self._schedule(v, now + self._interval(v, now))
+        return False
+
+    def quoted(self, key: str, mid: Optional[float], tick: float, now: Optional[float] = None) -> None:
+        """Record a completed requote and schedule the next one."""
+        v = self.venues[key]
+        now = clock.monotonic() if now is None else now
+        v.quoted_at = now
+        v.mid = mid
+        v.tick = max(tick, 1e-10)
+        v.stretch = 1.0
+        self._schedule(v, now + self._interval(v, now))
+
+    def _interval(self, v: VenueSchedule, now: float) -> float:
+        interval = random.uniform(self.interval_min_s, self.interval_max_s) * v.stretch
+        if v.quoted_at:
+            # Never stretch past the idle cap measured from the last real requote
+            interval = min(interval, max(0.0, v.quoted_at + self.max_idle_s - now))
+        return max(0.1, interval)
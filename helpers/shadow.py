@@ -0,0 +1,150 @@
+# helpers/shadow.py — Paper-trading book: virtual orders matched against live market data
+import itertools
+import logging
+import math
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("oho_bot")
+
+
+class ShadowBook:
+    """
+    Simulated resting orders for one venue (all its symbols).
+
+    Orders rest at their limit price and fill when the real market reaches
+    them: fully when the opposite top-of-book moves through the price, or
+    partially for each reported trade printed through it. Nothing is sent to
+    the venue; place/cancel requests that a live run would have made are
+    counted instead (cancels in batches of cancel_batch_size).
+
+    Quote uptime is the share of observed time with at least one live order
+    on each side of a symbol.
+    """
+
+    def __init__(self, venue: str, cancel_batch_size: int = 1):
+        self.venue = venue
+        self.cancel_batch_size = max(1, cancel_batch_size)
+        self.orders: Dict[str, list] = {}   # id -> [symbol, side, price, remaining, placed_ts]
+        self.fills: List[Tuple[float, str, str, float, float, str]] = []  # (ts, symbol, side, price, qty, id)
+        self.api_calls: Counter = Counter()
+        self.base_delta: Dict[str, float] = {}
+        self.quote_delta: Dict[str, float] = {}
+        self._seq = itertools.count(1)
+        self._seen_trades: Dict[str, float] = {}   # symbol -> ts of the newest trade already matched
+        self._last_obs: Dict[str, float] = {}
+        self._observed_s: Counter = Counter()
+        self._quoted_s: Counter = Counter()
+        self._lock = threading.Lock()
+
+    # ---------------- Would-be requests ---------------- #
+
+    def place(self, symbol: str, side: str, price: float, qty: float) -> str:
+        with self._lock:
+            oid = f"shadow_{next(self._seq)}"
+            self.orders[oid] = [symbol, side, price, qty, time.time()]
+            self.api_calls["place"] += 1
+            return oid
+
+    def cancel(self, order_ids: Sequence[str]) -> int:
+        with self._lock:
+            gone = [oid for oid in order_ids if self.orders.pop(oid, None) is not None]
+            if order_ids:
+                self.api_calls["cancel"] += math.ceil(len(order_ids) / self.cancel_batch_size)
+            return len(gone)
+
+    def live_ids(self, symbol: Optional[str] = None) -> List[str]:
+        with self._lock:
+            return [oid for oid, o in self.orders.items() if symbol is None or o[0] == symbol]
+
+    # ---------------- Matching ---------------- #
+
+    def observe(self, symbol: str, best_bid: Optional[float], best_ask: Optional[float],
+                trades: Iterable[Tuple[float, float, float]] = ()) -> int:
+        """
+        Match resting orders on `symbol` against the current book and any
+        new trades (ts, price, qty). Returns the number of fills.
+        """
+        now = time.time()
+        filled = 0
+        with self._lock:
+            self._account_uptime(symbol, now)
+
+            newest = self._seen_trades.get(symbol, 0.0)
+            fresh = sorted(t for t in trades if t[0] > newest)
+            if fresh:
+                self._seen_trades[symbol] = fresh[-1][0]
+
+            for oid, o in list(self.orders.items()):
+                sym, side, price, remaining, _ = o
+                if sym != symbol:
+                    continue
+                # Book moved through our level: the whole order would have traded
+                if side == "buy" and best_ask and best_ask <= price or \
+                        side == "sell" and best_bid and best_bid >= price:
+                    self._fill(oid, o, remaining, now)
+                    filled += 1
+                    continue
+                for ts, px, qty in fresh:
+                    if remaining <= 0:
+                        break
+                    if side == "buy" and px < price or side == "sell" and px > price:
+                        take = min(remaining, qty)
+                        self._fill(oid, o, take, ts)
+                        remaining -= take
+                        filled += 1
+        return filled
+
+    def _fill(self, oid: str, o: list, qty: float, ts: float) -> None:
+        symbol, side, price = o[0], o[1], o[2]
+        self.fills.append((ts, symbol, side, price, qty, oid))
+        sign = 1.0 if side == "buy" else -1.0
+        self.base_delta[symbol] = self.base_delta.get(symbol, 0.0) + sign * qty
+        self.quote_delta[symbol] = self.quote_delta.get(symbol, 0.0) - sign * qty * price
+        o[3] -= qty
+        if o[3] <= 1e-12:
+            self.orders.pop(oid, None)
+
+    def _account_uptime(self, symbol: str, now: float) -> None:
+        last = self._last_obs.get(symbol)
+        self._last_obs[symbol] = now
+        if last is None:
+            return
+        sides = {o[1] for o in self.orders.values() if o[0] == symbol}
+        self._observed_s[symbol] += now - last
+        if sides == {"buy", "sell"}:
+            self._quoted_s[symbol] += now - last
+
+    # ---------------- Reporting ---------------- #
+
+    def uptime(self, symbol: str) -> Optional[float]:
+        observed = self._observed_s.get(symbol, 0.0)
+        return self._quoted_s.get(symbol, 0.0) / observed if observed else None
+
+    def summary(self, symbol: str) -> str:
+        fills = [f for f in self.fills if f[1] == symbol]
+        up = self.uptime(symbol)
+        up_txt = f"{up:.1%}" if up is not None else "n/a"
+        return (f"fills={len(fills)} net={self.base_delta.get(symbol, 0.0):+,.0f} uptime={up_txt} "
+                f"calls=place:{self.api_calls['place']} cancel:{self.api_calls['cancel']}")
+
+    def report(self) -> str:
+        lines = [f"shadow {self.venue}: would-be requests "
+                 + " ".join(f"{k}={v}" for k, v in sorted(self.api_calls.items()))]
+        for symbol in sorted(set(self._last_obs) | set(self.base_delta)):
+            fills = [f for f in self.fills if f[1] == symbol]
+            buys = [f for f in fills if f[2] == "buy"]
+            sells = [f for f in fills if f[2] == "sell"]
+            bought = sum(f[4] for f in buys)
+            sold = sum(f[4] for f in sells)
+            avg_buy = sum(f[3] * f[4] for f in buys) / bought if bought else 0.0
+            avg_sell = sum(f[3] * f[4] for f in sells) / sold if sold else 0.0
+            up = self.uptime(symbol)
+            lines.append(
+                f"  {symbol}: {len(buys)} buys {bought:,.0f} @ {avg_buy:.10f} | "
+                f"{len(sells)} sells {sold:,.0f} @ {avg_sell:.10f} | "
+                f"net base {self.base_delta.get(symbol, 0.0):+,.0f} quote {self.quote_delta.get(symbol, 0.0):+,.6f} | "
+                f"uptime {(f'{up:.1%}' if up is not None else 'n/a')}")
+        return "\n".join(lines)
@@ -0,0 +1,165 @@
+# helpers/validation.py — Local pre-trade validation with rejection feedback
+import logging
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from helpers.balance_cache import trim_to_inventory
+
+logger = logging.getLogger("oho_bot")
+
+Order = Tuple[int, float, float]  # (level, price, qty)
+
+# Exchange-side rejection reasons (message/code text → reason)
+REJECT_PATTERNS = [
+    ("balance", re.compile(r"insufficient|not enough|balance|funds", re.I)),
+    ("rate_limit", re.compile(r"rate.?limit|too many|frequen|429", re.I)),
+    ("post_only_cross", re.compile(r"post.?only|limit.?maker|would.*(match|cross|take)|immediately", re.I)),
+    ("min_notional", re.compile(r"notional|min.*(total|value|cost)|(total|value|cost).*(small|min)", re.I)),
+    ("min_amount", re.compile(r"min.*(amount|size|qty|quantity|volume)|(amount|size|qty|quantity|volume).*(small|min)",
+                              re.I)),
+    ("precision", re.compile(r"precision|decimal|scale|tick|step|invalid (price|amount|size|volume)", re.I)),
+]
+
+MAX_EXTRA_GUARD_TICKS = 20
+MAX_MIN_BOOST = 8.0
+MAX_LOT_MULTIPLIER = 100.0
+CLEAN_CYCLES_TO_RELAX = 10
+
+
+def classify_reject(text: Optional[str]) -> str:
+    if not text:
+        return "other"
+    for reason, pattern in REJECT_PATTERNS:
+        if pattern.search(text):
+            return reason
+    return "other"
+
+
+def _is_multiple(x: float, step: float) -> bool:
+    if step <= 0:
+        return True
+    k = x / step
+    return abs(k - round(k)) < 1e-6
+
+
+class OrderValidator:
+    """
+    Per-venue pre-trade checks, run on a whole side of the ladder in one pass
+    before anything is sent:
+
+      - tick / lot alignment (snapped toward the safe side, not dropped)
+      - min amount and min cost (with learned headroom); a level that would
+        end up larger than planned is dropped, never enlarged
+      - post-only crossing risk against the current book
+      - free balance (cumulative, nearest levels kept)
+
+    Exchange-side rejections are classified with classify_reject() and fed
+    back into the rules (wider maker guard after post-only rejects, larger
+    min-size headroom after min-size rejects, coarser lot after precision
+    rejects), so a repeat reject stops costing a round trip. Learned rules
+    relax again after a run of clean cycles.
+    """
+
+    def __init__(self, venue: str):
+        self.venue = venue
+        self.extra_guard_ticks = 0
+        self.min_boost = 1.0
+        self.lot_multiplier = 1.0
+        self.local_rejects: Counter = Counter()
+        self.venue_rejects: Counter = Counter()
+        self._clean_cycles = 0
+        self._cycle_rejects: Counter = Counter()
+
+    # ---------------- Pre-trade ---------------- #
+
+    def validate(self, side: str, orders: List[Order], adapter, tick: float, lot: float,
+                 limits: Dict[str, Optional[float]], best_bid: Optional[float], best_ask: Optional[float],
+                 free: Optional[float]) -> List[Order]:
+        buy = side == "buy"
+        lot = lot * self.lot_multiplier
+        min_amount = (limits.get("min_amount") or 0.0) * self.min_boost
+        min_cost = (limits.get("min_cost") or 0.0) * self.min_boost
+        guard = self.extra_guard_ticks * tick
+
+        ok: List[Order] = []
+        for level, price, planned_qty in orders:
+            qty = planned_qty
+            # Tick alignment — buys round down, sells round up (never toward the book)
+            if not _is_multiple(price, tick):
+                k = price / tick
+                price = (math.floor(k + 1e-9) if buy else math.ceil(k - 1e-9)) * tick
+                price = adapter.price_to_precision(price)
+
+            # Post-only crossing risk (learned extra guard on top of the runner's maker guard)
+            if buy and best_ask and price >= best_ask - guard:
+                self.local_rejects["post_only_cross"] += 1
+                continue
+            if not buy and best_bid and price <= best_bid + guard:
+                self.local_rejects["post_only_cross"] += 1
+                continue
+
+            # Lot alignment, then minimums
+            if lot > 0 and not _is_multiple(qty, lot):
+                qty = math.floor(qty / lot + 1e-9) * lot
+            if qty < min_amount:
+                qty = math.ceil(min_amount / lot - 1e-9) * lot if lot > 0 else min_amount
+            if min_cost > 0 and price * qty < min_cost:
+                qty = math.ceil(min_cost / price / lot - 1e-9) * lot if lot > 0 else min_cost / price
+            qty = adapter.amount_to_precision(qty)
+
+            if qty <= 0 or qty < min_amount or (min_cost > 0 and price * qty < min_cost * 0.999):
+                self.local_rejects["min_notional"] += 1
+                continue
+            if qty > planned_qty * (1 + 1e-9):
+                self.local_rejects["oversize"] += 1
+                continue
+
+            ok.append((level, price, qty))
+
+        if free is not None:
+            kept = trim_to_inventory(ok, side, free)
+            if len(kept) < len(ok):
+                self.local_rejects["balance"] += len(ok) - len(kept)
+            ok = kept
+
+        return ok
+
+    # ---------------- Feedback ---------------- #
+
+    def record_reject(self, text: Optional[str]) -> str:
+        """Classify an exchange-side rejection, learn from it and return the reason."""
+        reason = classify_reject(text)
+        self.venue_rejects[reason] += 1
+        self._cycle_rejects[reason] += 1
+
+        if reason == "post_only_cross":
+            self.extra_guard_ticks = min(MAX_EXTRA_GUARD_TICKS, self.extra_guard_ticks + 1)
+        elif reason in ("min_notional", "min_amount"):
+            self.min_boost = min(MAX_MIN_BOOST, self.min_boost * 1.5)
+        elif reason == "precision":
+            self.lot_multiplier = min(MAX_LOT_MULTIPLIER, self.lot_multiplier * 10)
+
+        if reason != "other":
+            logger.info(f"{self.venue} reject classified as {reason} — rules now: guard+{self.extra_guard_ticks} "
+                        f"min×{self.min_boost:.2f} lot×{self.lot_multiplier:g}")
+        return reason
+
+    def end_cycle(self) -> None:
+        """Relax learned post-only/min-size headroom and lot coarsening after a run of clean cycles."""
+        if self._cycle_rejects:
+            self._clean_cycles = 0
+        else:
+            self._clean_cycles += 1
+            if self._clean_cycles >= CLEAN_CYCLES_TO_RELAX:
+                self._clean_cycles = 0
+                self.extra_guard_ticks = max(0, self.extra_guard_ticks - 1)
+                self.min_boost = max(1.0, self.min_boost / 1.5)
+                self.lot_multiplier = max(1.0, self.lot_multiplier / 10)
+        self._cycle_rejects.clear()
+
+    def summary(self) -> str:
+        parts = [f"{k}={v}" for k, v in sorted(self.venue_rejects.items())]
+        parts += [f"local:{k}={v}" for k, v in sorted(self.local_rejects.items())]
+        return " ".join(parts)
@@ -0,0 +1,293 @@
+# loadtest.py — Scalability harness: N synthetic venues driven through the real main loop
+#
+#   python loadtest.py                              # 1, 10, 50, 100 venues, 30s each
+#   python loadtest.py --venues 50,200 --symbols 4 --levels 20 --duration 60
+#   python loadtest.py --latency-ms 80 --latency-sigma 0.6 --error-rate 0.02
+#
+# Each size runs in its own process (clean RSS, fresh module state) with
+# journals, config reload and the sidecar bus off. Synthetic venues sleep a
+# lognormal latency per call and fail a fraction of calls with a
+# ConnectionError, so circuit breakers, the cancel executor and the
+# requote scheduler all see realistic traffic. Per size it reports venue
+# symbol cycles, the share of the configured refresh rate achieved, per-symbol
+# cycle time (p50/p95/max), loop CPU, RSS and orders/sec.
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from typing import List, Optional, Set
+
+import requests
+
+from helpers.batch_cancel import BatchCancelMixin
+from adapters.base import BaseAdapter
+
+TICK = 1e-8
+
+
+class SyntheticAdapter(BatchCancelMixin, BaseAdapter):
+    """In-memory venue with configurable latency and error distributions."""
+
+    latency_ms = 50.0     # median per call
+    latency_sigma = 0.5   # lognormal shape; 0 = constant latency
+    error_rate = 0.0      # fraction of calls raising ConnectionError
+    cancel_batch_size = 50
+    instances: List["SyntheticAdapter"] = []  # one per venue (symbol views are copies)
+
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.exchange_name = cfg.id
+        self.symbol = cfg.symbol
+        self.btc_symbol = cfg.btc_symbol
+        self.dry_run = cfg.dry_run
+
+        self.btc = 90_000.0
+        self.books = {}  # order id -> symbol
+        self.stats = {"calls": 0, "errors": 0, "placed": 0, "cancelled": 0}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.current_cycle_order_ids: Set[str] = set()
+        SyntheticAdapter.instances.append(self)
+
+    def _call(self) -> None:
+        delay = self.latency_ms / 1000.0
+        if self.latency_sigma > 0:
+            delay *= math.exp(random.gauss(0.0, self.latency_sigma))
+        time.sleep(delay)
+        with self._lock:
+            self.stats["calls"] += 1
+            failed = random.random() < self.error_rate
+            if failed:
+                self.stats["errors"] += 1
+        if failed:
+            raise requests.exceptions.ConnectionError(f"{self.exchange_name}: synthetic failure")
+
+    def _request(self, method: str, endpoint: str, data: dict = None):
+        """Batch cancel endpoint for BatchCancelMixin."""
+        self._call()
+        with self._lock:
+            for oid in data["order_ids"]:
+                if self.books.pop(oid, None) is not None:
+                    self.stats["cancelled"] += 1
+        return {"code": 1000}
+
+    # ---------------- Market data ---------------- #
+
+    def connect(self):
+        pass
+
+    def fetch_btc_last(self) -> float:
+        self._call()
+        self.btc *= 1 + random.gauss(0.0, 0.0005)
+        return self.btc
+
+    def fetch_best_quotes(self):
+        try:
+            self._call()
+        except requests.exceptions.ConnectionError:
+            return None, None
+        mid = self.btc * 1.1e-8
+        return mid - 5 * TICK, mid + 5 * TICK
+
+    def fetch_tickers(self, symbols):
+        """One all-markets call, like Biconomy/BitMart."""
+        bid, ask = self.fetch_best_quotes()
+        return {s: (bid, ask) for s in symbols} if bid is not None else {}
+
+    def fetch_balances(self, currencies):
+        self._call()
+        return {c: {"free": 1e15, "used": 0.0} for c in currencies}
+
+    # ---------------- Orders ---------------- #
+
+    def fetch_open_orders(self, strict: bool = False) -> List[dict]:
+        self._call()
+        with self._lock:
+            return [{"id": oid} for oid, sym in self.books.items() if sym == self.symbol]
+
+    def create_limit(self, side: str, price: float, amount: float) -> Optional[str]:
+        try:
+            self._call()
+        except requests.exceptions.ConnectionError as e:
+            self._note_reject(e)
+            return None
+        with self._lock:
+            oid = str(next(self._ids))
+            self.books[oid] = self.symbol
+            self.stats["placed"] += 1
+        self.current_cycle_order_ids.add(oid)
+        return oid
+
+    def cancel_orders_by_ids(self, order_ids: List[str]) -> List[str]:
+        return self._cancel_in_batches(order_ids, "/cancel_batch", lambda batch: {"order_ids": batch},
+                                       batch_size=self.cancel_batch_size)
+
+    def cancel_all_orders(self):
+        """Cancel only orders from earlier cycles (same smart cancel as Tapbit)."""
+        stale = [o["id"] for o in self.fetch_open_orders() if o["id"] not in self.current_cycle_order_ids]
+        if stale:
+            self.cancel_orders_by_ids(stale)
+
+    # ---------------- Precision ---------------- #
+
+    def price_to_precision(self, p):
+        return round(p, 8)
+
+    def amount_to_precision(self, a):
+        return int(round(a))
+
+    def get_limits(self):
+        return {"min_amount": 1, "min_cost": 0.0}
+
+    def get_steps(self):
+        return TICK, 1
+
+    def get_precisions(self):
+        return 8, 0
+
+
+# ---------------- One size (child process) ---------------- #
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+def run_size(args) -> dict:
+    os.environ["ORDER_JOURNAL_DIR"] = ""
+    os.environ["BOT_CONFIG_FILE"] = ""
+    os.environ["MD_BUS_NAME"] = ""
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    import config
+    import main
+    from adapters.registry import register_adapter
+
+    SyntheticAdapter.latency_ms = args.latency_ms
+    SyntheticAdapter.latency_sigma = args.latency_sigma
+    SyntheticAdapter.error_rate = args.error_rate
+
+    s = config.SETTINGS
+    s.depth_min = s.depth_max = args.levels
+    s.interval_min_s, s.interval_max_s = args.interval_min_s, args.interval_max_s
+    s.requote_min_move_ticks = 0  # always refresh at the deadline
+
+    symbols = [f"S{j:03d}/USDT" for j in range(args.symbols)]
+    config.EXCHANGES[:] = []
+    for i in range(args.run):
+        vid = f"synth{i:04d}"
+        register_adapter(vid, SyntheticAdapter)
+        config.EXCHANGES.append(config.ExchangeConfig(
+            id=vid, symbol=symbols[0], btc_symbol="BTC/USDT", enabled=True, dry_run=False,
+            symbols=symbols[1:]))
+
+    cycle_times = []
+
+    def on_cycle(stat):
+        cycle_times.append(stat["cycle_s"])
+
+    rss_start = _rss_mb()
+    threading.Timer(args.duration, main.stop).start()
+    wall0, cpu0 = time.monotonic(), time.process_time()
+    main.main(on_cycle=on_cycle)
+    wall, cpu = time.monotonic() - wall0, time.process_time() - cpu0
+
+    stats = {"calls": 0, "errors": 0, "placed": 0, "cancelled": 0}
+    for ad in SyntheticAdapter.instances:
+        for k in stats:
+            stats[k] += ad.stats[k]
+
+    cycle_times.sort()
+
+    def pct(p):
+        return cycle_times[min(len(cycle_times) - 1, int(p * len(cycle_times)))] if cycle_times else 0.0
+
+    # Share of the configured refresh rate every market actually got (<100% = loop saturated)
+    target_per_s = args.run * args.symbols * 2.0 / (args.interval_min_s + args.interval_max_s)
+    return {
+        "venues": args.run,
+        "markets": args.run * args.symbols,
+        "symbol_cycles": len(cycle_times),
+        "p50_ms": pct(0.50) * 1000,
+        "p95_ms": pct(0.95) * 1000,
+        "max_ms": (cycle_times[-1] if cycle_times else 0.0) * 1000,
+        "refresh_pct": 100.0 * len(cycle_times) / wall / target_per_s if wall else 0.0,
+        "cpu_pct": 100.0 * cpu / wall if wall else 0.0,
+        "rss_mb": _rss_mb(),
+        "rss_growth_mb": _rss_mb() - rss_start,
+        "orders_per_s": stats["placed"] / wall if wall else 0.0,
+        "calls_per_s": stats["calls"] / wall if wall else 0.0,
+        "errors": stats["errors"],
+        "wall_s": wall,
+    }
+
+
+# ---------------- Sweep (parent) ---------------- #
+
+# (row key, header, width, decimals)
+COLUMNS = (("venues", "venues", 6, None), ("markets", "markets", 7, None), ("symbol_cycles", "cycles", 8, None),
+           ("refresh_pct", "refresh %", 9, 1), ("p50_ms", "p50 ms", 8, 1), ("p95_ms", "p95 ms", 8, 1), ("max_ms", "max ms", 8, 1),
+           ("cpu_pct", "cpu %", 6, 1), ("rss_mb", "rss MB", 7, 1), ("orders_per_s", "orders/s", 9, 1),
+           ("calls_per_s", "calls/s", 9, 1), ("errors", "errors", 6, None))
+
+
+def sweep(args) -> List[dict]:
+    rows = []
+    print(" ".join(f"{h:>{w}}" for _, h, w, _ in COLUMNS))
+    for n in args.venues:
+        cmd = [sys.executable, __file__, "--run", str(n)] + _passthrough(args)
+        out = subprocess.run(cmd, capture_output=True, text=True)
+        line = out.stdout.strip().splitlines()[-1] if out.stdout.strip() else ""
+        if out.returncode != 0 or not line.startswith("{"):
+            print(f"{n} venues: run failed (exit {out.returncode})\n{out.stderr[-2000:]}", file=sys.stderr)
+            continue
+        row = json.loads(line)
+        rows.append(row)
+        print(" ".join(f"{row[k]:>{w}.{d}f}" if d is not None else f"{row[k]:>{w}}"
+                       for k, _, w, d in COLUMNS), flush=True)
+    return rows
+
+
+def _passthrough(args) -> List[str]:
+    return ["--symbols", str(args.symbols), "--levels", str(args.levels), "--duration", str(args.duration),
+            "--latency-ms", str(args.latency_ms), "--latency-sigma", str(args.latency_sigma),
+            "--error-rate", str(args.error_rate), "--interval-min-s", str(args.interval_min_s),
+            "--interval-max-s", str(args.interval_max_s)]
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Drive main.main with N synthetic venues and report scaling.")
+    p.add_argument("--venues", default="1,10,50,100",
+                   type=lambda v: [int(x) for x in v.split(",") if x], help="comma-separated venue counts")
+    p.add_argument("--symbols", type=int, default=1, help="markets per venue")
+    p.add_argument("--levels", type=int, default=20, help="ladder levels per side")
+    p.add_argument("--duration", type=float, default=30.0, help="seconds per size")
+    p.add_argument("--latency-ms", type=float, default=50.0, help="median latency per call")
+    p.add_argument("--latency-sigma", type=float, default=0.5, help="lognormal sigma of call latency")
+    p.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls that fail")
+    p.add_argument("--interval-min-s", type=float, default=5.0)
+    p.add_argument("--interval-max-s", type=float, default=10.0)
+    p.add_argument("--json", help="also write the rows to this file")
+    p.add_argument("--run", type=int, help=argparse.SUPPRESS)  # child: one size
+    return p.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.run:
+        print(json.dumps(run_size(args)))
+    else:
+        rows = sweep(args)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as fh:
+                json.dump(rows, fh, indent=2)
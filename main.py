@@ -1,21 +1,31 @@
 # main.py
 import os
 import time
-import random
 import signal
+import threading
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Tuple
 
 from dotenv import load_dotenv
 load_dotenv()
 
 from config import EXCHANGES, SETTINGS
 from runner import run_once
-from adapters.bitmart_adapter import BitMartAdapter
-from adapters.biconomy_adapter import BiconomyAdapter
-from adapters.tapbit_adapter import TapbitAdapter
-from adapters.dextrade_adapter import DexTradeAdapter
-from adapters.p2b_adapter import P2BAdapter
-from adapters.backtest_adapter import BacktestAdapter
+from adapters.base import observed_btc
+from adapters.registry import build_adapter, available_adapters
+from helpers.order_journal import OrderJournal
+from helpers.audit_log import AuditLog
+from helpers.call_budget import by_class, counter_for, format_counts
+from helpers.fills import FILLS_DIR, FillIngester, load_fills
+from helpers.pnl import PnLEngine
+from helpers.md_bus import MarketDataBus
+from helpers.scheduler import RequoteScheduler
+from helpers.shadow import ShadowBook
+from helpers import cassette, clock
+from helpers.memprof import MemoryProfiler
+from helpers.sampler import StackSampler
+from helpers.config_watch import ConfigWatcher, apply_settings, diff_exchanges
 
 logging.basicConfig(
     level=os.getenv("LOG_LEVEL", "INFO"),
@@ -23,12 +33,31 @@ logging.basicConfig(
 )
 logger = logging.getLogger("oho_bot")
 
+# Per-venue order journals live here; set ORDER_JOURNAL_DIR="" to disable (off in cassette replay)
+JOURNAL_DIR = os.getenv("ORDER_JOURNAL_DIR", "journal")
+
+# Columnar order-action audit log (query with audit_query.py); set AUDIT_DIR="" to disable (off in cassette replay)
+AUDIT_DIR = os.getenv("AUDIT_DIR", "audit")
+
+# Shared-memory segment published by md_sidecar.py; empty = always poll the venues
+MD_BUS_NAME = os.getenv("MD_BUS_NAME", "")
+
+# JSON overlay on config.py, re-read between cycles when it changes (see helpers/config_watch.py)
+CONFIG_FILE = os.getenv("BOT_CONFIG_FILE", "bot_config.json")
+CONFIG_POLL_S = 2.0
+
+# On shutdown every market's resting orders are cancelled in parallel; venues
+# still unconfirmed after this many seconds are reported and left behind
+SHUTDOWN_CANCEL_S = float(os.getenv("SHUTDOWN_CANCEL_S", "20"))
+
 RUNNING = True
+STOP = threading.Event()  # wakes the scheduler wait on shutdown
 
 
 def stop(*_):
     global RUNNING
     RUNNING = False
+    STOP.set()
     logger.info("Shutting down...")
 
 
@@ -36,62 +65,558 @@ signal.signal(signal.SIGINT, stop)
 signal.signal(signal.SIGTERM, stop)
 
 
-def build_adapter(cfg):
-    adapters = {
-        "bitmart": BitMartAdapter,
-        "p2b": P2BAdapter,
-        "biconomy": BiconomyAdapter,
-        "tapbit": TapbitAdapter,
-        "dextrade": DexTradeAdapter,
-        "backtest": BacktestAdapter,
-    }
-    return adapters[cfg.id](cfg)
+def _short_error(e: Exception) -> str:
+    error_msg = str(e)
+    if len(error_msg) > 200:
+        error_msg = error_msg[:200] + "..."
+    return error_msg
 
 
-def main():
-    adapters = []
+def connect_adapter(cfg):
+    """
+    Build, connect and warm a single adapter.
+    Returns the adapter, or None if the exchange should be skipped.
+    """
+    logger.debug(f"Initializing {cfg.id} adapter...")
 
-    for cfg in EXCHANGES:
-        if not cfg.enabled:
-            continue
+    try:
+        ad = build_adapter(cfg)
+    except Exception as e:
+        logger.warning(f"{cfg.id}: init failed ({_short_error(e)}) — skipping this exchange")
+        logger.debug("Full error:", exc_info=True)
+        return None
+
+    if cfg.dry_run and cfg.shadow:
+        ad.shadow = ShadowBook(cfg.id, ad.cancel_batch_size)
+        logger.info(f"{cfg.id}: shadow mode — orders are simulated against live market data")
+
+    try:
+        ad.connect()          # try connecting first
+    except Exception as e:
+        if cfg.dry_run:
+            # In dry mode → still add adapter
+            logger.info(f"{cfg.id}: connect failed ({_short_error(e)}) — continuing in dry-run mode")
+            return ad
+        logger.warning(f"{cfg.id}: connect failed ({_short_error(e)}) — skipping this exchange")
+        logger.debug("Full error:", exc_info=True)
+        return None
 
-        logger.debug(f"Initializing {cfg.id} adapter...")
+    # Warm the connection pool so the first cycle doesn't pay DNS/TLS setup
+    try:
+        ad.warm()
+    except Exception as e:
+        logger.debug(f"{cfg.id}: warm-up failed ({_short_error(e)})")
 
+    # A cassette replay re-runs a recorded session: it must not write to the
+    # live journal/audit log (as with fills, both are off in replay)
+    persist = not cfg.dry_run and cassette.MODE != "replay"
+
+    if AUDIT_DIR and persist:
         try:
-            ad = build_adapter(cfg)
-            ad.connect()          # try connecting first
-            adapters.append(ad)   # add on success
+            ad.audit = AuditLog(AUDIT_DIR, cfg.id, max(ad.get_steps()[0], 1e-10))
+        except Exception as e:
+            logger.warning(f"{cfg.id}: audit log unavailable ({_short_error(e)})")
+
+    if JOURNAL_DIR and persist:
+        restore_orders(ad)
+
+    return ad
+
+
+def market_key(ad) -> str:
+    return f"{ad.exchange_name}:{ad.symbol}"
+
+
+def restore_orders(ad) -> None:
+    """
+    Attach the venue's order journal and reconcile it against one open-orders
+    fetch, so the first cycle knows which resting orders are ours. If the
+    venue cannot be asked, the journal is kept as is (never reconciled
+    against an empty answer).
+    """
+    try:
+        ad.journal = OrderJournal(JOURNAL_DIR, ad.exchange_name)
+    except Exception as e:
+        logger.warning(f"{ad.exchange_name}: order journal unavailable ({_short_error(e)})")
+        return
+
+    known = len(ad.journal.live)
+    if not known:
+        return
+
+    try:
+        open_ids = {str(o["id"]) for view in ad.symbol_views()
+                    for o in view.fetch_open_orders(strict=True) if o.get("id")}
+        ours = ad.journal.reconcile(open_ids)
+        ad.journal.compact()
+        logger.info(f"{ad.exchange_name}: restored {len(ours)} live orders from journal "
+                    f"({known - len(ours)} filled/cancelled while down)")
+    except Exception as e:
+        logger.warning(f"{ad.exchange_name}: journal reconcile skipped, {known} orders kept ({_short_error(e)})")
+
+
+def attach_md_bus(adapters) -> None:
+    """Read BTC/top-of-book from the sidecar's shared memory instead of the network."""
+    if not MD_BUS_NAME or not adapters:
+        return
+    try:
+        bus = MarketDataBus.attach(MD_BUS_NAME)
+    except Exception as e:
+        logger.warning(f"market-data bus '{MD_BUS_NAME}' unavailable ({_short_error(e)}) — polling venues")
+        return
+    for ad in adapters:
+        ad.md_bus = bus
+    logger.info(f"Reading market data from shared-memory bus '{MD_BUS_NAME}'")
+
+
+def track_fills(fills, pnl, ad, cfg) -> None:
+    """Ingest a live venue's fills; its positions are seeded from the stored history first."""
+    if fills is None or cfg.dry_run:
+        return
+    pnl.targets[cfg.id] = cfg.inventory_target
+    pnl.seed(cfg.id, load_fills(fills.directory, cfg.id))
+    ad.pnl = pnl
+    fills.add(ad)
 
+
+def fills_to_balances(by_key):
+    """FillIngester listener: move filled amounts between the venue's cached free balances."""
+    def on_fills(venue, fills) -> None:
+        ad = by_key.get(venue)
+        if ad is None:
+            return
+        views = {view.symbol: view for view in ad.symbol_views()}
+        for f in fills:
+            view = views.get(f.symbol)
+            if view is not None:
+                base, quote = view.base_quote()
+                ad.balance_cache.fill(f.order_id, base, quote, f.side, f.price, f.qty, f.ts)
+    return on_fills
+
+
+def connect_all(configs):
+    """Connect and warm all enabled exchanges in parallel, preserving config order."""
+    enabled = [cfg for cfg in configs if cfg.enabled]
+    if not enabled:
+        return []
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=len(enabled), thread_name_prefix="connect") as pool:
+        futures = {pool.submit(connect_adapter, cfg): cfg.id for cfg in enabled}
+        for fut in as_completed(futures):
+            results[futures[fut]] = fut.result()
+
+    return [results[cfg.id] for cfg in enabled if results.get(cfg.id) is not None]
+
+
+def reference_mid(ad):
+    """
+    Venue's reference mid for this cycle (BTC is cached, so run_once reuses it);
+    None when the fetch failed or fell back to the placeholder price.
+    """
+    try:
+        btc = observed_btc(ad.btc_last())
+    except Exception as e:
+        logger.debug(f"{ad.exchange_name}: reference fetch failed ({_short_error(e)})")
+        return None
+    return btc * SETTINGS.reference_multiplier if btc is not None else None
+
+
+def watch_reference(scheduler, adapters, anchors) -> None:
+    """
+    Check BTC between deadlines and pull venues forward when it moves.
+
+    Venues on the shared-memory bus read their own reference for free. The
+    rest share one BTC fetch from the first of them that answers (a failed
+    fetch or the fallback price is no observation); each venue compares the
+    move since it last quoted (anchors) against the same source, so the basis
+    between venues cancels out.
+    """
+    polled = [ad for ad in adapters if ad.md_bus is None]
+    source, source_btc = None, None
+    for ad in polled:
+        try:
+            with cassette.channel("poll"):
+                source_btc = observed_btc(ad.fetch_btc_last())
         except Exception as e:
-            error_msg = str(e)
-            if len(error_msg) > 200:
-                error_msg = error_msg[:200] + "..."
-
-            if cfg.dry_run:
-                # In dry mode → still add adapter
-                logger.info(f"{cfg.id}: connect failed ({error_msg}) — continuing in dry-run mode")
-                adapters.append(ad)
+            logger.debug(f"{ad.exchange_name}: reference poll failed ({_short_error(e)})")
+        if source_btc is not None:
+            source = ad.exchange_name
+            break
+
+    for ad in adapters:
+        key = ad.exchange_name
+        v = scheduler.venues.get(key)
+        if v is None or v.mid is None:
+            continue
+        if ad.md_bus is not None:
+            btc = observed_btc(ad.md_bus.reference_last(key))
+            mid = btc * SETTINGS.reference_multiplier if btc is not None else None
+        elif source_btc is not None and anchors.get(key, (None,))[0] == source:
+            mid = v.mid + (source_btc - anchors[key][1]) * SETTINGS.reference_multiplier
+        else:
+            mid = None
+        if mid is not None and scheduler.moved(key, mid):
+            logger.debug(f"{key}: reference moved {abs(mid - v.mid) / v.tick:.0f} ticks — requoting early")
+
+    if source_btc is not None:
+        for ad in polled:
+            if anchors.get(ad.exchange_name, (None,))[0] != source:
+                anchors[ad.exchange_name] = (source, source_btc)
+
+
+def scheduler_params() -> dict:
+    return dict(
+        interval_min_s=SETTINGS.interval_min_s,
+        interval_max_s=SETTINGS.interval_max_s,
+        trigger_ticks=SETTINGS.requote_trigger_ticks,
+        min_move_ticks=SETTINGS.requote_min_move_ticks,
+        stretch_factor=SETTINGS.requote_stretch,
+        max_idle_s=SETTINGS.requote_max_idle_s,
+    )
+
+
+def _cancel_market(view) -> Tuple[str, List[str]]:
+    """
+    Mass-cancel one market (native cancel-all, batch or concurrent single
+    cancels — whatever the adapter has), then ask the venue what is still
+    open. Returns ("", []) when clear, else (reason, order ids not confirmed);
+    when the venue cannot be asked, the ids are the journal's live ones.
+    """
+    def journalled():
+        return sorted(view.journal.live_ids(view.symbol)) if view.journal is not None else []
+
+    try:
+        cancelled = view.mass_cancel()
+        logger.info(f"{view.label}: cancelled {cancelled} resting orders")
+    except Exception as e:
+        logger.warning(f"{view.label}: cancel on teardown failed: {e}")
+        return "cancel failed", journalled()
+    try:
+        view.begin_cycle()  # drop the open-orders list cached before the cancel
+        left = [str(o["id"]) for o in view.fetch_open_orders(strict=True) if o.get("id")]
+    except Exception as e:
+        return f"not confirmed (open orders unavailable: {_short_error(e)})", journalled()
+    return ("still open", left) if left else ("", [])
+
+
+def close_logs(ad) -> None:
+    if ad.journal is not None:
+        ad.journal.close()
+    if ad.audit is not None:
+        ad.audit.close()
+
+
+def teardown_adapter(ad, symbols=None) -> None:
+    """Cancel the adapter's resting orders (every market, or just `symbols`)."""
+    if ad.shadow is not None and symbols is None:
+        logger.info(ad.shadow.report())
+    if ad.dry_run:
+        return
+    ad.begin_cycle()
+    for view in ad.symbol_views():
+        if symbols is not None and view.symbol not in symbols:
+            continue
+        reason, left = _cancel_market(view)
+        if reason:
+            logger.warning(f"{view.label}: {len(left)} order(s) {reason}: {left[:20]}")
+
+
+def shutdown_cancel(adapters, deadline_s: float = SHUTDOWN_CANCEL_S) -> Dict[str, Dict[str, Tuple[str, List[str]]]]:
+    """
+    Cancel the resting orders of every market on every venue at once (one
+    daemon thread per market) and wait at most deadline_s. Returns
+    {venue: {market: (reason, order ids)}} for the markets not confirmed
+    clear; a market still cancelling at the deadline reports the journal's
+    live ids for it (empty without a journal). The journal and audit log of
+    each venue whose cancels all finished are closed; a venue still
+    cancelling keeps them open, since its threads may yet write to them.
+    """
+    started = time.monotonic()
+    results: Dict[tuple, Tuple[str, List[str]]] = {}
+    threads = []
+    for ad in adapters:
+        if ad.shadow is not None:
+            logger.info(ad.shadow.report())
+        if ad.dry_run:
+            continue
+        ad.begin_cycle()
+        for view in ad.symbol_views():
+            key = (ad.exchange_name, view.symbol)
+
+            def work(view=view, key=key):
+                results[key] = _cancel_market(view)
+
+            t = threading.Thread(target=work, name=f"shutdown-{view.label}", daemon=True)
+            t.start()
+            threads.append((key, view, t))
+
+    deadline = started + deadline_s
+    for _, _, t in threads:
+        t.join(max(0.0, deadline - time.monotonic()))
+
+    report: Dict[str, Dict[str, Tuple[str, List[str]]]] = {}
+    running = set()
+    for (venue, symbol), view, t in threads:
+        if t.is_alive():
+            running.add(venue)
+            left = sorted(view.journal.live_ids(symbol)) if view.journal is not None else []
+            outcome = (f"not confirmed within {deadline_s:.0f}s", left)
+        else:
+            outcome = results.get((venue, symbol), ("", []))
+        if outcome[0]:
+            report.setdefault(venue, {})[symbol] = outcome
+
+    for venue, markets in report.items():
+        for symbol, (reason, left) in markets.items():
+            logger.warning(f"{venue}:{symbol}: {len(left)} order(s) {reason}"
+                           + (f": {', '.join(left[:20])}{' ...' if len(left) > 20 else ''}" if left else ""))
+    for ad in adapters:
+        if ad.exchange_name not in running:
+            close_logs(ad)
+    if threads:
+        logger.info(f"Shutdown cancel: {len(threads) - sum(len(m) for m in report.values())}/{len(threads)} "
+                    f"market(s) confirmed clear in {time.monotonic() - started:.1f}s")
+    return report
+
+
+def _markets(cfg) -> set:
+    return {cfg.symbol, cfg.symbol_override, *cfg.symbols} - {None}
+
+
+def reload_config(watcher, running, by_key, scheduler, prev_ids, exchange_ids, fills=None, pnl=None) -> None:
+    """
+    Apply a changed config file between cycles. Settings are swapped in one
+    step; only venues whose ExchangeConfig changed are touched:
+
+      - stopped (disabled/removed): orders cancelled, journal closed
+      - started: connected and scheduled like at startup
+      - changed: rebuilt; orders are cancelled only where the old adapter can
+        no longer reach them (dropped markets, new keys, going dry-run) —
+        otherwise the journal carries the resting ladder over to the new one
+    """
+    loaded = watcher.poll()
+    if loaded is None:
+        return
+    new_settings, new_exchanges = loaded
+
+    changed_fields = apply_settings(SETTINGS, new_settings)
+    for name, value in scheduler_params().items():
+        setattr(scheduler, name, value)
+    EXCHANGES[:] = new_exchanges
+
+    wanted = [cfg for cfg in new_exchanges if exchange_ids is None or cfg.id in exchange_ids]
+    started, stopped, changed = diff_exchanges(list(running.values()), wanted)
+
+    def drop(cfg, cancel_symbols=None, cancel_all=True):
+        ad = by_key.pop(cfg.id, None)
+        running.pop(cfg.id, None)
+        scheduler.remove(cfg.id)
+        if fills is not None:
+            fills.remove(cfg.id)
+        if ad is None:
+            return
+        if cancel_all or cancel_symbols:
+            teardown_adapter(ad, None if cancel_all else cancel_symbols)
+        close_logs(ad)
+        for mkey in [k for k in prev_ids if k.startswith(f"{cfg.id}:")]:
+            if cancel_all or mkey.split(":", 1)[1] in (cancel_symbols or ()):
+                prev_ids.pop(mkey)
+
+    def start(cfg):
+        ad = connect_adapter(cfg)
+        if ad is None:
+            return
+        bus = next((a.md_bus for a in by_key.values() if a.md_bus is not None), None)
+        if bus is not None:
+            ad.md_bus = bus
+        else:
+            attach_md_bus([ad])
+        by_key[cfg.id] = ad
+        running[cfg.id] = cfg
+        scheduler.add(cfg.id)
+        track_fills(fills, pnl, ad, cfg)
+        if ad.journal is not None:
+            for view in ad.symbol_views():
+                prev_ids.setdefault(market_key(view), ad.journal.live_ids(view.symbol))
+
+    for cfg in stopped:
+        drop(cfg)
+    for old, new in changed:
+        account_changed = (old.api_key_env, old.secret_env, old.uid_env) != (new.api_key_env, new.secret_env,
+                                                                          new.uid_env)
+        drop(old, cancel_symbols=_markets(old) - _markets(new),
+             cancel_all=account_changed or (new.dry_run and not old.dry_run))
+        start(new)
+    for cfg in started:
+        start(cfg)
+
+    logger.info(f"Config reloaded: {len(changed_fields)} setting(s) changed"
+                f"{' (' + ', '.join(changed_fields) + ')' if changed_fields else ''}; "
+                f"venues +{len(started)} -{len(stopped)} ~{len(changed)}")
+
+
+def main(exchange_ids=None, on_cycle=None):
+    """
+    Run the quoting loop.
+
+    exchange_ids: only run these ExchangeConfig ids (used by supervisor.py shards)
+    on_cycle: optional callback(dict) with per-symbol cycle stats
+    """
+    started = time.monotonic()
+
+    # SIGUSR1 (or PROFILER_PORT) toggles the sampling profiler
+    StackSampler.from_env().install(int(os.getenv("PROFILER_PORT", "0") or 0))
+
+    # Cassette replay re-runs a recorded session: same seed, same number of
+    # cycles, with helpers.clock fast-forwarded through the deadlines and
+    # reference polls instead of waiting for them.
+    session = cassette.begin_session()
+    replay = cassette.MODE == "replay"
+    cycles = 0
+
+    watcher = None
+    if CONFIG_FILE and not replay:
+        watcher = ConfigWatcher(CONFIG_FILE, SETTINGS, EXCHANGES, available_adapters())
+        loaded = watcher.poll()
+        if loaded is not None:
+            apply_settings(SETTINGS, loaded[0])
+            EXCHANGES[:] = loaded[1]
+            logger.info(f"Loaded config overrides from {CONFIG_FILE}")
+
+    configs = [cfg for cfg in EXCHANGES if exchange_ids is None or cfg.id in exchange_ids]
+    adapters = connect_all(configs)
+    logger.info(f"Connected {len(adapters)} exchange(s) in {time.monotonic() - started:.2f}s")
+    attach_md_bus(adapters)
+
+    first_quote_logged = set()
+    prev_ids = {
+        market_key(view): ad.journal.live_ids(view.symbol)
+        for ad in adapters if ad.journal is not None
+        for view in ad.symbol_views()
+    }
+
+    scheduler = RequoteScheduler(**scheduler_params())
+    by_key = {ad.exchange_name: ad for ad in adapters}
+    for key in by_key:
+        scheduler.add(key)
+    anchors = {}  # venue -> (source venue, polled BTC) when it last quoted
+    next_poll = clock.monotonic() + SETTINGS.reference_poll_s
+
+    running = {cfg.id: cfg for cfg in configs if cfg.id in by_key}
+
+    # Own fills are polled in the background (live venues with a trade-history endpoint)
+    # and feed the inventory/PnL engine and the cached free balances
+    fills = FillIngester() if FILLS_DIR and not replay else None
+    pnl = PnLEngine() if fills is not None else None
+    if fills is not None:
+        fills.listeners.append(pnl.on_fills)
+        fills.listeners.append(fills_to_balances(by_key))
+        for ad in adapters:
+            track_fills(fills, pnl, ad, running[ad.exchange_name])
+        fills.start()
+
+    profiler = MemoryProfiler.from_env()
+    next_reload = clock.monotonic() + CONFIG_POLL_S
+
+    while RUNNING and (by_key or watcher is not None):
+        if watcher is not None and clock.monotonic() >= next_reload:
+            reload_config(watcher, running, by_key, scheduler, prev_ids, exchange_ids, fills, pnl)
+            next_reload = clock.monotonic() + CONFIG_POLL_S
+
+        for key in scheduler.pop_due():
+            if not RUNNING:
+                break
+            if replay and cycles >= session["cycles"]:
+                stop()
+                break
+            cycles += 1
+            ad = by_key[key]
+
+            if ad.breakers.is_open():
+                # Venue down: don't spend a cycle on calls that would fail fast anyway
+                scheduler.defer(key, ad.breakers.retry_in())
+                logger.info(f"{key}: circuit open — next probe in {ad.breakers.retry_in():.0f}s")
                 continue
-            else:
-                logger.warning(f"{cfg.id}: connect failed ({error_msg}) — skipping this exchange")
-                logger.debug(f"Full error:", exc_info=True)
+
+            # One market-data fetch per venue, then one cycle per symbol. Calls made
+            # since the last cycle (reference polls) are dropped; fills polled
+            # meanwhile by the ingester show up under their own class.
+            calls = counter_for(key)
+            calls.take()
+            ad.begin_cycle()
+            mid = reference_mid(ad)
+            if not scheduler.should_requote(key, mid):
+                logger.debug(f"{key}: reference unchanged — skipping refresh")
                 continue
 
-    prev_ids = {}
+            for view in ad.symbol_views():
+                if not RUNNING:
+                    break  # shutting down: don't place ladders that are about to be cancelled
+                mkey = market_key(view)
+                cycle_start = time.monotonic()
+                ok = True
+                try:
+                    prev_ids[mkey] = run_once(view, prev_ids.get(mkey))
+                except Exception:
+                    logger.exception(f"Error on {view.label}")
+                    ok = False
 
-    while RUNNING:
-        start = time.time()
+                if on_cycle is not None:
+                    on_cycle({
+                        "market": mkey,
+                        "ok": ok,
+                        "placed": len(prev_ids.get(mkey) or ()),
+                        "cycle_s": time.monotonic() - cycle_start,
+                        "ts": time.time(),
+                    })
+                if not ok:
+                    continue
 
-        for ad in adapters:
-            key = ad.exchange_name   # safer unique identifier
-            try:
-                prev_ids[key] = run_once(ad, prev_ids.get(key))
-            except Exception:
-                logger.exception(f"Error on {ad.exchange_name}")
+                if prev_ids[mkey] and mkey not in first_quote_logged:
+                    first_quote_logged.add(mkey)
+                    logger.info(f"{view.label}: time to first quote {time.monotonic() - started:.2f}s")
+
+            scheduler.quoted(key, mid, max(ad.get_steps()[0], 1e-10))
+            anchors.pop(key, None)
+
+            used = by_class(calls.take())
+            if used:
+                logger.debug(f"{key}: {sum(used.values())} API call(s) this cycle ({format_counts(used)})")
+
+            if profiler is not None:
+                profiler.on_cycle(by_key.values(), {
+                    "prev_ids": sum(len(ids or ()) for ids in prev_ids.values()),
+                    "prev_ids.markets": len(prev_ids),
+                    "scheduler.heap": len(scheduler._heap),
+                    "first_quote_logged": len(first_quote_logged),
+                })
+
+        now = clock.monotonic()
+        if SETTINGS.reference_poll_s > 0 and now >= next_poll:
+            watch_reference(scheduler, list(by_key.values()), anchors)
+            next_poll = clock.monotonic() + SETTINGS.reference_poll_s
+
+        wake = scheduler.next_deadline() or now + 1.0
+        if SETTINGS.reference_poll_s > 0:
+            wake = min(wake, next_poll)
+        if watcher is not None:
+            wake = min(wake, next_reload)
+        if replay:
+            clock.advance_to(wake)  # same polls and deadlines as the recording, without the wait
+        else:
+            STOP.wait(max(0.05, wake - clock.monotonic()))
+
+    if scheduler.early or scheduler.skipped:
+        logger.info(f"Requotes: {scheduler.early} early (reference moved), {scheduler.skipped} skipped (unchanged)")
+
+    if fills is not None:
+        fills.stop()
 
-        sleep_time = random.uniform(SETTINGS.interval_min_s, SETTINGS.interval_max_s)
-        time.sleep(max(0.1, sleep_time - (time.time() - start)))
+    # Leave nothing resting on the books (also closes journals and audit logs)
+    shutdown_cancel(list(by_key.values()))
 
+    cassette.end_session(session, cycles)
     logger.info("Bot stopped cleanly.")
 
 
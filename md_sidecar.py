@@ -0,0 +1,90 @@
+# md_sidecar.py — Single market-data poller for all bot processes on this host
+#
+#   MD_BUS_NAME=oho_md python md_sidecar.py      # start once per host
+#   MD_BUS_NAME=oho_md python main.py            # bots read from the bus
+#
+# Polls BTC reference and top-of-book for every enabled exchange/symbol and
+# publishes them into a shared-memory segment (helpers/md_bus.py). Bots fall
+# back to polling the venue themselves if a slot is missing or stale.
+import os
+import time
+import signal
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from config import EXCHANGES
+from adapters.base import observed_btc
+from adapters.registry import build_adapter
+from helpers.md_bus import MarketDataBus, DEFAULT_NAME, reference_key, quote_key
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format="%(asctime)s | %(levelname)-7s | %(name)s | %(message)s"
+)
+logger = logging.getLogger("oho_bot.md_sidecar")
+
+POLL_INTERVAL_S = float(os.getenv("MD_POLL_S", "1.0"))
+
+RUNNING = True
+
+
+def stop(*_):
+    global RUNNING
+    RUNNING = False
+
+
+def poll_venue(bus: MarketDataBus, ad) -> None:
+    try:
+        last = observed_btc(ad.fetch_btc_last())
+        if last is not None:  # a failed fetch leaves the slot to go stale
+            bus.publish(reference_key(ad.exchange_name), last=last)
+    except Exception as e:
+        logger.warning(f"{ad.exchange_name} BTC poll failed: {e}")
+
+    try:
+        markets = ad.markets()
+        quotes = ad.fetch_tickers(markets) if len(markets) > 1 else {ad.symbol: ad.fetch_best_quotes()}
+        for symbol, (bid, ask) in quotes.items():
+            if bid or ask:
+                bus.publish(quote_key(ad.exchange_name, symbol), bid=bid, ask=ask)
+    except Exception as e:
+        logger.warning(f"{ad.exchange_name} quotes poll failed: {e}")
+
+
+def main():
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    adapters = []
+    for cfg in EXCHANGES:
+        if not cfg.enabled:
+            continue
+        try:
+            adapters.append(build_adapter(cfg))
+        except Exception as e:
+            logger.warning(f"{cfg.id}: init failed ({e}) — not publishing")
+
+    if not adapters:
+        logger.error("No enabled exchanges — nothing to publish")
+        return
+
+    name = os.getenv("MD_BUS_NAME") or DEFAULT_NAME
+    bus = MarketDataBus.create(name)
+    logger.info(f"Publishing {len(adapters)} venue(s) to shared memory '{name}' every {POLL_INTERVAL_S}s")
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(adapters), thread_name_prefix="md") as pool:
+            while RUNNING:
+                start = time.monotonic()
+                list(pool.map(lambda ad: poll_venue(bus, ad), adapters))
+                time.sleep(max(0.05, POLL_INTERVAL_S - (time.monotonic() - start)))
+    finally:
+        bus.close()
+        logger.info("Market-data sidecar stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,15 @@
 
 import random
 import logging
-from typing import Set, Optional
+from typing import Set, Optional, List, Tuple
 
 from config import SETTINGS
 from helpers.utils import (
     build_ladder, random_sizes, clamp_by_limits, ensure_min_notional,
     quantize_down, quantize_up
 )
-from adapters.base import BaseAdapter
+from helpers.priority import placement_order
+from adapters.base import FALLBACK_BTC_LAST, BaseAdapter, observed_btc
 
 logger = logging.getLogger("oho_bot")
 
@@ -26,22 +27,33 @@ def run_once(adapter: BaseAdapter, prev_cycle_ids: Optional[Set[str]] = None) ->
 
     # ---------------- Fetch BTC price ----------------
     try:
-        btc_price = adapter.fetch_btc_last()
+        btc_price = observed_btc(adapter.btc_last())  # shared by all of the venue's symbols this cycle
     except Exception as e:
         logger.warning(f"{adapter.exchange_name} BTC fetch failed: {e}, using fallback")
-        btc_price = 92_000.0
+        btc_price = FALLBACK_BTC_LAST
+    if btc_price is None:
+        logger.warning(f"{adapter.exchange_name} BTC fetch failed, using fallback")
+        btc_price = FALLBACK_BTC_LAST
 
     # ---------------- Reference price ----------------
     mid_price = btc_price * SETTINGS.reference_multiplier
     if mid_price <= 0:
         logger.warning(f"{adapter.exchange_name} mid_price invalid ({mid_price:.12f}), skipping cycle")
         return prev_cycle_ids
+    adapter.cycle_mid = mid_price
+    if adapter.pnl is not None:
+        adapter.pnl.mark(adapter.exchange_name, adapter.symbol, mid_price)
 
     # ---------------- Exchange info ----------------
     limits = adapter.get_limits()
     price_step, amount_step = adapter.get_steps()
     tick = max(price_step, 1e-10)
-    best_bid, best_ask = adapter.fetch_best_quotes() or (None, None)
+    best_bid, best_ask = adapter.best_quotes()
+
+    # Paper trading: settle the resting virtual ladder against the live book first
+    shadow = adapter.shadow if adapter.dry_run else None
+    if shadow is not None:
+        _shadow_observe(adapter, shadow, best_bid, best_ask)
 
     # ---------------- Ladder params ----------------
     depth = random.randint(SETTINGS.depth_min, SETTINGS.depth_max)
@@ -52,65 +64,174 @@ def run_once(adapter: BaseAdapter, prev_cycle_ids: Optional[Set[str]] = None) ->
     sizes_buy = random_sizes(depth, SETTINGS.size_min, SETTINGS.size_max)
     sizes_sell = random_sizes(depth, SETTINGS.size_min, SETTINGS.size_max)
 
+    # ==================== PLAN ====================
+    buys, rej_buy = _plan_side(adapter, "buy", buy_prices, sizes_buy, mid_price, best_ask, tick,
+                               limits, amount_step)
+    sells, rej_sell = _plan_side(adapter, "sell", sell_prices, sizes_sell, mid_price, best_bid, tick,
+                                 limits, amount_step)
+    rejected = rej_buy + rej_sell
+
+    # ==================== VALIDATE ====================
+    # One local pass over the whole ladder (alignment, minimums, post-only
+    # crossing, free balance) so orders the venue would bounce are never sent.
+    validator = adapter.validator
+    base_ccy, quote_ccy = None, None
+    free = None
+    if not adapter.dry_run:
+        base_ccy, quote_ccy = adapter.base_quote()
+        free = adapter.balance_cache.free([base_ccy, quote_ccy])
+
+    planned = len(buys) + len(sells)
+    buys = validator.validate("buy", buys, adapter, tick, amount_step, limits, best_bid, best_ask,
+                              free[quote_ccy] if free else None)
+    sells = validator.validate("sell", sells, adapter, tick, amount_step, limits, best_bid, best_ask,
+                               free[base_ccy] if free else None)
+    dropped = planned - len(buys) - len(sells)
+    if dropped:
+        logger.info(f"{adapter.label} pre-trade checks dropped {dropped} levels")
+
+    # ==================== SUBMIT ====================
+    # Crash-safe order journal (live mode only — dry-run ids are fake)
+    journal = adapter.journal if not adapter.dry_run else None
+    audit = adapter.audit if not adapter.dry_run else None
+
     new_order_ids: Set[str] = set()
     attempted = 0
-    rejected = 0
 
-    # ==================== BUY SIDE ====================
-    for i, (raw_price, raw_qty) in enumerate(zip(buy_prices, sizes_buy)):
-        adjusted_price = round(raw_price, 8) if raw_price < 0.01 else adapter.price_to_precision(raw_price)
+    halted = False
+    exhausted: Set[str] = set()  # sides whose deeper levels would bounce on balance
 
-        # Never buy above reference
-        if adjusted_price >= mid_price:
-            rejected += 1
+    # Inside-out: nearest mid first, alternating sides, so the touch goes live first
+    for side, i, price, qty in placement_order(buys, sells, mid_price):
+        if halted:
+            break
+        if side in exhausted:
             continue
+        attempted += 1
+        ref = journal.intent(side, price, qty, adapter.symbol) if journal else None
+        started = audit.placing(adapter.symbol, side, price, qty) if audit else None
+        oid = None
+        adapter.last_reject = None
+        try:
+            if shadow is not None:
+                oid = shadow.place(adapter.symbol, side, price, qty)
+            else:
+                oid = adapter.create_limit(side, price, qty)
+            if oid:
+                new_order_ids.add(oid)
+            else:
+                rejected += 1
+        except Exception as e:
+            logger.warning(f"{adapter.exchange_name} {side.upper()}[{i}] failed: {e}")
+            adapter._note_reject(e)
+            rejected += 1
+        if journal:
+            if oid:
+                journal.ack(ref, oid)
+            else:
+                journal.reject(ref)
+        if audit:
+            if oid:
+                audit.acked(adapter.symbol, side, price, qty, oid, started)
+            else:
+                audit.rejected(adapter.symbol, side, price, qty, started)
+
+        if not oid:
+            reason = validator.record_reject(adapter.last_reject)
+            if reason == "balance":
+                # Deeper levels on this side will fail the same way
+                adapter.balance_cache.invalidate()
+                exhausted.add(side)
+                continue
+            if reason == "rate_limit":
+                halted = True
+        if oid and base_ccy:
+            if side == "buy":
+                adapter.balance_cache.reserve(oid, quote_ccy, price * qty)
+            else:
+                adapter.balance_cache.reserve(oid, base_ccy, qty)
 
-        # Maker guard
-        if best_ask is not None and SETTINGS.maker_guard_ticks > 0:
-            allowed_max = best_ask - SETTINGS.maker_guard_ticks * tick
-            if adjusted_price >= allowed_max:
-                adjusted_price = quantize_down(allowed_max, tick)
+    # ==================== CLEANUP (ADAPTER-OWNED) ====================
+    try:
+        if shadow is not None:
+            shadow.cancel([oid for oid in prev_cycle_ids if oid not in new_order_ids])
+        elif not adapter.dry_run:
+            adapter.cancel_all_orders()
+            logger.info(f"{adapter.exchange_name} full cleanup complete")
+    except Exception as e:
+        logger.warning(f"{adapter.exchange_name} cleanup error: {e}")
 
-        adjusted_price = max(adjusted_price, tick)
+    if journal:
+        journal.checkpoint()
+    if audit:
+        audit.checkpoint()
+    validator.end_cycle()
 
-        if adjusted_price >= mid_price:
-            rejected += 1
-            continue
+    # ==================== STATUS ====================
+    status = "live" if rejected == 0 else f"live ({rejected}/{attempted} rejected)"
+    if validator.venue_rejects:
+        status += f" | rejects: {validator.summary()}"
+    if shadow is not None:
+        status = f"shadow {shadow.summary(adapter.symbol)}" + status[len("live"):]
+    tripped = adapter.breakers.summary()
+    if tripped:
+        status += f" | circuits: {tripped}"
+    inventory = adapter.pnl.summary(adapter.exchange_name, adapter.symbol) if adapter.pnl is not None else None
+    if inventory:
+        status += f" | {inventory}"
+    logger.info(
+        f"{adapter.label.upper():<9} | BTC={btc_price:,.0f} | "
+        f"ref={mid_price:.12f} | depth={depth} | placed={len(new_order_ids)} | {status}"
+    )
 
-        qty = clamp_by_limits(raw_qty, adjusted_price, limits)
-        if qty is None:
-            continue
+    return new_order_ids
 
-        qty = ensure_min_notional(adjusted_price, qty, limits, amount_step, adapter)
 
-        attempted += 1
+def _shadow_observe(adapter: BaseAdapter, shadow, best_bid: Optional[float], best_ask: Optional[float]) -> None:
+    trades = ()
+    if type(adapter).fetch_recent_trades is not BaseAdapter.fetch_recent_trades:
         try:
-            oid = adapter.create_limit("buy", adjusted_price, qty)
-            if oid and oid != "dry":
-                new_order_ids.add(oid)
-            elif oid != "dry":
-                rejected += 1
+            trades = adapter.fetch_recent_trades()
         except Exception as e:
-            logger.warning(f"{adapter.exchange_name} BUY[{i}] failed: {e}")
-            rejected += 1
+            logger.debug(f"{adapter.label} trades fetch failed: {e}")
+    fills = shadow.observe(adapter.symbol, best_bid, best_ask, trades)
+    if fills:
+        logger.info(f"{adapter.label} shadow: {fills} simulated fill(s)")
+
+
+def _plan_side(adapter: BaseAdapter, side: str, prices: List[float], sizes: List[float], mid_price: float,
+               opposite_best: Optional[float], tick: float, limits, amount_step: float
+               ) -> Tuple[List[Tuple[int, float, float]], int]:
+    """
+    Turn raw ladder prices/sizes into sendable (level, price, qty) orders.
+    Returns (orders, rejected) — levels that would cross the reference are counted as rejected.
+    """
+    orders = []
+    rejected = 0
+    buy = side == "buy"
 
-    # ==================== SELL SIDE ====================
-    for i, (raw_price, raw_qty) in enumerate(zip(sell_prices, sizes_sell)):
+    for i, (raw_price, raw_qty) in enumerate(zip(prices, sizes)):
         adjusted_price = round(raw_price, 8) if raw_price < 0.01 else adapter.price_to_precision(raw_price)
 
-        # Never sell below reference
-        if adjusted_price <= mid_price:
+        # Never buy above / sell below reference
+        if (adjusted_price >= mid_price) if buy else (adjusted_price <= mid_price):
             rejected += 1
             continue
 
-        if best_bid is not None and SETTINGS.maker_guard_ticks > 0:
-            allowed_min = best_bid + SETTINGS.maker_guard_ticks * tick
-            if adjusted_price <= allowed_min:
-                adjusted_price = quantize_up(allowed_min, tick)
+        # Maker guard: stay N ticks away from the opposite best
+        if opposite_best is not None and SETTINGS.maker_guard_ticks > 0:
+            if buy:
+                allowed_max = opposite_best - SETTINGS.maker_guard_ticks * tick
+                if adjusted_price >= allowed_max:
+                    adjusted_price = quantize_down(allowed_max, tick)
+            else:
+                allowed_min = opposite_best + SETTINGS.maker_guard_ticks * tick
+                if adjusted_price <= allowed_min:
+                    adjusted_price = quantize_up(allowed_min, tick)
 
         adjusted_price = max(adjusted_price, tick)
 
-        if adjusted_price <= mid_price:
+        if (adjusted_price >= mid_price) if buy else (adjusted_price <= mid_price):
             rejected += 1
             continue
 
@@ -119,31 +240,6 @@ def run_once(adapter: BaseAdapter, prev_cycle_ids: Optional[Set[str]] = None) ->
             continue
 
         qty = ensure_min_notional(adjusted_price, qty, limits, amount_step, adapter)
+        orders.append((i, adjusted_price, qty))
 
-        attempted += 1
-        try:
-            oid = adapter.create_limit("sell", adjusted_price, qty)
-            if oid and oid != "dry":
-                new_order_ids.add(oid)
-            elif oid != "dry":
-                rejected += 1
-        except Exception as e:
-            logger.warning(f"{adapter.exchange_name} SELL[{i}] failed: {e}")
-            rejected += 1
-
-    # ==================== CLEANUP (ADAPTER-OWNED) ====================
-    try:
-        if not adapter.dry_run:
-            adapter.cancel_all_orders()
-            logger.info(f"{adapter.exchange_name} full cleanup complete")
-    except Exception as e:
-        logger.warning(f"{adapter.exchange_name} cleanup error: {e}")
-
-    # ==================== STATUS ====================
-    status = "live" if rejected == 0 else f"live ({rejected}/{attempted} rejected)"
-    logger.info(
-        f"{adapter.exchange_name.upper():<9} | BTC={btc_price:,.0f} | "
-        f"ref={mid_price:.12f} | depth={depth} | placed={len(new_order_ids)} | {status}"
-    )
-
-    return new_order_ids
+    return orders, rejected
@@ -0,0 +1,204 @@
+# supervisor.py — Run enabled exchanges across worker processes
+#
+#   python supervisor.py            # one worker per enabled exchange (capped at CPU count)
+#   python supervisor.py 2          # two workers, exchanges sharded round-robin
+#
+# Each worker is a separate process running main.main() for its shard, so one
+# venue's CPU load, GC pause or crash can't stall the others. Crashed workers
+# are restarted with exponential backoff; SIGINT/SIGTERM is forwarded so every
+# worker drains (shutdown cancel) before the supervisor exits.
+import os
+import sys
+import time
+import queue
+import signal
+import logging
+import multiprocessing as mp
+from typing import List, Optional
+
+from config import EXCHANGES
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format="%(asctime)s | %(levelname)-7s | %(name)s | %(message)s"
+)
+logger = logging.getLogger("oho_bot.supervisor")
+
+RESTART_BACKOFF_S = 1.0       # first restart delay, doubled per consecutive crash
+RESTART_BACKOFF_MAX_S = 60.0
+STABLE_AFTER_S = 60.0         # a worker up this long resets its backoff
+DRAIN_TIMEOUT_S = 30.0        # time allowed for workers to cancel orders on shutdown
+STATUS_INTERVAL_S = 30.0
+
+
+def shard_exchanges(configs, workers: int) -> List[List[str]]:
+    """Split enabled exchange ids round-robin into at most `workers` shards."""
+    ids = [cfg.id for cfg in configs if cfg.enabled]
+    workers = max(1, min(workers, len(ids)))
+    shards = [ids[i::workers] for i in range(workers)]
+    return [s for s in shards if s]
+
+
+def _worker(shard_idx: int, exchange_ids: List[str], stats_q) -> None:
+    """Worker process entry point (must be importable for the spawn start method)."""
+    import main
+
+    # Stats are best-effort: never let a full queue hold up the worker's exit
+    stats_q.cancel_join_thread()
+
+    def on_cycle(stats: dict) -> None:
+        stats["worker"] = shard_idx
+        try:
+            stats_q.put_nowait(stats)
+        except Exception:
+            pass  # queue full — drop rather than block the quoting loop
+
+    main.main(exchange_ids=exchange_ids, on_cycle=on_cycle)
+
+
+class WorkerSlot:
+    def __init__(self, idx: int, exchange_ids: List[str]):
+        self.idx = idx
+        self.exchange_ids = exchange_ids
+        self.process: Optional[mp.Process] = None
+        self.started_at = 0.0
+        self.crashes = 0
+        self.restart_at: Optional[float] = None
+        # Rolling stats since the last status line
+        self.cycles = 0
+        self.errors = 0
+        self.placed = 0
+        self.cycle_s = 0.0
+        self.last_seen = 0.0
+
+
+class Supervisor:
+    def __init__(self, shards: List[List[str]]):
+        self.ctx = mp.get_context("spawn")
+        self.stats_q = self.ctx.Queue(maxsize=10_000)
+        self.slots = [WorkerSlot(i, ids) for i, ids in enumerate(shards)]
+        self.stopping = False
+
+    # ---------------- Process management ---------------- #
+
+    def _start(self, slot: WorkerSlot) -> None:
+        slot.process = self.ctx.Process(
+            target=_worker,
+            args=(slot.idx, slot.exchange_ids, self.stats_q),
+            name=f"worker-{slot.idx}",
+        )
+        slot.process.start()
+        slot.started_at = time.monotonic()
+        slot.restart_at = None
+        logger.info(f"worker-{slot.idx} started (pid={slot.process.pid}) for {', '.join(slot.exchange_ids)}")
+
+    def _check(self, slot: WorkerSlot) -> None:
+        now = time.monotonic()
+
+        if slot.restart_at is not None:
+            if now >= slot.restart_at:
+                self._start(slot)
+            return
+
+        if slot.process is None or slot.process.is_alive():
+            if slot.process is not None and slot.crashes and now - slot.started_at > STABLE_AFTER_S:
+                slot.crashes = 0
+            return
+
+        code = slot.process.exitcode
+        slot.crashes += 1
+        delay = min(RESTART_BACKOFF_MAX_S, RESTART_BACKOFF_S * (2 ** (slot.crashes - 1)))
+        slot.restart_at = now + delay
+        logger.warning(f"worker-{slot.idx} exited (code={code}) — restarting in {delay:.0f}s "
+                       f"(crash #{slot.crashes})")
+
+    def stop(self, *_):
+        if self.stopping:
+            return
+        self.stopping = True
+        logger.info("Supervisor shutting down — draining workers...")
+        for slot in self.slots:
+            if slot.process is not None and slot.process.is_alive():
+                os.kill(slot.process.pid, signal.SIGTERM)
+
+    def _drain(self) -> None:
+        deadline = time.monotonic() + DRAIN_TIMEOUT_S
+        for slot in self.slots:
+            if slot.process is None:
+                continue
+            slot.process.join(max(0.0, deadline - time.monotonic()))
+            if slot.process.is_alive():
+                logger.warning(f"worker-{slot.idx} did not drain in time — killing")
+                slot.process.kill()
+                slot.process.join()
+
+    # ---------------- Stats ---------------- #
+
+    def _collect(self, timeout: float) -> None:
+        try:
+            stats = self.stats_q.get(timeout=timeout)
+        except queue.Empty:
+            return
+        while True:
+            slot = self.slots[stats["worker"]]
+            slot.cycles += 1
+            slot.errors += 0 if stats.get("ok") else 1
+            slot.placed += stats.get("placed", 0)
+            slot.cycle_s += stats.get("cycle_s", 0.0)
+            slot.last_seen = time.monotonic()
+            try:
+                stats = self.stats_q.get_nowait()
+            except queue.Empty:
+                return
+
+    def _status(self) -> None:
+        now = time.monotonic()
+        up = sum(1 for s in self.slots if s.process is not None and s.process.is_alive())
+        parts = []
+        for s in self.slots:
+            avg = s.cycle_s / s.cycles if s.cycles else 0.0
+            seen = f"{now - s.last_seen:.0f}s ago" if s.last_seen else "never"
+            parts.append(f"w{s.idx}: cycles={s.cycles} err={s.errors} placed={s.placed} "
+                         f"avg={avg:.2f}s seen={seen}")
+            s.cycles = s.errors = s.placed = 0
+            s.cycle_s = 0.0
+        logger.info(f"workers {up}/{len(self.slots)} up | " + " | ".join(parts))
+
+    # ---------------- Main loop ---------------- #
+
+    def run(self) -> None:
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+
+        for slot in self.slots:
+            self._start(slot)
+
+        next_status = time.monotonic() + STATUS_INTERVAL_S
+        while not self.stopping:
+            self._collect(timeout=1.0)
+            for slot in self.slots:
+                self._check(slot)
+            if time.monotonic() >= next_status:
+                self._status()
+                next_status = time.monotonic() + STATUS_INTERVAL_S
+
+        self._drain()
+        logger.info("Supervisor stopped cleanly.")
+
+
+def main(argv=None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    workers = int(argv[0]) if argv else int(os.getenv("SUPERVISOR_WORKERS", "0") or 0)
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+
+    shards = shard_exchanges(EXCHANGES, workers)
+    if not shards:
+        logger.error("No enabled exchanges — nothing to supervise")
+        return
+
+    Supervisor(shards).run()
+
+
+if __name__ == "__main__":
+    main()